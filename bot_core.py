@@ -6,18 +6,35 @@ import time
 import random
 import threading
 from typing import Dict, Any, Optional
-import keyboard
 from game_state import GameState, BotStats
 from vision_engine import VisionEngine
 from decision_maker import DecisionMaker
 from input_controller import InputController
 from combo_system import ComboSystem
-from config import SCREEN_PROFILES, BOT_CONFIG, CONTROL_KEYS, JUNGLE_ROUTES
+from capture_backend import create_capture_backend
+from bot_pipeline import BotPipeline
+from object_tracker import ObjectTracker
+from frame_gate import RegionChangeGate
+from template_matcher import SkillCooldownDetector, TemplateCache
+from digit_ocr import DigitOCR
+from debug_writer import DebugFrameWriter
+from profiler import CycleProfiler, profile_stage
+from perf_governor import PerformanceGovernor
+from screen_layout import load_layout
+from config import BOT_CONFIG, CONTROL_KEYS, JUNGLE_ROUTES, STATS_CONFIG
 from utils import print_banner, print_status, get_screen_center, get_screen_size
 
+# Глобальные горячие клавиши (без них управление передается снаружи)
+try:
+    import keyboard
+    KEYBOARD_AVAILABLE = True
+except ImportError:
+    keyboard = None
+    KEYBOARD_AVAILABLE = False
+
 # Импорт ультра-обучения (опционально)
 try:
-    from ultra_learning import UltraLearningEngine, integrate_ultra_learning
+    from learning_engine import UltraLearningEngine, integrate_ultra_learning
     ULTRA_LEARNING_AVAILABLE = True
 except ImportError:
     ULTRA_LEARNING_AVAILABLE = False
@@ -26,11 +43,13 @@ except ImportError:
 class HayabusaBot:
     """Главный класс бота Хаябуса с AI обучением"""
     
-    def __init__(self):
+    def __init__(self, capture_backend=None, input_controller=None, controls=None):
         print_banner("🤖 MLBB ХАЯБУСА БОТ v3.0 AI EDITION", 70)
         
-        # Инициализация состояния
+        # Инициализация состояния (в конвейере его обновляет поток решений,
+        # а действия читают в потоке ввода - связанные чтения под блокировкой)
         self.state = GameState()
+        self.state_lock = threading.RLock()
         self.stats = BotStats()
         self.config = BOT_CONFIG.copy()
         
@@ -40,6 +59,8 @@ class HayabusaBot:
         self.running = False
         self.paused = False
         self.last_action = None
+        self.last_level = self.state.my_level
+        self.training_deferred = False
         
         # Таймеры действий
         self.last_action_time = {
@@ -55,24 +76,122 @@ class HayabusaBot:
         
         # Инициализация систем
         self.combo_system = ComboSystem()
+        
+        # Источник кадров ('region' создается движком зрения по его областям)
+        capture_kind = self.config.get('capture_backend', 'region')
+        if capture_backend is None and capture_kind != 'region':
+            capture_backend = create_capture_backend(
+                capture_kind, source=self.config.get('capture_source')
+            )
+        
         self.vision_engine = VisionEngine(
             self.screen_regions, 
-            self.config.get('vision_debug', False)
+            self.config.get('vision_debug', False),
+            capture_backend,
+            jungle_zones=self.layout.jungle_zones
         )
-        self.input_controller = InputController(
-            self.joystick_center,
-            self.joystick_radius,
-            self.attack_button,
-            self.skill_buttons
+        
+        # Постоянные ID и скорости объектов между кадрами
+        if self.config.get('object_tracking', False):
+            self.vision_engine.tracker = ObjectTracker(
+                full_search_interval=self.config.get('tracking_full_search_interval', 5)
+            )
+        
+        # Повторное использование результатов для неизменившихся областей
+        if self.config.get('frame_diff_gating', False):
+            self.vision_engine.change_gate = RegionChangeGate(
+                self.screen_regions,
+                threshold=self.config.get('frame_diff_threshold', 8.0)
+            )
+        
+        # Грубый поиск объектов на уменьшенной копии с уточнением кандидатов
+        self.vision_engine.pyramid_level = self.config.get('pyramid_level', 0)
+        
+        # Готовность скиллов по шаблонам иконок (вместо симуляции)
+        if self.config.get('skill_detection', False):
+            skill_templates = self.config.get('skill_templates', {})
+            template_cache = TemplateCache(
+                self.config.get('templates_dir', 'templates'),
+                self.config.get('template_base_resolution', (1920, 1080)),
+                self.config.get('template_cache_size', 32)
+            )
+            template_cache.prescale(skill_templates.values(), [self.screen_resolution])
+            rx, ry = self.screen_regions['skill_indicators'][:2]
+            self.vision_engine.skill_detector = SkillCooldownDetector(
+                template_cache,
+                skill_templates,
+                self.screen_resolution,
+                threshold=self.config.get('skill_match_threshold', 0.8),
+                expected_centers={name: (x - rx, y - ry) for name, (x, y) in self.skill_buttons.items()}
+            )
+        
+        # Золото и уровень с экрана (атлас глифов, tesseract - запасной)
+        if self.config.get('digit_ocr', False):
+            self.vision_engine.digit_reader = DigitOCR(
+                self.config.get('glyph_atlas_path', 'data/glyph_atlas.npz'),
+                tesseract_fallback=self.config.get('ocr_tesseract_fallback', True)
+            )
+        
+        # Отладочные кадры пишутся в фоне с ограничением частоты и объема
+        self.vision_engine.debug_writer = DebugFrameWriter(
+            self.config.get('debug_frames_dir', 'debug'),
+            max_fps=self.config.get('debug_max_fps', 2.0),
+            max_bytes_per_sec=self.config.get('debug_max_bytes_per_sec', 8000000),
+            max_files=self.config.get('debug_max_files', 200)
         )
+        
+        # Гистограммы задержек стадий цикла (зрение, решение, действия, обучение)
+        self.profiler = None
+        if self.config.get('profiling', False):
+            self.profiler = CycleProfiler(
+                dump_path=self.config.get('profile_dump_path'),
+                dump_interval=self.config.get('profile_dump_interval', 60)
+            )
+        self.vision_engine.profiler = self.profiler
+        
+        # Запись кадров и анализа для офлайн-бенчмарка
+        if self.config.get('record_frames_dir'):
+            from frame_recorder import FrameRecorder
+            self.vision_engine.recorder = FrameRecorder(
+                self.config['record_frames_dir'],
+                self.screen_regions,
+                extra_meta={'jungle_zones': self.vision_engine.jungle_zones}
+            )
+        if input_controller is None:
+            input_controller = InputController(
+                self.joystick_center,
+                self.joystick_radius,
+                self.attack_button,
+                self.skill_buttons
+            )
+        self.input_controller = input_controller
+        
+        # Источник нажатий клавиш управления (модуль keyboard или симулятор)
+        self.controls = controls if controls is not None else keyboard
+        if self.controls is None:
+            raise RuntimeError("Модуль keyboard не установлен: pip install keyboard")
+        
         self.decision_maker = DecisionMaker(self.config)
         
+        # Конвейер захват -> зрение -> решение -> ввод
+        self.pipeline = BotPipeline(self) if self.config.get('pipeline_mode', False) else None
+        
         # Инициализация системы обучения
         self.init_learning_system()
         
         # Загружаем сохраненные данные
         self.load_saved_data()
         
+        # Контроль бюджетов STATS_CONFIG (снижение качества при нехватке ресурсов)
+        self.governor = None
+        if self.config.get('performance_governor', False):
+            self.governor = PerformanceGovernor(
+                self,
+                check_cycles=self.config.get('governor_check_cycles', 10),
+                max_pyramid_level=self.config.get('governor_max_pyramid_level', 2),
+                max_buffer_shrinks=self.config.get('governor_max_buffer_shrinks', 2)
+            )
+        
         print("\n✅ Бот инициализирован и готов к работе")
         print(f"🧠 Используется: {self.learning_type}")
     
@@ -84,12 +203,18 @@ class HayabusaBot:
             try:
                 self.learning_engine = UltraLearningEngine(
                     data_dir="ultra_learning_data",
-                    use_neural=True
+                    use_neural=True,
+                    prioritized_replay=self.config.get('prioritized_replay', False),
+                    background_training=self.config.get('background_training', False),
+                    numpy_inference=self.config.get('numpy_inference', False)
                 )
                 self.learning_type = "УЛЬТРА-обучение с нейросетью"
                 
+                if not self.learning_engine.use_neural:
+                    self.learning_type = "УЛЬТРА-обучение (Q-таблица)"
+                
                 # Интеграция ультра-обучения в логику бота
-                self = integrate_ultra_learning(self)
+                integrate_ultra_learning(self)
                 
             except Exception as e:
                 print(f"⚠️ Ошибка ультра-обучения: {e}")
@@ -114,33 +239,17 @@ class HayabusaBot:
         """Инициализация компонентов экрана"""
         screen_width, screen_height = get_screen_size()
         
-        # Выбор профиля разрешения
-        best_res = min(SCREEN_PROFILES.keys(), 
-                      key=lambda r: abs(r[0] - screen_width) + abs(r[1] - screen_height))
-        profile = SCREEN_PROFILES[best_res]
-        
-        self.joystick_center = profile['joystick_center']
-        self.attack_button = profile['attack_button']
-        self.joystick_radius = profile['joystick_radius']
-        
-        # Кнопки скиллов
-        self.skill_buttons = {
-            's1': (int(screen_width * 0.78), int(screen_height * 0.88)),
-            's2': (int(screen_width * 0.85), int(screen_height * 0.88)),
-            's3': (int(screen_width * 0.92), int(screen_height * 0.88)),
-            'ult': (int(screen_width * 0.96), int(screen_height * 0.78)),
-        }
+        # Профиль ближайшего разрешения, пересчитанный под экран (кэш на диске)
+        self.layout = load_layout((screen_width, screen_height), self.config.get('layout_cache_dir'))
+        self.screen_resolution = self.layout.resolution
         
-        # Области экрана для анализа
-        self.screen_regions = {
-            'minimap': (20, 20, 200, 200),
-            'health_bar': (screen_width//2 - 100, 20, 200, 30),
-            'mana_bar': (screen_width//2 - 100, 50, 200, 20),
-            'center_screen': (screen_width//2 - 200, screen_height//2 - 200, 400, 400),
-            'skill_indicators': (int(screen_width*0.75), int(screen_height*0.85), 200, 100),
-            'gold_area': (screen_width - 200, 30, 180, 40),
-            'level_area': (screen_width//2 - 50, screen_height - 100, 100, 30),
-        }
+        self.joystick_center = self.layout.joystick_center
+        self.attack_button = self.layout.attack_button
+        self.joystick_radius = self.layout.joystick_radius
+        
+        # Кнопки скиллов и области экрана для анализа
+        self.skill_buttons = dict(self.layout.skill_buttons)
+        self.screen_regions = dict(self.layout.regions)
         
         print(f"📺 Разрешение: {screen_width}x{screen_height}")
         print(f"🎮 Джойстик: {self.joystick_center}")
@@ -193,7 +302,13 @@ class HayabusaBot:
                 
                 # Основная логика работы
                 if self.running and not self.paused:
-                    self.game_cycle()
+                    if self.pipeline is not None:
+                        if not self.pipeline.running:
+                            self.pipeline.start()
+                    else:
+                        self.game_cycle()
+                elif self.pipeline is not None and self.pipeline.running:
+                    self.pipeline.pause()
                 
                 # Небольшая пауза для снижения нагрузки
                 time.sleep(0.05)
@@ -210,51 +325,50 @@ class HayabusaBot:
     def handle_controls(self):
         """Обработка клавиш управления"""
         # Старт/Стоп бота
-        if keyboard.is_pressed(CONTROL_KEYS['toggle_bot']):
+        if self.controls.is_pressed(CONTROL_KEYS['toggle_bot']):
             self.running = not self.running
             status = "АКТИВИРОВАН" if self.running else "ОСТАНОВЛЕН"
             print(f"\n{'▶️' if self.running else '⏸️'} БОТ {status}")
             time.sleep(0.3)
         
         # Пауза/Продолжить
-        if keyboard.is_pressed('F10'):
+        if self.controls.is_pressed('F10'):
             self.paused = not self.paused
             status = "ПАУЗА" if self.paused else "ПРОДОЛЖЕНИЕ"
             print(f"\n⏯️ {status}")
             time.sleep(0.3)
         
         # Статистика
-        if keyboard.is_pressed(CONTROL_KEYS['stats']):
+        if self.controls.is_pressed(CONTROL_KEYS['stats']):
             self.show_stats()
             time.sleep(0.3)
         
         # Сохранение данных
-        if keyboard.is_pressed(CONTROL_KEYS['save_learning']):
+        if self.controls.is_pressed(CONTROL_KEYS['save_learning']):
             self.save_learning_data()
             time.sleep(0.3)
         
         # Отладка зрения
-        if keyboard.is_pressed(CONTROL_KEYS['toggle_vision_debug']):
+        if self.controls.is_pressed(CONTROL_KEYS['toggle_vision_debug']):
             self.config['vision_debug'] = not self.config.get('vision_debug', False)
-            self.vision_engine.debug_mode = self.config['vision_debug']
+            self.vision_engine.debug = self.config['vision_debug']
             status = "ВКЛ" if self.config['vision_debug'] else "ВЫКЛ"
             print(f"\n👁️ Отладка зрения: {status}")
             time.sleep(0.3)
         
         # Показать паттерны
-        if keyboard.is_pressed('F4'):
+        if self.controls.is_pressed('F4'):
             self.show_learned_patterns()
             time.sleep(0.3)
         
         # Выход
-        if keyboard.is_pressed(CONTROL_KEYS['exit']):
+        if self.controls.is_pressed(CONTROL_KEYS['exit']):
             print("\n🛑 Завершение работы...")
             raise KeyboardInterrupt
     
     def game_cycle(self):
         """Один цикл игры"""
-        cycle_start = time.time()
-        self.cycle_count += 1
+        cycle_start = time.perf_counter()
 
         try:
              # 1. Анализ экрана (с оптимизацией частоты)
@@ -262,41 +376,83 @@ class HayabusaBot:
             print(f"DEBUG: Анализ экрана: {analysis}")
 
             # 2. Обновление состояния
-            self.update_state(analysis)
+            with profile_stage(self.profiler, 'state_update'):
+                self.update_state(analysis)
 
             # Отладочный вывод состояния
             print(f"DEBUG: Здоровье: {self.state.my_health}, Безопасность: {self.state.safety_score}, Враги: {self.state.enemies_nearby}")
 
             # 3. Выбор действия (с использованием AI обучения)
-            action, action_details = self.select_action_with_ai()
-            self.last_action = action
-            
-            # 4. Выполнение действия
-            result = self.execute_action(action, action_details)
+            with profile_stage(self.profiler, 'decision'):
+                action, action_details = self.select_action_with_ai()
             
-            # 5. Запись результата для обучения
-            self.record_learning_data(action, result)
-            
-            # 6. Обновление статистики игры
-            self.update_game_stats()
-            
-            # 7. Периодический вывод статуса
-            if self.cycle_count % 5 == 0:  # Каждые 5 циклов
-                self.print_game_status()
-            
-            # 8. Периодическое обучение
-            if self.cycle_count % 25 == 0:
-                self.perform_learning()
-            
-            # 9. Контроль времени цикла
-            cycle_time = time.time() - cycle_start
-            if cycle_time > 0.5:
-                print(f"⚠️ Длинный цикл: {cycle_time:.2f}с")
+            # 4-9. Выполнение, обучение, статистика
+            self.act_on_decision(action, action_details, cycle_start)
             
         except Exception as e:
             print(f"❌ Ошибка в цикле игры: {e}")
             self.stats.errors += 1
     
+    def act_on_decision(self, action: str, action_details: Dict,
+                        cycle_start: Optional[float] = None,
+                        stages: Optional[Dict[str, float]] = None) -> Dict:
+        """Выполнение выбранного действия и завершение цикла
+
+        cycle_start - начало цикла по time.perf_counter (в конвейере - захват
+        кадра, по которому принято решение), stages - время стадий этого
+        кадра в других потоках конвейера.
+        """
+        if cycle_start is None:
+            cycle_start = time.perf_counter()
+        self.cycle_count += 1
+        self.last_action = action
+        
+        # 4. Выполнение действия
+        action_start = time.perf_counter()
+        with profile_stage(self.profiler, f'execute.{action}'):
+            result = self.execute_action(action, action_details)
+        action_time = time.perf_counter() - action_start
+        
+        # 5. Запись результата для обучения
+        with profile_stage(self.profiler, 'learning_record'):
+            self.record_learning_data(action, result)
+        
+        # 6. Обновление статистики игры
+        self.update_game_stats()
+        
+        # 7. Периодический вывод статуса
+        if self.cycle_count % 5 == 0:  # Каждые 5 циклов
+            self.print_game_status()
+        
+        # 8. Периодическое обучение
+        if self.cycle_count % 25 == 0:
+            with profile_stage(self.profiler, 'training'):
+                self.perform_learning()
+        
+        # 9. Контроль времени цикла (бюджет из STATS_CONFIG)
+        if self.profiler is not None:
+            cycle_time, slowest = self.profiler.end_cycle(cycle_start, stages)
+        else:
+            cycle_time, slowest = time.perf_counter() - cycle_start, None
+        if cycle_time > STATS_CONFIG['performance_metrics']['cycle_time_max']:
+            culprit = f" (дольше всего: {slowest})" if slowest else ""
+            print(f"⚠️ Длинный цикл: {cycle_time:.2f}с{culprit}")
+        if self.governor is not None:
+            self.governor.observe(cycle_time, action_time)
+        
+        return result
+    
+    def refresh_state(self):
+        """Свежий анализ экрана и обновление состояния"""
+        if self.pipeline is not None and self.pipeline.running:
+            # Зрение уже работает в своем потоке - ждем следующий кадр
+            analysis = self.pipeline.wait_for_analysis()
+            with self.state_lock:
+                self.update_state(analysis)
+        else:
+            analysis = self.vision_engine.analyze_screen()
+            self.update_state(analysis)
+    
     def select_action_with_ai(self):
         """Выбор действия с использованием AI обучения"""
         try:
@@ -346,7 +502,12 @@ class HayabusaBot:
         
         # Обновление мини-карты
         if 'minimap' in analysis:
-            self.state.map_position = analysis['minimap'].get('position', 'unknown')
+            minimap = analysis['minimap']
+            self.state.map_position = minimap.get('position', 'unknown')
+            self.state.map_coords = minimap.get('hero')
+            self.state.minimap_enemies = minimap.get('enemies', [])
+            self.state.objective_distance = minimap.get('nearest_objective')
+            self.state.enemy_density = minimap.get('enemy_density', 0.0)
         
         # Обновляем фазу игры
         self.update_game_phase()
@@ -456,17 +617,20 @@ class HayabusaBot:
             'details': {}
         }
         
-        # Проверяем наличие крипов
-        if self.state.creeps_nearby == 0 and self.state.jungle_creeps_nearby == 0:
+        # Проверяем наличие крипов и выбираем ближайшего (по одному кадру)
+        screen_center = get_screen_center()
+        with self.state_lock:
+            creeps_visible = self.state.creeps_nearby > 0 or self.state.jungle_creeps_nearby > 0
+            target = self.state.get_nearest_creep(screen_center)
+        
+        if not creeps_visible:
             print("👻 Крипов нет, ищу...")
             found = self.search_for_creeps()
             if not found:
                 print("⚠️ Крипов не нашел")
                 return result
-        
-        # Выбираем ближайшего крипа
-        screen_center = get_screen_center()
-        target = self.state.get_nearest_creep(screen_center)
+            with self.state_lock:
+                target = self.state.get_nearest_creep(screen_center)
         
         if not target:
             print("⚠️ Не могу найти цель для фарма")
@@ -477,7 +641,7 @@ class HayabusaBot:
         # Подход к цели
         if target.distance > 150:
             print(f"📍 Подхожу к цели...")
-            self.input_controller.move_toward_object(target.position, min_distance=100)
+            self.input_controller.move_toward_object(self.aim_position(target), min_distance=100)
             time.sleep(0.3)
         
         # Выбор комбо в зависимости от типа крипа
@@ -524,16 +688,20 @@ class HayabusaBot:
             'details': {}
         }
         
+        with self.state_lock:
+            jungle_creeps = self.state.jungle_creeps_nearby
+            phase = self.state.phase
+        
         # Если есть крипы в лесу - фармим их
-        if self.state.jungle_creeps_nearby > 0:
-            print(f"✅ Нашел {self.state.jungle_creeps_nearby} крипов в лесу")
+        if jungle_creeps > 0:
+            print(f"✅ Нашел {jungle_creeps} крипов в лесу")
             return self.execute_farming()
         
         # Если нет - идем по маршруту
         print("🔍 Ищу крипов по маршруту леса...")
         
         # Выбираем маршрут в зависимости от фазы игры
-        route_name = 'blue_side_start' if self.state.phase == 'early' else 'jungle_patrol'
+        route_name = 'blue_side_start' if phase == 'early' else 'jungle_patrol'
         route = JUNGLE_ROUTES.get(route_name, JUNGLE_ROUTES['jungle_patrol'])
         
         camps_cleared = 0
@@ -548,8 +716,7 @@ class HayabusaBot:
             time.sleep(duration / 2)  # Двигаемся половину времени
             
             # Анализируем после движения
-            analysis = self.vision_engine.analyze_screen()
-            self.update_state(analysis)
+            self.refresh_state()
             
             # Если нашли крипов - фармим
             if self.state.jungle_creeps_nearby > 0:
@@ -585,21 +752,22 @@ class HayabusaBot:
             'details': {}
         }
         
-        # Проверка условий
+        # Проверка условий и поиск цели (по одному кадру)
         current_time = time.time()
+        screen_center = get_screen_center()
+        with self.state_lock:
+            safe = self.state.is_safe_to_gank()
+            enemies = self.state.enemies_nearby
+            target = self.state.get_nearest_enemy(screen_center)
         
-        if not self.state.is_safe_to_gank():
+        if not safe:
             print("⚠️ Небезопасно для ганга")
             return result
         
-        if self.state.enemies_nearby == 0:
+        if enemies == 0:
             print("⚠️ Врагов не видно")
             return result
         
-        # Поиск цели
-        screen_center = get_screen_center()
-        target = self.state.get_nearest_enemy(screen_center)
-        
         if not target:
             print("⚠️ Не могу найти цель для ганга")
             return result
@@ -609,7 +777,7 @@ class HayabusaBot:
         # Подход к цели
         if target.distance > 200:
             print("📍 Подхожу к цели...")
-            self.input_controller.move_toward_object(target.position, min_distance=150)
+            self.input_controller.move_toward_object(self.aim_position(target), min_distance=150)
             time.sleep(0.3)
         
         # Выполнение комбо ганга
@@ -723,6 +891,13 @@ class HayabusaBot:
             'details': {'exploration': True, 'angle': angle}
         }
     
+    def aim_position(self, target) -> tuple:
+        """Точка движения к цели с упреждением по скорости трека"""
+        tracker = self.vision_engine.tracker
+        if tracker is None:
+            return target.position
+        return tracker.predict_position(target, self.config.get('target_lead_time', 0.4))
+    
     def search_for_creeps(self) -> bool:
         """Поиск крипов"""
         print("🔍 ПОИСК КРИПОВ...")
@@ -735,10 +910,11 @@ class HayabusaBot:
             time.sleep(0.5)
             
             # Анализируем после движения
-            analysis = self.vision_engine.analyze_screen()
-            self.update_state(analysis)
+            self.refresh_state()
             
-            if self.state.creeps_nearby > 0 or self.state.jungle_creeps_nearby > 0:
+            with self.state_lock:
+                found = self.state.creeps_nearby > 0 or self.state.jungle_creeps_nearby > 0
+            if found:
                 print(f"✅ Нашел крипов под углом {angle}°")
                 return True
         
@@ -767,9 +943,14 @@ class HayabusaBot:
                 successful_steps += 1
             else:
                 # Проверяем готовность скилла
-                if self.state.skills_ready.get(skill, True):  # По умолчанию True для симуляции
+                with self.state_lock:
+                    ready = self.state.skills_ready.get(skill, True)
+                if ready:
                     if self.input_controller.use_skill(skill):
                         successful_steps += 1
+                        # До следующего кадра считаем скилл на перезарядке
+                        with self.state_lock:
+                            self.state.skills_ready[skill] = False
                 else:
                     print(f"⏳ Скилл {skill} не готов, пропускаю")
             
@@ -830,7 +1011,7 @@ class HayabusaBot:
             
             # Для ультра-обучения нужна дополнительная информация
             if hasattr(self, 'ultra_engine'):
-                # Запись уже происходит в game_cycle через integrate_ultra_learning
+                # Запись уже происходит в act_on_decision через integrate_ultra_learning
                 pass
             
             # Обновление статистики
@@ -849,6 +1030,10 @@ class HayabusaBot:
     
     def perform_learning(self):
         """Выполнение цикла обучения"""
+        if self.training_deferred:
+            # Бюджет времени превышен - обучение ждет запаса
+            return
+        
         try:
             if hasattr(self.learning_engine, 'train_from_experience'):
                 self.learning_engine.train_from_experience()
@@ -865,6 +1050,14 @@ class HayabusaBot:
         self.stats.cycles += 1
         self.game_timer += 1
         
+        # Золото и уровень распознаются с экрана
+        if self.vision_engine.digit_reader is not None:
+            self.stats.total_gold = self.state.my_gold
+            if self.state.my_level > self.last_level:
+                print(f"🎉 Уровень повышен до {self.state.my_level}!")
+            self.last_level = self.state.my_level
+            return
+        
         # Автоматическое увеличение золота и уровня (симуляция)
         if self.stats.cycles % 20 == 0:
             gold_increment = random.randint(30, 100)
@@ -909,6 +1102,49 @@ class HayabusaBot:
         print(f"Ошибок: {self.stats.errors}")
         print("=" * 60)
         
+        # Пропущенный анализ неизменившихся областей
+        if self.vision_engine.change_gate is not None:
+            print("🧊 Пропуск анализа (неизменившиеся области):")
+            for name, gate_stats in self.vision_engine.change_gate.get_stats().items():
+                print(f"   {name:<17} попаданий {gate_stats['hits']} | "
+                      f"промахов {gate_stats['misses']} | {gate_stats['hit_rate']:.1%}")
+        
+        # Отладочные кадры
+        debug_stats = self.vision_engine.debug_writer.get_stats()
+        if debug_stats['submitted']:
+            dropped = debug_stats['dropped_rate'] + debug_stats['dropped_bytes'] + debug_stats['dropped_queue']
+            print(f"📸 Отладочные кадры: записано {debug_stats['written']} "
+                  f"({debug_stats['bytes_written'] / 1e6:.1f} МБ) | отброшено {dropped}")
+        
+        # Задержки стадий конвейера
+        if self.pipeline is not None:
+            self.pipeline.print_latency_stats()
+        
+        # Задержки стадий цикла
+        if self.profiler is not None:
+            self.profiler.print_summary()
+        
+        # Бюджеты производительности
+        if self.governor is not None:
+            governor_stats = self.governor.get_stats()
+            metrics = governor_stats['metrics']
+            if metrics:
+                fps = f"{metrics['fps']:.1f}" if metrics['fps'] is not None else "-"
+                cpu = f"{metrics['cpu_usage']:.0f}%" if metrics['cpu_usage'] is not None else "-"
+                memory = f"{metrics['memory_mb']:.0f}МБ" if metrics['memory_mb'] is not None else "-"
+                print(f"🎚️ Бюджеты: цикл {metrics['cycle_time'] * 1000:.0f}мс | анализ {fps} FPS | "
+                      f"CPU {cpu} | память {memory}")
+            print(f"   Снижение качества: {', '.join(governor_stats['levels']) or 'нет'} | "
+                  f"решений: {governor_stats['decisions']}")
+        
+        # Процесс-тренер нейросети (отставание от игры)
+        trainer = getattr(self.learning_engine, 'trainer', None)
+        if trainer is not None:
+            trainer_stats = trainer.get_stats()
+            print(f"🏋️ Тренер: шагов {trainer_stats['steps']} ({trainer_stats['step_time'] * 1000:.1f}мс) | "
+                  f"веса v{trainer_stats['version']} | отправлено {trainer_stats['pushed']} | "
+                  f"в очереди {trainer_stats['queued']} | отброшено {trainer_stats['dropped']}")
+        
         # Статистика обучения
         if hasattr(self.learning_engine, 'get_summary'):
             learning_summary = self.learning_engine.get_summary()
@@ -975,11 +1211,21 @@ class HayabusaBot:
         """Очистка ресурсов"""
         print("\n🧹 Очистка ресурсов...")
         
-        # Остановка всех действий
+        # Остановка конвейера и всех действий
+        if self.pipeline is not None:
+            self.pipeline.stop()
         self.input_controller.stop_all_actions()
+        self.vision_engine.debug_writer.stop()
+        
+        # Остановка процесса-тренера (его последние веса попадают в сохранение)
+        for engine in (self.learning_engine, getattr(self, 'ultra_engine', None)):
+            if hasattr(engine, 'stop_trainer'):
+                engine.stop_trainer()
         
         # Сохранение данных
         self.save_learning_data()
+        if self.profiler is not None:
+            self.profiler.dump()
         
         # Финальная статистика
         self.show_stats()
@@ -0,0 +1,302 @@
+"""
+Конвейер бота: захват -> зрение -> решение -> ввод в отдельных потоках
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from capture_backend import RegionCaptureBackend, collect_regions
+from config import STATS_CONFIG
+from profiler import profile_stage
+
+
+class LatestValueQueue:
+    """Очередь на одно значение: новое значение вытесняет непрочитанное
+
+    on_drop вызывается с вытесненным значением (например, чтобы вернуть
+    его буфер в пул).
+    """
+
+    def __init__(self, on_drop: Optional[Callable[[Any], None]] = None):
+        self._item = None
+        self._has_item = False
+        self._sequence = 0
+        self._condition = threading.Condition()
+        self._on_drop = on_drop
+        self.dropped = 0
+
+    def put(self, item: Any):
+        """Положить значение (старое непрочитанное отбрасывается)"""
+        with self._condition:
+            if self._has_item:
+                self.dropped += 1
+                if self._on_drop is not None:
+                    self._on_drop(self._item)
+            self._item = item
+            self._has_item = True
+            self._sequence += 1
+            self._condition.notify_all()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Any]:
+        """Забрать самое свежее значение (None по таймауту)"""
+        with self._condition:
+            if not self._has_item:
+                self._condition.wait(timeout)
+            if not self._has_item:
+                return None
+            item = self._item
+            self._item = None
+            self._has_item = False
+            return item
+
+    @property
+    def sequence(self) -> int:
+        """Количество значений, прошедших через очередь"""
+        return self._sequence
+
+
+class PipelineStage(threading.Thread):
+    """Рабочий поток одной стадии конвейера"""
+
+    def __init__(self, name: str, func: Callable, pipeline: 'BotPipeline',
+                 input_queue: Optional[LatestValueQueue] = None,
+                 output_queue: Optional[LatestValueQueue] = None,
+                 interval: float = 0.0):
+        super().__init__(name=f"pipeline-{name}", daemon=True)
+        self.stage_name = name
+        self.func = func
+        self.pipeline = pipeline
+        self.input_queue = input_queue
+        self.output_queue = output_queue
+        self.interval = interval
+
+        self.latencies = deque(maxlen=STATS_CONFIG['tracking_intervals']['short_term'])
+        self.processed = 0
+        self.errors = 0
+        self.last_output = None
+        self.last_output_time = 0.0
+        self.output_event = threading.Condition()
+
+    def run(self):
+        while not self.pipeline.stopped.is_set():
+            if not self.pipeline.active.wait(timeout=0.1):
+                continue
+
+            item = None
+            if self.input_queue is not None:
+                item = self.input_queue.get(timeout=0.1)
+                if item is None:
+                    continue
+
+            start_time = time.time()
+            try:
+                output = self.func(item) if self.input_queue is not None else self.func()
+            except Exception as e:
+                self.errors += 1
+                print(f"⚠️ Ошибка стадии {self.stage_name}: {e}")
+                time.sleep(0.05)
+                continue
+
+            elapsed = time.time() - start_time
+            self.latencies.append(elapsed)
+            self.processed += 1
+
+            if output is not None:
+                with self.output_event:
+                    self.last_output = output
+                    self.last_output_time = time.time()
+                    self.output_event.notify_all()
+                if self.output_queue is not None:
+                    self.output_queue.put(output)
+
+            # Ограничение частоты (для захвата)
+            if self.interval > elapsed:
+                time.sleep(self.interval - elapsed)
+
+    def wait_for_output(self, after: float, timeout: float) -> Optional[Any]:
+        """Дождаться результата, полученного позже момента after"""
+        deadline = time.time() + timeout
+        with self.output_event:
+            while self.last_output_time <= after:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return None
+                self.output_event.wait(remaining)
+            return self.last_output
+
+    def get_stats(self) -> Dict:
+        """Статистика задержки стадии"""
+        latencies = list(self.latencies)
+        dropped = self.output_queue.dropped if self.output_queue is not None else 0
+        return {
+            'processed': self.processed,
+            'errors': self.errors,
+            'dropped': dropped,
+            'last': latencies[-1] if latencies else 0.0,
+            'avg': sum(latencies) / len(latencies) if latencies else 0.0,
+            'max': max(latencies) if latencies else 0.0,
+        }
+
+
+class BotPipeline:
+    """Конвейер захват/зрение/решение/ввод, связанный очередями последнего значения
+
+    Захват и зрение продолжают работать, пока стадия ввода выполняет
+    комбо, а стадия ввода всегда берет самое свежее решение. Вместе с
+    кадром по очередям идет момент его захвата (time.perf_counter) - от
+    него считается время цикла - и время стадий, выполненных над ним в
+    других потоках (для профилировщика).
+    """
+
+    STAGES = ('capture', 'vision', 'decision', 'input')
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.active = threading.Event()
+        self.stopped = threading.Event()
+        # Общая с ботом: стадия ввода читает состояние под той же блокировкой
+        self.state_lock = bot.state_lock
+
+        # Кадры для стадии зрения: свои буферы, в которые копируются только
+        # области анализа (в очереди, в анализе и в записи - не больше трех)
+        self._free_frames: List[np.ndarray] = []
+        self._frames_lock = threading.Lock()
+        self._frame_rects: Optional[List[Tuple[int, int, int, int]]] = None
+        self._frame_shape = None
+
+        self.frames = LatestValueQueue(on_drop=lambda item: self._release_frame(item[0]))
+        self.analyses = LatestValueQueue()
+        self.decisions = LatestValueQueue()
+
+        fps_target = STATS_CONFIG['performance_metrics']['fps_target']
+        self.stages = {
+            'capture': PipelineStage('capture', self._capture, self,
+                                     output_queue=self.frames,
+                                     interval=1.0 / fps_target),
+            'vision': PipelineStage('vision', self._analyze, self,
+                                    input_queue=self.frames,
+                                    output_queue=self.analyses),
+            'decision': PipelineStage('decision', self._decide, self,
+                                      input_queue=self.analyses,
+                                      output_queue=self.decisions),
+            'input': PipelineStage('input', self._act, self,
+                                   input_queue=self.decisions),
+        }
+        self.started = False
+
+    # ---------- Стадии ----------
+
+    def _capture(self):
+        screen = self.bot.vision_engine.capture_screen()
+        if screen is None:
+            return None
+        # Буферы захвата переиспользуются - стадии зрения нужна своя копия
+        # (только областей, которые читают детекторы)
+        captured_at = time.perf_counter()
+        frame = self._acquire_frame(screen)
+        for x0, y0, x1, y1 in self._frame_rects:
+            np.copyto(frame[y0:y1, x0:x1], screen[y0:y1, x0:x1])
+        return frame, captured_at
+
+    def _analyze(self, item):
+        screen, captured_at = item
+        try:
+            analysis = self.bot.vision_engine.analyze_screen(screen)
+        finally:
+            self._release_frame(screen)
+        return analysis, captured_at, self._take_stages()
+
+    def _take_stages(self, upstream: Optional[Dict[str, float]] = None) -> Optional[Dict[str, float]]:
+        """Время стадий кадра в этом потоке (вместе с пришедшим от прошлых стадий)"""
+        profiler = self.bot.profiler
+        if profiler is None:
+            return None
+        stages = dict(upstream or {})
+        for name, seconds in profiler.take_stages().items():
+            stages[name] = stages.get(name, 0.0) + seconds
+        return stages
+
+    def _acquire_frame(self, screen: np.ndarray) -> np.ndarray:
+        """Свободный буфер кадра (области анализа пересчитываются при смене размера)"""
+        with self._frames_lock:
+            if self._frame_shape != screen.shape:
+                vision = self.bot.vision_engine
+                height, width = screen.shape[:2]
+                rects = [(max(0, x), max(0, y), min(width, x + w), min(height, y + h))
+                         for x, y, w, h in collect_regions(vision.screen_regions, vision.jungle_zones)]
+                self._frame_rects = RegionCaptureBackend.merge_rects(rects)
+                self._frame_shape = screen.shape
+                self._free_frames.clear()
+            if self._free_frames:
+                return self._free_frames.pop()
+        return np.zeros(screen.shape, dtype=screen.dtype)
+
+    def _release_frame(self, frame: np.ndarray):
+        """Вернуть буфер кадра в пул"""
+        with self._frames_lock:
+            if frame.shape == self._frame_shape:
+                self._free_frames.append(frame)
+
+    def _decide(self, item):
+        analysis, captured_at, stages = item
+        with self.state_lock:
+            with profile_stage(self.bot.profiler, 'state_update'):
+                self.bot.update_state(analysis)
+            with profile_stage(self.bot.profiler, 'decision'):
+                action, details = self.bot.select_action_with_ai()
+        return action, details, captured_at, self._take_stages(stages)
+
+    def _act(self, decision):
+        action, details, captured_at, stages = decision
+        # Цикл конвейера - от захвата кадра до конца действия
+        self.bot.act_on_decision(action, details, captured_at, stages)
+        return action
+
+    # ---------- Управление ----------
+
+    def start(self):
+        """Запуск (или продолжение) конвейера"""
+        if not self.started:
+            for stage in self.stages.values():
+                stage.start()
+            self.started = True
+            print("🔀 Конвейер запущен: захват -> зрение -> решение -> ввод")
+        self.active.set()
+
+    def pause(self):
+        """Пауза: потоки живы, но не обрабатывают данные"""
+        self.active.clear()
+
+    def stop(self):
+        """Остановка всех потоков"""
+        self.active.clear()
+        self.stopped.set()
+        if self.started:
+            for stage in self.stages.values():
+                stage.join(timeout=2)
+        self.started = False
+
+    @property
+    def running(self) -> bool:
+        return self.started and self.active.is_set()
+
+    def wait_for_analysis(self, timeout: float = 1.0) -> Optional[Dict]:
+        """Свежий анализ кадра, снятого после вызова"""
+        output = self.stages['vision'].wait_for_output(time.time(), timeout)
+        return output[0] if output is not None else None
+
+    def get_latency_stats(self) -> Dict[str, Dict]:
+        """Задержки всех стадий"""
+        return {name: stage.get_stats() for name, stage in self.stages.items()}
+
+    def print_latency_stats(self):
+        """Вывод задержек стадий"""
+        print("🔀 Конвейер (задержка стадий):")
+        for name, stats in self.get_latency_stats().items():
+            print(f"   {name:<9} сред. {stats['avg'] * 1000:7.1f}мс | "
+                  f"макс. {stats['max'] * 1000:7.1f}мс | "
+                  f"обработано {stats['processed']} | пропущено {stats['dropped']}")
@@ -0,0 +1,242 @@
+"""
+Источники кадров: захват экрана по областям и воспроизведение из файлов
+"""
+
+import threading
+import time
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+# Быстрый захват экрана (опционально)
+try:
+    import mss
+    MSS_AVAILABLE = True
+except ImportError:
+    MSS_AVAILABLE = False
+
+Region = Tuple[int, int, int, int]
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp')
+
+
+def collect_regions(screen_regions: dict, extra: Iterable[Region] = ()) -> List[Region]:
+    """Собрать все прямоугольные области из словаря screen_regions"""
+    regions = []
+    for value in screen_regions.values():
+        if isinstance(value, (list, tuple)) and value and isinstance(value[0], (list, tuple)):
+            regions.extend(tuple(r) for r in value)
+        elif isinstance(value, (list, tuple)) and len(value) == 4:
+            regions.append(tuple(value))
+    regions.extend(tuple(r) for r in extra)
+    return regions
+
+
+class CaptureBackend:
+    """Базовый интерфейс источника кадров"""
+
+    name = 'base'
+
+    def __init__(self):
+        self.frames_captured = 0
+        self.total_capture_time = 0.0
+
+    def grab(self) -> Optional[np.ndarray]:
+        """Получить следующий кадр в формате BGR"""
+        start_time = time.time()
+        frame = self._grab()
+        self.total_capture_time += time.time() - start_time
+        if frame is not None:
+            self.frames_captured += 1
+        return frame
+
+    def _grab(self) -> Optional[np.ndarray]:
+        raise NotImplementedError
+
+    def get_stats(self) -> dict:
+        """Статистика захвата"""
+        avg = self.total_capture_time / self.frames_captured if self.frames_captured else 0.0
+        return {
+            'backend': self.name,
+            'frames': self.frames_captured,
+            'avg_capture_time': avg,
+        }
+
+    def close(self):
+        """Освобождение ресурсов"""
+        pass
+
+
+class FullScreenCaptureBackend(CaptureBackend):
+    """Захват всего экрана через pyautogui (старое поведение)"""
+
+    name = 'full'
+
+    def _grab(self) -> Optional[np.ndarray]:
+        import pyautogui
+        screenshot = pyautogui.screenshot()
+        return cv2.cvtColor(np.array(screenshot), cv2.COLOR_RGB2BGR)
+
+
+class RegionCaptureBackend(CaptureBackend):
+    """Захват только нужных областей в заранее выделенный буфер
+
+    Кадр имеет размер всего экрана, чтобы детекторы индексировали его
+    абсолютными координатами, но обновляются только пиксели областей.
+    Используются два буфера по очереди, так что предыдущий кадр остается
+    валидным в течение следующего цикла.
+    """
+
+    name = 'region'
+
+    def __init__(self, regions: Iterable[Region], screen_size: Optional[Tuple[int, int]] = None):
+        super().__init__()
+        if screen_size is None:
+            from utils import get_screen_size
+            screen_size = tuple(get_screen_size())
+
+        self.screen_width, self.screen_height = screen_size
+        self.rects = self.merge_rects([self.clip(r) for r in regions])
+        self.buffers = [np.zeros((self.screen_height, self.screen_width, 3), dtype=np.uint8)
+                        for _ in range(2)]
+        self.buffer_index = 0
+        self._local = threading.local()
+
+        covered = sum((x1 - x0) * (y1 - y0) for x0, y0, x1, y1 in self.rects)
+        total = self.screen_width * self.screen_height
+        print(f"📸 Захват по областям: {len(self.rects)} прямоугольников "
+              f"({covered / total:.1%} экрана, {'mss' if MSS_AVAILABLE else 'pyautogui'})")
+
+    def clip(self, region: Region) -> Tuple[int, int, int, int]:
+        """Область (x, y, w, h) -> (x0, y0, x1, y1) в границах экрана"""
+        x, y, w, h = region
+        x0 = min(max(int(x), 0), self.screen_width)
+        y0 = min(max(int(y), 0), self.screen_height)
+        x1 = min(max(int(x + w), x0), self.screen_width)
+        y1 = min(max(int(y + h), y0), self.screen_height)
+        return x0, y0, x1, y1
+
+    @staticmethod
+    def merge_rects(rects: List[Tuple[int, int, int, int]]) -> List[Tuple[int, int, int, int]]:
+        """Объединение пересекающихся прямоугольников"""
+        rects = [r for r in rects if r[2] > r[0] and r[3] > r[1]]
+        merged = True
+        while merged:
+            merged = False
+            result = []
+            while rects:
+                a = rects.pop()
+                for i, b in enumerate(rects):
+                    if a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]:
+                        rects[i] = (min(a[0], b[0]), min(a[1], b[1]),
+                                    max(a[2], b[2]), max(a[3], b[3]))
+                        merged = True
+                        break
+                else:
+                    result.append(a)
+            rects = result
+        return sorted(rects)
+
+    def _sct(self):
+        """mss не потокобезопасен - отдельный экземпляр на поток"""
+        sct = getattr(self._local, 'sct', None)
+        if sct is None:
+            sct = mss.mss()
+            self._local.sct = sct
+        return sct
+
+    def _grab(self) -> Optional[np.ndarray]:
+        self.buffer_index = 1 - self.buffer_index
+        buffer = self.buffers[self.buffer_index]
+
+        for x0, y0, x1, y1 in self.rects:
+            target = buffer[y0:y1, x0:x1]
+            if MSS_AVAILABLE:
+                shot = self._sct().grab({'left': x0, 'top': y0,
+                                         'width': x1 - x0, 'height': y1 - y0})
+                np.copyto(target, np.asarray(shot)[:, :, :3])
+            else:
+                import pyautogui
+                shot = pyautogui.screenshot(region=(x0, y0, x1 - x0, y1 - y0))
+                np.copyto(target, np.asarray(shot)[:, :, 2::-1])
+
+        return buffer
+
+    def close(self):
+        sct = getattr(self._local, 'sct', None)
+        if sct is not None:
+            sct.close()
+            self._local.sct = None
+
+
+class FileCaptureBackend(CaptureBackend):
+    """Кадры из папки с изображениями или из видеофайла (офлайн-бенчмарк)"""
+
+    name = 'file'
+
+    def __init__(self, source: str, loop: bool = True, preload: bool = False):
+        super().__init__()
+        self.source = Path(source)
+        self.loop = loop
+        self.video = None
+        self.images: List[Path] = []
+        self.cache: List[np.ndarray] = []
+        self.position = 0
+
+        if self.source.is_dir():
+            self.images = sorted(p for p in self.source.iterdir()
+                                 if p.suffix.lower() in IMAGE_EXTENSIONS)
+            if preload:
+                self.cache = [cv2.imread(str(p)) for p in self.images]
+            print(f"🎞️ Источник кадров: {len(self.images)} изображений из {self.source}")
+        elif self.source.exists():
+            self.video = cv2.VideoCapture(str(self.source))
+            print(f"🎞️ Источник кадров: видео {self.source}")
+        else:
+            raise FileNotFoundError(f"Источник кадров не найден: {self.source}")
+
+    def __len__(self):
+        if self.video is not None:
+            return int(self.video.get(cv2.CAP_PROP_FRAME_COUNT))
+        return len(self.images)
+
+    def _grab(self) -> Optional[np.ndarray]:
+        if self.video is not None:
+            ok, frame = self.video.read()
+            if not ok and self.loop:
+                self.video.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                ok, frame = self.video.read()
+            return frame if ok else None
+
+        if not self.images:
+            return None
+        if self.position >= len(self.images):
+            if not self.loop:
+                return None
+            self.position = 0
+
+        index = self.position
+        self.position += 1
+        if self.cache:
+            return self.cache[index]
+        return cv2.imread(str(self.images[index]))
+
+    def close(self):
+        if self.video is not None:
+            self.video.release()
+            self.video = None
+
+
+def create_capture_backend(kind: str, regions: Iterable[Region] = (),
+                           source: Optional[str] = None,
+                           screen_size: Optional[Tuple[int, int]] = None) -> CaptureBackend:
+    """Создание источника кадров по имени: 'region', 'full' или 'file'"""
+    if kind == 'file':
+        if not source:
+            raise ValueError("Для источника 'file' нужен параметр source")
+        return FileCaptureBackend(source)
+    if kind == 'full':
+        return FullScreenCaptureBackend()
+    return RegionCaptureBackend(regions, screen_size)
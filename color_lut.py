@@ -0,0 +1,71 @@
+"""
+Классификация пикселей по HSV-диапазонам за один проход (таблица поиска)
+"""
+
+from typing import Dict, Tuple
+
+import cv2
+import numpy as np
+
+
+def range_bounds(value) -> Tuple[Tuple[int, ...], Tuple[int, ...]]:
+    """(lower, upper) из записи hsv_ranges или словаря в формате COLORS"""
+    if isinstance(value, dict):
+        lower, upper = value['lower'], value['upper']
+    else:
+        lower, upper = value
+    return tuple(int(c) for c in lower), tuple(int(c) for c in upper)
+
+
+def ranges_signature(ranges: Dict) -> Tuple:
+    """Отпечаток набора диапазонов (для пересборки таблицы при изменении)"""
+    return tuple((name, *range_bounds(value)) for name, value in ranges.items())
+
+
+class ColorLUT:
+    """Таблица HSV -> битовая маска классов
+
+    Диапазоны - прямоугольники в HSV, поэтому трехмерная таблица
+    раскладывается на три одномерных: метка пикселя = T_h[h] & T_s[s] & T_v[v].
+    Весь регион размечается за один проход, маски классов получаются
+    из метки одной побитовой операцией.
+    """
+
+    def __init__(self, ranges: Dict):
+        self.names = list(ranges)
+        if len(self.names) > 31:
+            raise ValueError(f"Слишком много цветовых классов: {len(self.names)} (максимум 31)")
+
+        if len(self.names) <= 8:
+            self.dtype = np.uint8
+        elif len(self.names) <= 16:
+            self.dtype = np.uint16
+        else:
+            self.dtype = np.int32
+
+        self.bits = {name: 1 << i for i, name in enumerate(self.names)}
+        self.tables = np.zeros((3, 256), dtype=self.dtype)
+        for name, value in ranges.items():
+            lower, upper = range_bounds(value)
+            for channel in range(3):
+                low = max(0, lower[channel])
+                high = min(255, upper[channel])
+                if high >= low:
+                    self.tables[channel, low:high + 1] |= self.bits[name]
+
+        self.signature = ranges_signature(ranges)
+
+    def label(self, hsv_image: np.ndarray) -> np.ndarray:
+        """Метки классов для каждого пикселя HSV-изображения"""
+        h, s, v = cv2.split(hsv_image)
+        labels = cv2.LUT(h, self.tables[0])
+        cv2.bitwise_and(labels, cv2.LUT(s, self.tables[1]), dst=labels)
+        cv2.bitwise_and(labels, cv2.LUT(v, self.tables[2]), dst=labels)
+        return labels
+
+    def mask(self, labels: np.ndarray, name: str) -> np.ndarray:
+        """8-битная маска класса (ненулевые пиксели - класс присутствует)"""
+        masked = cv2.bitwise_and(labels, self.bits[name])
+        if self.dtype == np.uint8:
+            return masked
+        return cv2.compare(masked, 0, cv2.CMP_NE)
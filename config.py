@@ -107,6 +107,16 @@ SCREEN_PROFILES = {
     }
 }
 
+# Зоны поиска лесных крипов (x, y, w, h) для 1920x1080,
+# под другие разрешения пересчитываются в screen_layout
+JUNGLE_ZONES = [
+    (600, 300, 150, 150),   # Верхний лес (синий бафф)
+    (1150, 300, 150, 150),  # Верхний вражеский лес
+    (600, 600, 150, 150),   # Нижний лес (красный бафф)
+    (1150, 600, 150, 150),  # Нижний вражеский лес
+    (850, 450, 150, 150),   # Центральный лес (скакун/черепаха)
+]
+
 # ============================================================================
 # 🤖 АИ НАСТРОЙКИ БОТА
 # ============================================================================
@@ -121,6 +131,9 @@ BOT_CONFIG = {
     'ai_mode': True,                       # Включить AI обучение
     'use_ultra_learning': True,            # Использовать ультра-обучение
     'use_neural_network': True,            # Использовать нейросеть
+    'prioritized_replay': False,           # Выборка опытов по TD-ошибке (дерево сумм) вместо равномерной
+    'background_training': True,           # Обучение нейросети в отдельном процессе (игра только применяет веса)
+    'numpy_inference': True,               # Выбор действий прямым проходом на numpy (torch в игре не нужен)
     'learning_rate': 0.1,                  # Скорость обучения (0.01-0.3)
     'exploration_rate': 0.3,               # Начальная вероятность исследования
     'exploration_decay': 0.995,            # Затухание исследования
@@ -143,16 +156,51 @@ BOT_CONFIG = {
     
     # Настройки зрения
     'vision_debug': False,                 # Отладка зрения
+    'debug_frames_dir': 'debug',           # Папка отладочных кадров (запись в фоновом потоке)
+    'debug_max_fps': 2.0,                  # Не больше N отладочных кадров в секунду
+    'debug_max_bytes_per_sec': 8000000,    # Бюджет записи (байт PNG в секунду), лишние кадры отбрасываются
+    'debug_max_files': 200,                # Хранить последние N кадров
+    'profiling': True,                     # Гистограммы задержек стадий цикла (F1 и JSON)
+    'profile_dump_path': 'data/profile.json',  # Периодический дамп гистограмм
+    'profile_dump_interval': 60,           # Период дампа (сек)
+    'performance_governor': True,          # Снижать качество при нарушении бюджетов STATS_CONFIG
+    'governor_check_cycles': 10,           # Проверка бюджетов раз в N циклов
+    'governor_max_pyramid_level': 2,       # Предел уменьшения кадра для поиска объектов
+    'governor_max_buffer_shrinks': 2,      # Сколько раз можно урезать буфер воспроизведения
     'detection_confidence': 0.7,           # Уверенность детекции (0-1)
     'update_frequency': 0.3,               # Частота обновления зрения (сек)
     'minimap_analysis': True,              # Анализ мини-карты
     'object_tracking': True,               # Отслеживание объектов
+    'tracking_full_search_interval': 5,    # Полный поиск раз в N кадров (иначе - окна вокруг треков)
+    'target_lead_time': 0.4,               # Упреждение при движении к цели (сек)
+    'frame_diff_gating': True,             # Не анализировать повторно неизменившиеся области
+    'frame_diff_threshold': 8.0,           # Порог изменения миниатюры области (0-255)
+    'pyramid_level': 1,                    # Грубый поиск в центре и в лесу на копии /2^N (0 = выкл, 2 теряет мелких крипов)
+    'skill_detection': True,               # Готовность скиллов по шаблонам иконок
+    'templates_dir': 'templates',          # Папка PNG-шаблонов (см. README)
+    'skill_templates': {                   # Шаблоны готовых скиллов
+        's1': 'skill1.png',
+        's2': 'skill2.png',
+        's3': 'skill3.png',
+        'ult': 'ult.png',
+    },
+    'template_base_resolution': (1920, 1080),  # Разрешение, в котором сняты шаблоны
+    'template_cache_size': 32,             # Масштабированных шаблонов в кэше
+    'skill_match_threshold': 0.8,          # Минимальное совпадение иконки готового скилла
+    'digit_ocr': True,                     # Золото и уровень с экрана (иначе симуляция)
+    'glyph_atlas_path': 'data/glyph_atlas.npz',  # Атлас глифов цифр (дополняется сам)
+    'ocr_tesseract_fallback': True,        # tesseract для незнакомых глифов
+    'layout_cache_dir': 'data/layouts',    # Скомпилированные раскладки экрана по разрешениям
+    'capture_backend': 'region',           # Источник кадров: region/full/file
+    'capture_source': None,                # Папка/видео для источника 'file'
+    'record_frames_dir': None,             # Папка для записи корпуса кадров (None = выкл)
     
     # Настройки контроля
     'smooth_movement': True,               # Плавные движения
     'action_delay': 0.05,                  # Задержка между действиями
     'reaction_time': 0.15,                 # Время реакции (сек)
     'input_precision': 0.95,               # Точность ввода (0-1)
+    'pipeline_mode': True,                 # Захват/зрение/решение/ввод в отдельных потоках
     
     # Настройки обучения
     'auto_save_interval': 300,             # Интервал автосохранения (сек)
@@ -233,18 +281,6 @@ HAYABUSA_COMMANDS = {
 
 COLORS = {
     # Основные объекты
-    'creep_yellow': {                      # Минионы линии
-        'lower': np.array([20, 150, 150]),
-        'upper': np.array([40, 255, 255]),
-        'min_area': 50,
-        'max_area': 500,
-    },
-    'jungle_orange': {                     # Крипы леса
-        'lower': np.array([5, 100, 120]),
-        'upper': np.array([25, 200, 230]),
-        'min_area': 100,
-        'max_area': 800,
-    },
     'enemy_red': {                         # Вражеские герои
         'lower': np.array([0, 0, 130]),
         'upper': np.array([20, 50, 255]),
@@ -311,6 +347,28 @@ COLORS = {
         'min_area': 10,
         'max_area': 200,
     },
+}
+
+# ============================================================================
+# 🎨 ЦВЕТА В HSV (H 0-179, S и V 0-255) - для кадров, переведенных в HSV
+# ============================================================================
+
+HSV_COLORS = {
+    # Основные объекты
+    'creep_yellow': {                      # Минионы линии
+        'lower': np.array([20, 150, 150]),
+        'upper': np.array([40, 255, 255]),
+        'min_area': 50,
+        'max_area': 500,
+    },
+    'jungle_orange': {                     # Крипы леса
+        'lower': np.array([5, 100, 120]),
+        'upper': np.array([25, 200, 230]),
+        'min_area': 100,
+        'max_area': 800,
+    },
+    
+    # Эффекты и способности
     'ultimate_indicator': {                # Индикатор ультимейта
         'lower': np.array([30, 200, 200]),
         'upper': np.array([60, 255, 255]),
@@ -656,6 +714,7 @@ __all__ = [
     'BOT_CONFIG', 
     'CONTROL_KEYS',
     'COLORS',
+    'HSV_COLORS',
     'JUNGLE_ROUTES',
     'HAYABUSA_COMBOS',
     'AI_LEARNING_CONFIG',
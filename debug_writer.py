@@ -0,0 +1,182 @@
+"""
+Фоновая запись отладочных кадров с ограничением частоты и объема
+"""
+
+import os
+import queue
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+
+
+def annotate_frame(image: np.ndarray, objects: List) -> np.ndarray:
+    """Отметки обнаруженных объектов на кадре (рисует прямо в image)"""
+    for obj in objects:
+        x, y = obj.position
+        color = (0, 255, 0) if not obj.is_enemy else (0, 0, 255)  # Зеленый для союзников, красный для врагов
+        cv2.circle(image, (x, y), 10, color, 2)
+
+        # Подпись
+        label = f"{obj.type} {int(obj.health)}%"
+        cv2.putText(image, label, (x - 20, y - 15), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1)
+    return image
+
+
+class DebugFrameWriter:
+    """Запись отладочных кадров в отдельном потоке
+
+    submit() никогда не блокирует игровой цикл: кадр отбрасывается, если
+    превышена частота (max_fps), объем записи (max_bytes_per_sec) или
+    очередь заполнена. Явно запрошенные кадры (force) не ограничиваются
+    бюджетом и ждут места в очереди. Разметка и PNG-кодирование выполняются
+    в потоке записи, в папке хранится не больше max_files последних кадров.
+    """
+
+    FILE_PREFIXES = ('debug_screen', 'debug_vision')
+    FORCE_TIMEOUT = 2.0   # Сколько явный кадр ждет места в очереди (сек)
+
+    def __init__(self, directory: str = 'debug', max_queue: int = 4, max_fps: float = 2.0,
+                 max_bytes_per_sec: float = 8_000_000, max_files: int = 200,
+                 png_compression: int = 1):
+        self.directory = directory
+        self.max_fps = max_fps
+        self.max_bytes_per_sec = max_bytes_per_sec
+        self.max_files = max(1, max_files)
+        self.png_compression = png_compression
+
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max(1, max_queue))
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._files: Optional[deque] = None
+        self._sequence = 0
+
+        # Бюджет: время последнего принятого кадра и запас байт (ведро токенов)
+        self._last_accepted = 0.0
+        self._byte_tokens = float(max_bytes_per_sec)
+        self._last_refill = time.time()
+
+        self.stats = {'submitted': 0, 'written': 0, 'dropped_rate': 0, 'dropped_bytes': 0,
+                      'dropped_queue': 0, 'bytes_written': 0, 'errors': 0}
+
+    def submit(self, frame: np.ndarray, objects: Optional[List] = None,
+               prefix: str = 'debug_screen', filename: Optional[str] = None,
+               force: bool = False) -> bool:
+        """Поставить кадр в очередь записи (False - кадр отброшен)"""
+        if frame is None:
+            return False
+
+        now = time.time()
+        with self._lock:
+            self.stats['submitted'] += 1
+            if not force:
+                if self.max_fps and now - self._last_accepted < 1.0 / self.max_fps:
+                    self.stats['dropped_rate'] += 1
+                    return False
+
+                if self.max_bytes_per_sec:
+                    self._byte_tokens = min(float(self.max_bytes_per_sec),
+                                            self._byte_tokens + (now - self._last_refill) * self.max_bytes_per_sec)
+                    self._last_refill = now
+                    if self._byte_tokens <= 0:
+                        self.stats['dropped_bytes'] += 1
+                        return False
+
+                if self._queue.full():
+                    self.stats['dropped_queue'] += 1
+                    return False
+                self._last_accepted = now
+            self._sequence += 1
+            sequence = self._sequence
+
+        self.start()
+        # Источник кадров переиспользует буферы - копия нужна до возврата
+        item = (frame.copy(), list(objects) if objects else None, prefix, filename, now, sequence, force)
+        try:
+            if force:
+                self._queue.put(item, timeout=self.FORCE_TIMEOUT)
+            else:
+                self._queue.put_nowait(item)
+        except queue.Full:
+            with self._lock:
+                self.stats['dropped_queue'] += 1
+            return False
+        return True
+
+    def start(self):
+        """Запуск потока записи (при первом кадре)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._thread = threading.Thread(target=self._run, name="debug-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        """Дописать очередь и остановить поток"""
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            try:
+                self.write(*item)
+            except Exception as e:
+                with self._lock:
+                    self.stats['errors'] += 1
+                print(f"⚠️ Ошибка записи отладочного кадра: {e}")
+
+    def write(self, image: np.ndarray, objects: Optional[List], prefix: str,
+              filename: Optional[str], timestamp: float, sequence: int, force: bool = False):
+        """Разметка, кодирование и запись одного кадра (в потоке записи)"""
+        if objects:
+            annotate_frame(image, objects)
+
+        ok, encoded = cv2.imencode('.png', image, [cv2.IMWRITE_PNG_COMPRESSION, self.png_compression])
+        if not ok:
+            raise ValueError("PNG-кодирование не удалось")
+
+        rotate = filename is None
+        if rotate:
+            stamp = time.strftime('%Y%m%d_%H%M%S', time.localtime(timestamp))
+            filename = os.path.join(self.directory, f"{prefix}_{stamp}_{sequence:05d}.png")
+        directory = os.path.dirname(filename)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(filename, 'wb') as f:
+            f.write(encoded.tobytes())
+
+        with self._lock:
+            self.stats['written'] += 1
+            self.stats['bytes_written'] += encoded.size
+            if not force:
+                self._byte_tokens -= encoded.size
+        if rotate:
+            self.rotate(filename)
+        if force:
+            print(f"📸 Отладочный скриншот сохранен: {filename}")
+
+    def rotate(self, path: str):
+        """Удаление самых старых кадров сверх max_files"""
+        if self._files is None:
+            existing = [os.path.join(self.directory, name) for name in os.listdir(self.directory)
+                        if name.startswith(self.FILE_PREFIXES) and name.endswith('.png')]
+            self._files = deque(sorted((p for p in existing if p != path), key=os.path.getmtime))
+        self._files.append(path)
+        while len(self._files) > self.max_files:
+            try:
+                os.remove(self._files.popleft())
+            except OSError:
+                pass
+
+    def get_stats(self) -> Dict[str, int]:
+        """Счетчики записанных и отброшенных кадров"""
+        with self._lock:
+            return dict(self.stats, queued=self._queue.qsize())
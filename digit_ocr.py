@@ -0,0 +1,231 @@
+"""
+Распознавание чисел интерфейса (золото, уровень) по атласу глифов
+"""
+
+import os
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+class DigitOCR:
+    """Распознавание цифр сопоставлением глифов с атласом
+
+    Область бинаризуется, делится на глифы по компонентам связности, и
+    каждый глиф сравнивается с атласом по ближайшему соседу. Если глиф не
+    узнан, число читается через tesseract (если установлен), а его глифы
+    добавляются в атлас - со временем tesseract перестает вызываться.
+    Результаты запоминаются по хэшу бинаризованной области.
+    """
+
+    GLYPH_SIZE = (8, 12)  # ширина, высота нормализованного глифа
+    MAX_GLYPH_ASPECT = 1.0  # цифра не шире своей высоты
+
+    def __init__(self, atlas_path: Optional[str] = 'data/glyph_atlas.npz',
+                 match_threshold: float = 0.2, tesseract_fallback: bool = True,
+                 cache_size: int = 256, max_variants: int = 20):
+        self.atlas_path = atlas_path
+        self.match_threshold = match_threshold
+        self.tesseract_fallback = tesseract_fallback
+        self.cache_size = max(1, cache_size)
+        self.max_variants = max_variants
+
+        self.glyphs = np.zeros((0, self.GLYPH_SIZE[0] * self.GLYPH_SIZE[1]), dtype=np.float32)
+        self.labels: List[str] = []
+        self._memo: "OrderedDict[int, Optional[int]]" = OrderedDict()
+        self._tesseract = None
+        self._tesseract_checked = False
+
+        self.stats = {'reads': 0, 'memo_hits': 0, 'atlas': 0, 'tesseract': 0, 'failed': 0}
+        self.load()
+
+    # ---------- Атлас ----------
+
+    def load(self) -> bool:
+        """Загрузка атласа с диска"""
+        if not self.atlas_path or not os.path.exists(self.atlas_path):
+            return False
+        try:
+            data = np.load(self.atlas_path)
+            self.glyphs = data['glyphs'].astype(np.float32)
+            self.labels = [str(label) for label in data['labels']]
+            print(f"🔢 Атлас цифр загружен: {len(self.labels)} глифов")
+            return True
+        except Exception as e:
+            print(f"⚠️ Ошибка загрузки атласа цифр: {e}")
+            return False
+
+    def save(self):
+        """Сохранение атласа на диск"""
+        if not self.atlas_path:
+            return
+        try:
+            directory = os.path.dirname(self.atlas_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            np.savez_compressed(self.atlas_path, glyphs=self.glyphs, labels=np.array(self.labels))
+        except Exception as e:
+            print(f"⚠️ Ошибка сохранения атласа цифр: {e}")
+
+    def learn(self, crop: np.ndarray, text: str) -> int:
+        """Добавить глифы области с известным текстом; возвращает число новых глифов"""
+        binary = self.binarize(crop)
+        glyphs = self.segment(binary) if binary is not None else []
+        return self.learn_glyphs(glyphs, text)
+
+    def learn_glyphs(self, glyphs: List[np.ndarray], text: str) -> int:
+        """Добавить глифы с подписями (если их число совпадает с длиной текста)"""
+        if not text.isdigit() or len(glyphs) != len(text):
+            return 0
+
+        added = 0
+        for glyph, label in zip(glyphs, text):
+            same = [i for i, known in enumerate(self.labels) if known == label]
+            if same:
+                distances = np.abs(self.glyphs[same] - glyph).mean(axis=1)
+                if distances.min() < self.match_threshold / 4 or len(same) >= self.max_variants:
+                    continue
+            self.glyphs = np.vstack([self.glyphs, glyph[None]])
+            self.labels.append(label)
+            added += 1
+
+        if added:
+            # Старые результаты могли быть нераспознанными
+            self._memo.clear()
+            self.save()
+        return added
+
+    # ---------- Распознавание ----------
+
+    def binarize(self, crop: np.ndarray) -> Optional[np.ndarray]:
+        """Маска символов (255 - символ) или None для пустой области"""
+        gray = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY) if crop.ndim == 3 else crop
+        if gray.size == 0 or int(gray.max()) - int(gray.min()) < 40:
+            return None
+        _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+        # Символы занимают меньшую часть области (светлые на темном или наоборот)
+        if cv2.countNonZero(binary) > binary.size // 2:
+            binary = cv2.bitwise_not(binary)
+        return binary
+
+    def segment(self, binary: np.ndarray) -> List[np.ndarray]:
+        """Нормализованные глифы слева направо"""
+        count, _, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+        if count <= 1:
+            return []
+        stats = stats[1:]
+
+        # Шум и знаки препинания ниже половины высоты цифр отбрасываются
+        heights = stats[:, cv2.CC_STAT_HEIGHT]
+        stats = stats[(heights >= heights.max() * 0.5) & (stats[:, cv2.CC_STAT_AREA] >= 4)]
+        stats = stats[np.argsort(stats[:, cv2.CC_STAT_LEFT])]
+
+        # Разорванные части одного символа объединяются, если почти целиком
+        # перекрываются по X (соседние цифры перекрываются лишь краями)
+        boxes = []
+        for left, top, width, height, _ in stats.tolist():
+            if boxes and boxes[-1][2] - left > 0.5 * min(width, boxes[-1][2] - boxes[-1][0]):
+                x0, y0, x1, y1 = boxes[-1]
+                boxes[-1] = (x0, min(y0, top), max(x1, left + width), max(y1, top + height))
+            else:
+                boxes.append((left, top, left + width, top + height))
+
+        glyphs = []
+        for box in boxes:
+            for x0, y0, x1, y1 in self.split_touching(binary, box):
+                glyph = cv2.resize(binary[y0:y1, x0:x1], self.GLYPH_SIZE, interpolation=cv2.INTER_AREA)
+                glyphs.append(glyph.reshape(-1).astype(np.float32) / 255.0)
+        return glyphs
+
+    def split_touching(self, binary: np.ndarray,
+                       box: Tuple[int, int, int, int]) -> List[Tuple[int, int, int, int]]:
+        """Разрезание слипшихся цифр (рамка шире высоты) по самому тонкому столбцу"""
+        x0, y0, x1, y1 = box
+        if x1 - x0 <= (y1 - y0) * self.MAX_GLYPH_ASPECT:
+            return [box]
+
+        columns = np.count_nonzero(binary[y0:y1, x0:x1], axis=0)
+        low, high = (x1 - x0) // 4, (x1 - x0) * 3 // 4
+        cut = x0 + low + int(np.argmin(columns[low:high]))
+
+        parts = []
+        for left, right in ((x0, cut), (cut, x1)):
+            rows = np.flatnonzero(np.count_nonzero(binary[y0:y1, left:right], axis=1))
+            if len(rows):
+                parts.extend(self.split_touching(binary, (left, y0 + rows[0], right, y0 + rows[-1] + 1)))
+        return parts
+
+    def match(self, glyphs: List[np.ndarray]) -> Optional[str]:
+        """Текст по атласу или None, если хоть один глиф не узнан"""
+        if not glyphs or not self.labels:
+            return None
+        distances = np.abs(np.stack(glyphs)[:, None, :] - self.glyphs[None, :, :]).mean(axis=2)
+        best = distances.argmin(axis=1)
+        if (distances[np.arange(len(glyphs)), best] > self.match_threshold).any():
+            return None
+        return ''.join(self.labels[i] for i in best)
+
+    def read(self, crop: np.ndarray) -> Optional[int]:
+        """Число в области (BGR) или None"""
+        self.stats['reads'] += 1
+        binary = self.binarize(crop)
+        if binary is None:
+            return None
+
+        key = hash((binary.shape, binary.tobytes()))
+        if key in self._memo:
+            self._memo.move_to_end(key)
+            self.stats['memo_hits'] += 1
+            return self._memo[key]
+
+        glyphs = self.segment(binary)
+        text = self.match(glyphs)
+        if text is not None:
+            self.stats['atlas'] += 1
+        elif self.tesseract_fallback:
+            text = self.read_tesseract(binary)
+            if text:
+                self.stats['tesseract'] += 1
+                self.learn_glyphs(glyphs, text)
+
+        value = int(text) if text else None
+        if value is None:
+            self.stats['failed'] += 1
+
+        self._memo[key] = value
+        while len(self._memo) > self.cache_size:
+            self._memo.popitem(last=False)
+        return value
+
+    def read_tesseract(self, binary: np.ndarray) -> Optional[str]:
+        """Запасное чтение через tesseract (только цифры)"""
+        if not self._tesseract_checked:
+            self._tesseract_checked = True
+            try:
+                import pytesseract
+                pytesseract.get_tesseract_version()
+                self._tesseract = pytesseract
+            except Exception:
+                print("⚠️ tesseract недоступен, цифры только по атласу")
+        if self._tesseract is None:
+            return None
+
+        try:
+            # tesseract лучше читает темный текст на светлом фоне с полями
+            image = cv2.copyMakeBorder(cv2.bitwise_not(binary), 8, 8, 8, 8,
+                                       cv2.BORDER_CONSTANT, value=255)
+            text = self._tesseract.image_to_string(
+                image, config='--psm 7 -c tessedit_char_whitelist=0123456789'
+            )
+        except Exception as e:
+            print(f"⚠️ Ошибка tesseract: {e}")
+            return None
+
+        digits = ''.join(ch for ch in text if ch.isdigit())
+        return digits or None
+
+    def get_stats(self):
+        """Статистика распознавания"""
+        return dict(self.stats, atlas_size=len(self.labels))
@@ -0,0 +1,79 @@
+"""
+Пропуск повторного анализа неизменившихся областей экрана
+"""
+
+from typing import Any, Callable, Dict, Iterable, Tuple
+
+import cv2
+import numpy as np
+
+Region = Tuple[int, int, int, int]
+
+GATED_REGIONS = ('minimap', 'health_bar', 'center_screen', 'skill_indicators')
+
+
+class RegionChangeGate:
+    """Детектор изменений по уменьшенным копиям областей
+
+    Для каждой области хранится миниатюра кадра, по которому был получен
+    последний результат. Если ни одна ячейка новой миниатюры не отличается
+    от нее больше порога, результат переиспользуется (по максимуму, а не по
+    среднему - иначе сдвиг маленького крипа теряется в большой области).
+    Сравнение идет с опорным кадром, а не с предыдущим, поэтому медленные
+    изменения накапливаются и не теряются.
+    """
+
+    def __init__(self, screen_regions: Dict, names: Iterable[str] = GATED_REGIONS,
+                 threshold: float = 8.0, downscale: int = 8):
+        self.regions: Dict[str, Region] = {name: tuple(screen_regions[name])
+                                           for name in names if name in screen_regions}
+        self.threshold = threshold
+        self.downscale = max(1, downscale)
+
+        self._references: Dict[str, np.ndarray] = {}
+        self._results: Dict[str, Any] = {}
+        self.hits = {name: 0 for name in self.regions}
+        self.misses = {name: 0 for name in self.regions}
+
+    def thumbnail(self, frame, region: Region) -> np.ndarray:
+        """Уменьшенная копия области (frame - ScreenFrame)"""
+        image = frame.bgr_region(region)
+        height, width = image.shape[:2]
+        size = (max(1, width // self.downscale), max(1, height // self.downscale))
+        return cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+    def run(self, name: str, frame, func: Callable[[Any], Any]) -> Any:
+        """Результат func(frame) для области name или сохраненный, если она не изменилась"""
+        region = self.regions.get(name)
+        if region is None:
+            return func(frame)
+
+        thumbnail = self.thumbnail(frame, region)
+        reference = self._references.get(name)
+        if (reference is not None and reference.shape == thumbnail.shape
+                and float(cv2.absdiff(thumbnail, reference).max()) <= self.threshold):
+            self.hits[name] += 1
+            return self._results[name]
+
+        self.misses[name] += 1
+        result = func(frame)
+        self._references[name] = thumbnail
+        self._results[name] = result
+        return result
+
+    def reset(self):
+        """Забыть сохраненные результаты (следующий кадр анализируется полностью)"""
+        self._references.clear()
+        self._results.clear()
+
+    def get_stats(self) -> Dict[str, Dict[str, float]]:
+        """Попадания/промахи по областям"""
+        stats = {}
+        for name in self.regions:
+            total = self.hits[name] + self.misses[name]
+            stats[name] = {
+                'hits': self.hits[name],
+                'misses': self.misses[name],
+                'hit_rate': self.hits[name] / total if total else 0.0,
+            }
+        return stats
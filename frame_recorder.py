@@ -0,0 +1,103 @@
+"""
+Запись кадров и результатов анализа в корпус для офлайн-воспроизведения
+"""
+
+import json
+import time
+from dataclasses import asdict, is_dataclass
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+import cv2
+import numpy as np
+
+MANIFEST_FILE = 'analysis.jsonl'
+META_FILE = 'meta.json'
+
+
+def serialize_analysis(analysis: Dict) -> Dict:
+    """Преобразование результата анализа в JSON-совместимый словарь"""
+    result = {}
+    for key, value in analysis.items():
+        if key == 'objects':
+            result[key] = [asdict(obj) if is_dataclass(obj) else obj for obj in value]
+        else:
+            result[key] = value
+    return json.loads(json.dumps(result, default=str))
+
+
+class FrameRecorder:
+    """Запись кадров (PNG без потерь) и их анализа (JSON Lines)"""
+
+    def __init__(self, output_dir: str, screen_regions: Dict, every_n: int = 1,
+                 max_frames: int = 5000, extra_meta: Optional[Dict] = None):
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.every_n = max(1, every_n)
+        self.max_frames = max_frames
+        self.seen = 0
+        self.recorded = len(list(self.output_dir.glob('frame_*.png')))
+        self.meta = {'screen_regions': screen_regions, **(extra_meta or {})}
+        self._meta_written = (self.output_dir / META_FILE).exists()
+
+        print(f"🎥 Запись корпуса кадров в {self.output_dir} (каждый {self.every_n}-й кадр)")
+
+    def record(self, frame: np.ndarray, analysis: Dict) -> bool:
+        """Сохранить кадр и его анализ (с учетом прореживания и лимита)"""
+        self.seen += 1
+        if self.seen % self.every_n or self.recorded >= self.max_frames:
+            return False
+
+        try:
+            if not self._meta_written:
+                height, width = frame.shape[:2]
+                self.meta['size'] = [width, height]
+                with open(self.output_dir / META_FILE, 'w', encoding='utf-8') as f:
+                    json.dump(self.meta, f, indent=2, ensure_ascii=False, default=list)
+                self._meta_written = True
+
+            self.recorded += 1
+            filename = f"frame_{self.recorded:06d}.png"
+            cv2.imwrite(str(self.output_dir / filename), frame,
+                        [cv2.IMWRITE_PNG_COMPRESSION, 3])
+
+            entry = {
+                'frame': filename,
+                'timestamp': time.time(),
+                'analysis': serialize_analysis(analysis),
+            }
+            with open(self.output_dir / MANIFEST_FILE, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            return True
+
+        except Exception as e:
+            print(f"⚠️ Ошибка записи кадра: {e}")
+            return False
+
+
+def load_meta(corpus_dir: str) -> Dict:
+    """Метаданные корпуса (области экрана, размер кадра)"""
+    path = Path(corpus_dir) / META_FILE
+    if not path.exists():
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def iter_corpus(corpus_dir: str) -> Iterator[Tuple[str, np.ndarray, Dict]]:
+    """Итерация по корпусу: (имя кадра, кадр BGR, записанный анализ)"""
+    corpus = Path(corpus_dir)
+    manifest = corpus / MANIFEST_FILE
+
+    if manifest.exists():
+        with open(manifest, 'r', encoding='utf-8') as f:
+            entries = [json.loads(line) for line in f if line.strip()]
+    else:
+        # Папка с обычными скриншотами без записанного анализа
+        entries = [{'frame': p.name, 'analysis': {}}
+                   for p in sorted(corpus.glob('*.png'))]
+
+    for entry in entries:
+        frame = cv2.imread(str(corpus / entry['frame']))
+        if frame is not None:
+            yield entry['frame'], frame, entry.get('analysis', {})
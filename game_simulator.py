@@ -0,0 +1,723 @@
+"""
+Безголовый симулятор игры для сквозных бенчмарков бота
+
+Рисует синтетические кадры (крипы, лагеря леса, враги, мини-карта, полоса
+здоровья, иконки скиллов) цветами из config.COLORS (BGR) и HSV_COLORS,
+принимает ввод от InputController и прогоняет полный main_loop/game_cycle
+в ускоренном времени.
+
+Запуск (без дисплея и GPU):
+    python game_simulator.py [--cycles 200] [--speed 20] [--seed 1] [--save report.json]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from capture_backend import CaptureBackend
+from digit_ocr import DigitOCR
+from config import BOT_CONFIG, COLORS, CONTROL_KEYS, HSV_COLORS
+from input_controller import InputController
+from utils import set_screen_size
+
+
+def config_color(name: str, position: Sequence[float] = (0.5, 0.5, 0.5)) -> Tuple[int, int, int]:
+    """BGR-цвет внутри диапазона config: COLORS - BGR, HSV_COLORS - HSV
+
+    position - место в диапазоне по каналам (0 - нижняя граница, 1 - верхняя).
+    """
+    entry = HSV_COLORS[name] if name in HSV_COLORS else COLORS[name]
+    lower, upper = entry['lower'].astype(float), entry['upper'].astype(float)
+    color = np.round(lower + (upper - lower) * np.asarray(position)).astype(np.uint8)
+    if name in HSV_COLORS:
+        color = cv2.cvtColor(color.reshape(1, 1, 3), cv2.COLOR_HSV2BGR)[0, 0]
+    return tuple(int(c) for c in color)
+
+
+SPRITE_COLORS = {
+    'creep': config_color('creep_yellow'),
+    'jungle': config_color('jungle_orange'),
+    # Самый зеленый край enemy_red: оттенок 9 - в диапазоне врагов движка,
+    # но вне диапазона туррелей (0-5)
+    'enemy': config_color('enemy_red', (0.0, 1.0, 0.3)),
+    'health': config_color('health_green'),
+    'mana': config_color('mana_blue'),
+    'minimap_ally': config_color('minimap_ally'),
+    'minimap_enemy': config_color('minimap_enemy'),
+    'minimap_jungle': config_color('minimap_objective'),
+    'skill_ready': config_color('ultimate_indicator'),
+}
+
+BACKGROUND = (58, 62, 60)
+HERO_COLOR = (200, 200, 200)
+
+# Иконки скиллов: радиус при высоте экрана 1080 (как кнопки 120x120 из README),
+# цвет и надпись у каждого свои; на перезарядке иконка затемнена
+SKILL_ICON_RADIUS = 60
+SKILL_ICON_COLORS = {
+    's1': (200, 120, 40),
+    's2': (170, 60, 150),
+    's3': (150, 160, 30),
+    'ult': SPRITE_COLORS['skill_ready'],
+}
+SKILL_ICON_LABELS = {'s1': '1', 's2': '2', 's3': '3', 'ult': 'U'}
+SKILL_COOLDOWN_DIMMING = 0.35
+MINIMAP_BACKGROUND = (35, 35, 35)
+
+ENTITY_STATS = {
+    'creep': {'health': 100, 'radius': 9, 'gold': 60},
+    'jungle': {'health': 250, 'radius': 11, 'gold': 80, 'respawn': 60.0},
+    'enemy': {'health': 400, 'radius': 13, 'gold': 300, 'respawn': 30.0,
+              'dps': 6.0, 'attack_range': 150, 'aggro_range': 500, 'speed': 120},
+}
+
+SKILLS = {
+    's1': {'damage': 60, 'range': 250, 'cooldown': 4.0},
+    's2': {'damage': 40, 'range': 200, 'cooldown': 6.0, 'dash': 150},
+    's3': {'damage': 50, 'range': 250, 'cooldown': 5.0},
+    'ult': {'damage': 150, 'range': 300, 'cooldown': 30.0},
+}
+BASIC_ATTACK = {'damage': 35, 'range': 180}
+
+
+def skill_icon(name: str, radius: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Иконка скилла (BGR) и ее круглая маска"""
+    size = 2 * radius
+    icon = np.empty((size, size, 3), dtype=np.uint8)
+    icon[:] = SKILL_ICON_COLORS[name]
+    scale = radius / 30
+    cv2.putText(icon, SKILL_ICON_LABELS[name], (int(radius * 0.55), int(radius * 1.4)),
+                cv2.FONT_HERSHEY_SIMPLEX, scale, (255, 255, 255), max(1, int(scale * 2)))
+    mask = np.zeros((size, size), dtype=np.uint8)
+    cv2.circle(mask, (radius, radius), radius - 1, 255, -1)
+    return icon, mask
+
+
+class SimulatedClock:
+    """Ускоренное время: подменяет модуль time в модулях бота"""
+
+    def __init__(self, speed: float = 10.0):
+        self.speed = speed
+        self._real_start = time.time()
+
+    def time(self) -> float:
+        return self._real_start + (time.time() - self._real_start) * self.speed
+
+    def sleep(self, seconds: float):
+        if seconds > 0:
+            time.sleep(seconds / self.speed)
+
+    def __getattr__(self, name):
+        # strftime, localtime и т.д. - от настоящего модуля
+        return getattr(time, name)
+
+    @contextlib.contextmanager
+    def patch(self, *modules):
+        """Временная подмена time в переданных модулях"""
+        saved = [(module, module.time) for module in modules]
+        for module in modules:
+            module.time = self
+        try:
+            yield self
+        finally:
+            for module, original in saved:
+                module.time = original
+
+
+@dataclass
+class SimEntity:
+    """Объект на карте симулятора (координаты мира)"""
+    kind: str
+    x: float
+    y: float
+    health: float
+    alive: bool = True
+    respawn_at: float = 0.0
+    expires_at: float = 0.0
+    target: Tuple[float, float] = (0.0, 0.0)
+
+
+class GameWorld:
+    """Состояние игры: герой в центре экрана, объекты вокруг него"""
+
+    MAP_SIZE = 3000
+    HERO_SPEED = 300.0
+    MOVE_TIME = 1.0
+    WAVE_INTERVAL = 20.0
+    CREEP_LIFETIME = 45.0
+
+    def __init__(self, screen_size: Tuple[int, int] = (1920, 1080),
+                 clock: Optional[SimulatedClock] = None, seed: Optional[int] = None):
+        self.width, self.height = screen_size
+        self.clock = clock or SimulatedClock(1.0)
+        self.rng = random.Random(seed)
+        self.lock = threading.RLock()
+        self.screen_regions: Dict = {}
+        self.skill_buttons: Dict[str, Tuple[int, int]] = {}
+        self.skill_icons: Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+
+        self.base = (self.MAP_SIZE / 2, self.MAP_SIZE / 2)
+        self.hero_x, self.hero_y = self.base
+        self.hero_health = 100.0
+        self.velocity = (0.0, 0.0)
+        self.move_until = 0.0
+        self.cooldowns = {name: 0.0 for name in SKILLS}
+        self.gold = 300
+        self.level = 1
+
+        now = self.clock.time()
+        self.last_tick = now
+        self.next_wave = now
+        self.entities: List[SimEntity] = []
+        for dx, dy in [(-500, -400), (500, -400), (-500, 400), (500, 400),
+                       (0, -700), (0, 700), (-900, 0), (900, 0)]:
+            self.entities.append(SimEntity('jungle', self.base[0] + dx, self.base[1] + dy,
+                                           ENTITY_STATS['jungle']['health']))
+        for _ in range(3):
+            x, y = self.random_point(self.base, 400, 1000)
+            self.entities.append(SimEntity('enemy', x, y, ENTITY_STATS['enemy']['health'],
+                                           target=(x, y)))
+
+        self.metrics = Counter()
+        self.events = Counter()
+        # Фон рисуется один раз и копируется (заливка кортежем в разы медленнее)
+        self.background = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        self.background[:, :] = np.array(BACKGROUND, dtype=np.uint8)
+        self.buffers = [np.empty_like(self.background) for _ in range(2)]
+        self.buffer_index = 0
+
+    def set_regions(self, screen_regions: Dict,
+                    skill_buttons: Optional[Dict[str, Tuple[int, int]]] = None):
+        """Области интерфейса бота (мини-карта, полосы) и кнопки скиллов"""
+        self.screen_regions = screen_regions
+        self.skill_buttons = dict(skill_buttons or {})
+
+        radius = max(4, round(SKILL_ICON_RADIUS * self.height / 1080))
+        self.skill_icons = {}
+        for name in self.skill_buttons:
+            if name in SKILL_ICON_COLORS:
+                icon, mask = skill_icon(name, radius)
+                dimmed = (icon * SKILL_COOLDOWN_DIMMING).astype(np.uint8)
+                self.skill_icons[name] = (icon, dimmed, mask > 0)
+
+    @staticmethod
+    def export_skill_templates(directory: str, filenames: Dict[str, str]):
+        """PNG-шаблоны готовых скиллов (BGRA, маска в альфа-канале) для высоты 1080"""
+        os.makedirs(directory, exist_ok=True)
+        for name, filename in filenames.items():
+            if name in SKILL_ICON_COLORS:
+                icon, mask = skill_icon(name, SKILL_ICON_RADIUS)
+                cv2.imwrite(os.path.join(directory, filename), np.dstack([icon, mask]))
+
+    def random_point(self, origin: Tuple[float, float], min_dist: float, max_dist: float):
+        angle = self.rng.uniform(0, 2 * math.pi)
+        dist = self.rng.uniform(min_dist, max_dist)
+        x = origin[0] + dist * math.cos(angle)
+        y = origin[1] + dist * math.sin(angle)
+        return (min(max(x, 0), self.MAP_SIZE), min(max(y, 0), self.MAP_SIZE))
+
+    @staticmethod
+    def export_glyph_atlas(path: str):
+        """Атлас цифр шрифта, которым рисуются золото и уровень"""
+        crop = np.empty((40, 200, 3), dtype=np.uint8)
+        crop[:] = BACKGROUND
+        cv2.putText(crop, '0123456789', (5, 32), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2)
+        DigitOCR(path, tesseract_fallback=False).learn(crop, '0123456789')
+
+    # ---------- Динамика ----------
+
+    def tick(self):
+        """Продвинуть мир до текущего (виртуального) времени"""
+        with self.lock:
+            now = self.clock.time()
+            dt = min(now - self.last_tick, 1.0)
+            self.last_tick = now
+            if dt <= 0:
+                return
+
+            # Движение героя от джойстика
+            if now < self.move_until:
+                self.hero_x = min(max(self.hero_x + self.velocity[0] * dt, 0), self.MAP_SIZE)
+                self.hero_y = min(max(self.hero_y + self.velocity[1] * dt, 0), self.MAP_SIZE)
+
+            # Волна крипов рядом с героем
+            if now >= self.next_wave:
+                self.next_wave = now + self.WAVE_INTERVAL
+                for _ in range(4):
+                    x, y = self.random_point((self.hero_x, self.hero_y), 120, 350)
+                    self.entities.append(SimEntity('creep', x, y, ENTITY_STATS['creep']['health'],
+                                                   expires_at=now + self.CREEP_LIFETIME))
+
+            enemy = ENTITY_STATS['enemy']
+            for entity in self.entities:
+                if not entity.alive:
+                    if entity.kind != 'creep' and now >= entity.respawn_at:
+                        entity.alive = True
+                        entity.health = ENTITY_STATS[entity.kind]['health']
+                    continue
+
+                if entity.kind == 'creep' and now >= entity.expires_at:
+                    entity.alive = False
+                elif entity.kind == 'enemy':
+                    distance = self.distance_to_hero(entity)
+                    if distance < enemy['attack_range']:
+                        self.damage_hero(enemy['dps'] * dt)
+                    elif distance < enemy['aggro_range']:
+                        self.step_towards(entity, (self.hero_x, self.hero_y), enemy['speed'] * dt)
+                    else:
+                        if math.hypot(entity.target[0] - entity.x, entity.target[1] - entity.y) < 20:
+                            entity.target = self.random_point((entity.x, entity.y), 100, 600)
+                        self.step_towards(entity, entity.target, enemy['speed'] * dt)
+
+            self.entities = [e for e in self.entities if e.alive or e.kind != 'creep']
+
+            # Регенерация
+            self.hero_health = min(100.0, self.hero_health + 1.5 * dt)
+
+    def step_towards(self, entity: SimEntity, target: Tuple[float, float], step: float):
+        dx, dy = target[0] - entity.x, target[1] - entity.y
+        distance = math.hypot(dx, dy)
+        if distance > 1e-6:
+            ratio = min(1.0, step / distance)
+            entity.x += dx * ratio
+            entity.y += dy * ratio
+
+    def distance_to_hero(self, entity: SimEntity) -> float:
+        return math.hypot(entity.x - self.hero_x, entity.y - self.hero_y)
+
+    def damage_hero(self, amount: float):
+        self.hero_health -= amount
+        self.metrics['damage_taken'] += amount
+        if self.hero_health <= 0:
+            # Смерть: возрождение на базе с полным здоровьем
+            self.metrics['deaths'] += 1
+            self.hero_health = 100.0
+            self.hero_x, self.hero_y = self.base
+            self.move_until = 0.0
+
+    def damage_area(self, damage: float, attack_range: float, single: bool = False) -> int:
+        """Урон объектам в радиусе героя, возвращает число попаданий"""
+        targets = [e for e in self.entities if e.alive and self.distance_to_hero(e) <= attack_range]
+        if single and targets:
+            targets = [min(targets, key=self.distance_to_hero)]
+
+        for entity in targets:
+            entity.health -= damage
+            self.metrics['damage_dealt'] += damage
+            if entity.health <= 0:
+                stats = ENTITY_STATS[entity.kind]
+                entity.alive = False
+                entity.respawn_at = self.clock.time() + stats.get('respawn', 0.0)
+                self.gold += stats['gold']
+                self.metrics['gold'] += stats['gold']
+                self.metrics[f'{entity.kind}_killed'] += 1
+                self.level = min(15, 1 + (self.gold - 300) // 400)
+
+        self.metrics['hits' if targets else 'misses'] += 1
+        return len(targets)
+
+    # ---------- Ввод ----------
+
+    def move_hero(self, angle: float, force: float):
+        """Джойстик: угол в экранных координатах (0 - вправо, 90 - вниз)"""
+        with self.lock:
+            self.tick()
+            speed = self.HERO_SPEED * max(0.0, min(force, 1.0))
+            rad = math.radians(angle)
+            self.velocity = (speed * math.cos(rad), speed * math.sin(rad))
+            self.move_until = self.clock.time() + self.MOVE_TIME
+            self.events['move'] += 1
+
+    def stop_hero(self):
+        with self.lock:
+            self.move_until = 0.0
+
+    def use_skill(self, skill_name: str) -> int:
+        with self.lock:
+            self.tick()
+            self.events[skill_name] += 1
+            now = self.clock.time()
+            skill = SKILLS.get(skill_name)
+            if skill is None or now < self.cooldowns[skill_name]:
+                self.metrics['skills_on_cooldown'] += 1
+                return 0
+            self.cooldowns[skill_name] = now + skill['cooldown']
+
+            if skill.get('dash'):
+                # Рывок к ближайшей цели
+                alive = [e for e in self.entities if e.alive]
+                if alive:
+                    nearest = min(alive, key=self.distance_to_hero)
+                    hero = SimEntity('hero', self.hero_x, self.hero_y, 0)
+                    self.step_towards(hero, (nearest.x, nearest.y), skill['dash'])
+                    self.hero_x, self.hero_y = hero.x, hero.y
+            return self.damage_area(skill['damage'], skill['range'])
+
+    def basic_attack(self) -> int:
+        with self.lock:
+            self.tick()
+            self.events['attack'] += 1
+            return self.damage_area(BASIC_ATTACK['damage'], BASIC_ATTACK['range'], single=True)
+
+    # ---------- Отрисовка ----------
+
+    def to_screen(self, x: float, y: float) -> Tuple[int, int]:
+        return (int(x - self.hero_x + self.width / 2), int(y - self.hero_y + self.height / 2))
+
+    def render(self) -> np.ndarray:
+        """Синтетический кадр BGR (два буфера по очереди)"""
+        with self.lock:
+            self.tick()
+            self.buffer_index = 1 - self.buffer_index
+            frame = self.buffers[self.buffer_index]
+            np.copyto(frame, self.background)
+
+            for entity in self.entities:
+                if not entity.alive:
+                    continue
+                position = self.to_screen(entity.x, entity.y)
+                if -20 <= position[0] < self.width + 20 and -20 <= position[1] < self.height + 20:
+                    cv2.circle(frame, position, ENTITY_STATS[entity.kind]['radius'],
+                               SPRITE_COLORS[entity.kind], -1)
+
+            cv2.circle(frame, (self.width // 2, self.height // 2), 14, HERO_COLOR, -1)
+            self.render_interface(frame)
+            self.metrics['frames'] += 1
+            return frame
+
+    def render_interface(self, frame: np.ndarray):
+        regions = self.screen_regions
+        now = self.clock.time()
+
+        if 'minimap' in regions:
+            self.render_minimap(frame, regions['minimap'])
+
+        if 'health_bar' in regions:
+            x, y, w, h = regions['health_bar']
+            frame[y:y + h, x:x + w] = MINIMAP_BACKGROUND
+            filled = int(w * max(self.hero_health, 0) / 100)
+            frame[y:y + h, x:x + filled] = SPRITE_COLORS['health']
+
+        if 'mana_bar' in regions:
+            x, y, w, h = regions['mana_bar']
+            frame[y:y + h, x:x + w] = SPRITE_COLORS['mana']
+
+        for name, (icon, dimmed, mask) in self.skill_icons.items():
+            size = icon.shape[0]
+            bx, by = self.skill_buttons[name]
+            x0, y0 = bx - size // 2, by - size // 2
+            if x0 < 0 or y0 < 0 or x0 + size > self.width or y0 + size > self.height:
+                continue
+            ready = now >= self.cooldowns.get(name, 0.0)
+            np.copyto(frame[y0:y0 + size, x0:x0 + size], icon if ready else dimmed,
+                      where=mask[..., None])
+
+        for key, text in (('gold_area', str(self.gold)), ('level_area', str(self.level))):
+            if key in regions:
+                x, y, w, h = regions[key]
+                cv2.putText(frame, text, (x + 5, y + h - 8), cv2.FONT_HERSHEY_SIMPLEX,
+                            0.8, (255, 255, 255), 2)
+
+    def render_minimap(self, frame: np.ndarray, region: Tuple[int, int, int, int]):
+        """Мини-карта: вся карта, лагеря леса, метки врагов и героя"""
+        x, y, w, h = region
+        minimap = frame[y:y + h, x:x + w]
+        minimap[:] = MINIMAP_BACKGROUND
+
+        def project(px: float, py: float) -> Tuple[int, int]:
+            return (int(px * w / self.MAP_SIZE), int(py * h / self.MAP_SIZE))
+
+        half = max(2, int(120 * w / self.MAP_SIZE))
+        for entity in self.entities:
+            if entity.kind == 'jungle':
+                cx, cy = project(entity.x, entity.y)
+                cv2.rectangle(minimap, (cx - half, cy - half), (cx + half, cy + half),
+                              SPRITE_COLORS['minimap_jungle'], -1)
+        for entity in self.entities:
+            if entity.kind == 'enemy' and entity.alive:
+                cv2.circle(minimap, project(entity.x, entity.y), 3, SPRITE_COLORS['minimap_enemy'], -1)
+        cv2.circle(minimap, project(self.hero_x, self.hero_y), 4, SPRITE_COLORS['minimap_ally'], -1)
+
+
+class SimulatedCaptureBackend(CaptureBackend):
+    """Источник кадров из симулятора"""
+
+    name = 'simulator'
+
+    def __init__(self, world: GameWorld):
+        super().__init__()
+        self.world = world
+
+    def _grab(self) -> Optional[np.ndarray]:
+        return self.world.render()
+
+
+class SimulatedInputController(InputController):
+    """Ввод в симулятор вместо pyautogui"""
+
+    def __init__(self, world: GameWorld, joystick_center: Tuple[int, int],
+                 joystick_radius: int, attack_button: Tuple[int, int],
+                 skill_buttons: Dict[str, Tuple[int, int]]):
+        super().__init__(joystick_center, joystick_radius, attack_button, skill_buttons)
+        self.world = world
+
+    def drag_joystick_to_angle(self, angle: float, force: float = 0.8) -> bool:
+        self.world.move_hero(angle, force)
+        self.world.clock.sleep(self.drag_duration + 0.2)
+        return True
+
+    def use_skill(self, skill_name: str, delay: float = 0.1) -> bool:
+        if skill_name not in self.skill_buttons:
+            print(f"⚠️ Скилл {skill_name} не найден")
+            return False
+        self.world.use_skill(skill_name)
+        self.world.clock.sleep(delay)
+        return True
+
+    def basic_attack(self, count: int = 1, delay_between: float = 0.08):
+        for i in range(count):
+            self.world.basic_attack()
+            if i < count - 1:
+                self.world.clock.sleep(delay_between)
+
+    def calibrate(self) -> bool:
+        return True
+
+    def stop_all_actions(self):
+        self.world.stop_hero()
+
+
+class SimulatedControls:
+    """Клавиши управления: старт бота сразу, выход по условию остановки"""
+
+    def __init__(self, stop_condition: Callable[[], bool]):
+        self.stop_condition = stop_condition
+        self.pending = {CONTROL_KEYS['toggle_bot']}
+
+    def press(self, key: str):
+        self.pending.add(key.lower())
+
+    def is_pressed(self, key: str) -> bool:
+        key = key.lower()
+        if key == CONTROL_KEYS['exit']:
+            return self.stop_condition()
+        if key in self.pending:
+            self.pending.discard(key)
+            return True
+        return False
+
+
+class GameSimulator:
+    """Прогон HayabusaBot против симулятора с замером скорости и качества"""
+
+    def __init__(self, screen_size: Tuple[int, int] = (1920, 1080), speed: float = 20.0,
+                 seed: Optional[int] = None, max_cycles: int = 200,
+                 max_seconds: float = 300.0, pipeline: Optional[bool] = None,
+                 window: int = 25, work_dir: Optional[str] = None, verbose: bool = False):
+        self.screen_size = screen_size
+        self.clock = SimulatedClock(speed)
+        self.seed = seed
+        self.max_cycles = max_cycles
+        self.max_seconds = max_seconds
+        self.pipeline = pipeline
+        self.window = window
+        self.work_dir = work_dir
+        self.verbose = verbose
+
+        self.world = GameWorld(screen_size, self.clock, seed)
+        self.bot = None
+        self.curve: List[Dict] = []
+        self._last_sample = {'cycles': 0, 'successful': 0, 'gold': 0}
+        self._start_time = 0.0
+
+    def build_bot(self):
+        """HayabusaBot с источником кадров, вводом и клавишами симулятора"""
+        from bot_core import HayabusaBot
+        from bot_pipeline import BotPipeline
+        from screen_layout import compile_layout
+
+        set_screen_size(self.screen_size)
+        layout = compile_layout(self.screen_size)
+        controller = SimulatedInputController(
+            self.world, layout.joystick_center, layout.joystick_radius,
+            layout.attack_button, dict(layout.skill_buttons)
+        )
+
+        bot = HayabusaBot(capture_backend=SimulatedCaptureBackend(self.world),
+                          input_controller=controller,
+                          controls=SimulatedControls(self.should_stop))
+        if self.pipeline is not None:
+            bot.pipeline = BotPipeline(bot) if self.pipeline else None
+        self.world.set_regions(bot.screen_regions, controller.skill_buttons)
+        self.bot = bot
+        return bot
+
+    def should_stop(self) -> bool:
+        """Условие выхода (и снятие точек кривой обучения)"""
+        bot = self.bot
+        if bot is None:
+            return False
+        if bot.cycle_count - self._last_sample['cycles'] >= self.window:
+            self.sample()
+        elapsed = time.time() - self._start_time
+        return bot.cycle_count >= self.max_cycles or elapsed >= self.max_seconds
+
+    def sample(self):
+        """Точка кривой обучения: успешность и золото за окно циклов"""
+        bot = self.bot
+        cycles = bot.cycle_count - self._last_sample['cycles']
+        successful = bot.stats.successful_actions - self._last_sample['successful']
+        gold = self.world.metrics['gold'] - self._last_sample['gold']
+        self.curve.append({
+            'cycles': bot.cycle_count,
+            'success_rate': successful / cycles if cycles else 0.0,
+            'gold': gold,
+        })
+        self._last_sample = {'cycles': bot.cycle_count,
+                             'successful': bot.stats.successful_actions,
+                             'gold': self.world.metrics['gold']}
+
+    def run(self) -> Dict:
+        """Полный прогон main_loop до max_cycles циклов"""
+        import bot_core
+        import decision_maker
+        import input_controller
+
+        output = io.StringIO() if not self.verbose else None
+        previous_dir = os.getcwd()
+        work_dir = self.work_dir or tempfile.mkdtemp(prefix='mlbb_sim_')
+
+        os.chdir(work_dir)
+        try:
+            # Шаблоны иконок скиллов - как снятые пользователем по README
+            self.world.export_skill_templates(BOT_CONFIG['templates_dir'], BOT_CONFIG['skill_templates'])
+            self.world.export_glyph_atlas(BOT_CONFIG['glyph_atlas_path'])
+            with contextlib.ExitStack() as stack:
+                if output is not None:
+                    stack.enter_context(contextlib.redirect_stdout(output))
+                stack.enter_context(self.clock.patch(bot_core, decision_maker, input_controller))
+
+                bot = self.build_bot()
+                virtual_start = self.clock.time()
+                self._start_time = time.time()
+                bot.main_loop()
+                real_time = time.time() - self._start_time
+                virtual_time = self.clock.time() - virtual_start
+                bot.running = False
+        finally:
+            os.chdir(previous_dir)
+            set_screen_size(None)
+
+        if bot.cycle_count > self._last_sample['cycles']:
+            self.sample()
+        return self.report(real_time, virtual_time)
+
+    def report(self, real_time: float, virtual_time: float) -> Dict:
+        bot = self.bot
+        metrics = self.world.metrics
+        decisions = bot.decision_maker.get_statistics()
+        attempts = metrics['hits'] + metrics['misses']
+        minutes = virtual_time / 60 if virtual_time > 0 else 0.0
+
+        result = {
+            'cycles': bot.cycle_count,
+            'real_time': real_time,
+            'virtual_time': virtual_time,
+            'cycles_per_sec': bot.cycle_count / real_time if real_time > 0 else 0.0,
+            'frames': metrics['frames'],
+            'capture': bot.vision_engine.capture_backend.get_stats(),
+            'world': dict(metrics),
+            'inputs': dict(self.world.events),
+            'decision': {
+                'actions': {action: stats['total'] for action, stats in decisions['action_stats'].items()},
+                'bot_success_rate': decisions['success_rate'],
+                'hit_rate': metrics['hits'] / attempts if attempts else 0.0,
+                'gold_per_min': metrics['gold'] / minutes if minutes else 0.0,
+                'deaths': metrics['deaths'],
+            },
+            'learning_curve': self.curve,
+        }
+        if bot.pipeline is not None:
+            result['pipeline'] = bot.pipeline.get_latency_stats()
+        if bot.profiler is not None:
+            result['stages'] = bot.profiler.summary()
+        return result
+
+
+def print_report(report: Dict):
+    print(f"\n🎮 Симуляция: {report['cycles']} циклов за {report['real_time']:.1f}с "
+          f"({report['cycles_per_sec']:.2f} циклов/с, игрового времени {report['virtual_time']:.0f}с)")
+    print(f"📸 Кадров: {report['frames']} | захват сред. "
+          f"{report['capture']['avg_capture_time'] * 1000:.2f}мс")
+
+    decision = report['decision']
+    world = report['world']
+    print(f"🎯 Попаданий: {decision['hit_rate']:.1%} | золото/мин: {decision['gold_per_min']:.0f} | "
+          f"смертей: {decision['deaths']} | успешность по мнению бота: {decision['bot_success_rate']:.1%}")
+    print(f"⚔️ Убито: крипов {world.get('creep_killed', 0)}, лагерей {world.get('jungle_killed', 0)}, "
+          f"героев {world.get('enemy_killed', 0)}")
+    print(f"🧭 Действия: {decision['actions']}")
+
+    print("📈 Кривая обучения:")
+    for point in report['learning_curve']:
+        print(f"   циклы {point['cycles']:>5} | успешность {point['success_rate']:6.1%} | "
+              f"золото +{point['gold']}")
+
+    for name, stats in report.get('pipeline', {}).items():
+        print(f"🔀 {name:<9} сред. {stats['avg'] * 1000:7.1f}мс | обработано {stats['processed']}")
+
+    for name, stats in report.get('stages', {}).items():
+        if stats['count']:
+            print(f"⏱️ {name:<22} сред. {stats['mean_ms']:7.2f}мс | p99 {stats['p99_ms']:7.2f}мс | n={stats['count']}")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Безголовый симулятор для бенчмарка бота")
+    parser.add_argument('--cycles', type=int, default=200, help="Сколько игровых циклов прогнать")
+    parser.add_argument('--speed', type=float, default=20.0, help="Ускорение игрового времени")
+    parser.add_argument('--seed', type=int, default=None, help="Зерно генератора мира")
+    parser.add_argument('--width', type=int, default=1920)
+    parser.add_argument('--height', type=int, default=1080)
+    parser.add_argument('--max-seconds', type=float, default=300.0, help="Ограничение реального времени")
+    parser.add_argument('--sequential', action='store_true', help="Без конвейера (game_cycle в главном потоке)")
+    parser.add_argument('--window', type=int, default=25, help="Размер окна кривой обучения (циклов)")
+    parser.add_argument('--work-dir', help="Папка для данных обучения (по умолчанию временная)")
+    parser.add_argument('--verbose', action='store_true', help="Показывать вывод бота")
+    parser.add_argument('--save', help="Сохранить отчет в JSON")
+    args = parser.parse_args(argv)
+
+    if args.seed is not None:
+        random.seed(args.seed)
+        np.random.seed(args.seed)
+
+    simulator = GameSimulator(
+        screen_size=(args.width, args.height), speed=args.speed, seed=args.seed,
+        max_cycles=args.cycles, max_seconds=args.max_seconds,
+        pipeline=False if args.sequential else None, window=args.window,
+        work_dir=args.work_dir, verbose=args.verbose
+    )
+    report = simulator.run()
+    print_report(report)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 Отчет сохранен в {args.save}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -261,12 +261,80 @@ class GameObject:
     health: float = 100.0
     is_enemy: bool = False
     distance: float = 0.0
+    track_id: int = -1  # ID трека (ObjectTracker), -1 - не отслеживается
+    velocity: Tuple[float, float] = (0.0, 0.0)  # пикс/сек
     
     def calculate_distance(self, from_pos: Tuple[int, int]) -> float:
         """Вычисление расстояния до точки"""
         return math.sqrt((self.position[0] - from_pos[0])**2 + 
                         (self.position[1] - from_pos[1])**2)
 
+# Коды типов объектов для столбцов ObjectColumns
+OBJECT_TYPE_CODES = {'creep': 0, 'jungle': 1, 'hero': 2, 'tower': 3}
+UNKNOWN_TYPE_CODE = len(OBJECT_TYPE_CODES)
+
+class ObjectColumns:
+    """Объекты кадра в виде numpy-столбцов (structure-of-arrays)
+    
+    Строится один раз на кадр; расстояния, счетчики и индексы
+    ближайших объектов считаются одним векторным проходом.
+    """
+    
+    def __init__(self, objects: List[GameObject]):
+        count = len(objects)
+        self.source = objects
+        self.size = count
+        self.x = np.fromiter((obj.position[0] for obj in objects), dtype=np.float32, count=count)
+        self.y = np.fromiter((obj.position[1] for obj in objects), dtype=np.float32, count=count)
+        self.type_code = np.fromiter((OBJECT_TYPE_CODES.get(obj.type, UNKNOWN_TYPE_CODE)
+                                      for obj in objects), dtype=np.int8, count=count)
+        self.confidence = np.fromiter((obj.confidence for obj in objects), dtype=np.float32, count=count)
+        self.health = np.fromiter((obj.health for obj in objects), dtype=np.float32, count=count)
+        self.is_enemy = np.fromiter((obj.is_enemy for obj in objects), dtype=bool, count=count)
+        
+        self.distance = np.zeros(count, dtype=np.float32)
+        self.center = None
+        self.nearest_creep = -1
+        self.nearest_enemy = -1
+    
+    def is_current(self, objects: List[GameObject]) -> bool:
+        """Столбцы построены по этому же списку объектов"""
+        return self.source is objects and self.size == len(objects)
+    
+    def update(self, screen_center: Tuple[int, int]):
+        """Расстояния до центра и индексы ближайших объектов"""
+        self.center = tuple(screen_center)
+        if self.size == 0:
+            self.nearest_creep = self.nearest_enemy = -1
+            return
+        
+        self.distance = np.hypot(self.x - screen_center[0], self.y - screen_center[1])
+        
+        creep_mask = self.type_code <= OBJECT_TYPE_CODES['jungle']
+        self.nearest_creep = self.nearest_index(creep_mask)
+        
+        # Среди равноудаленных врагов - с меньшим ХП
+        self.nearest_enemy = self.nearest_index(self.enemy_mask(), tiebreak=self.health)
+    
+    def enemy_mask(self) -> np.ndarray:
+        return (self.type_code == OBJECT_TYPE_CODES['hero']) & self.is_enemy
+    
+    def nearest_index(self, mask: np.ndarray, tiebreak: Optional[np.ndarray] = None) -> int:
+        if not mask.any():
+            return -1
+        masked = np.where(mask, self.distance, np.inf)
+        if tiebreak is None:
+            return int(np.argmin(masked))
+        return int(np.lexsort((tiebreak, masked))[0])
+    
+    def get(self, index: int) -> Optional[GameObject]:
+        """Объект по индексу столбцов (с записанным расстоянием)"""
+        if index < 0:
+            return None
+        obj = self.source[index]
+        obj.distance = float(self.distance[index])
+        return obj
+
 @dataclass
 class GameState:
     """Состояние игры"""
@@ -274,7 +342,11 @@ class GameState:
     my_mana: float = 100.0
     my_level: int = 1
     my_gold: int = 300
-    map_position: str = "base"
+    map_position: str = "base"     # зона карты, выводится из map_coords
+    map_coords: Optional[Tuple[float, float]] = None  # позиция героя на карте (0-1)
+    minimap_enemies: List[Tuple[float, float]] = field(default_factory=list)
+    objective_distance: Optional[float] = None
+    enemy_density: float = 0.0
     game_time: int = 0
     phase: str = "early"
     visible_objects: List[GameObject] = field(default_factory=list)
@@ -288,53 +360,47 @@ class GameState:
     })
     safety_score: float = 1.0  # 1.0 = безопасно, 0.0 = опасно
     
+    # Кэш столбцов хранится в слоте, а не в __dict__: словарь состояния
+    # копируется в опыт обучения и сохраняется на диск
+    __slots__ = ('_columns', '__dict__', '__weakref__')
+    
+    def __post_init__(self):
+        self._columns: Optional[ObjectColumns] = None
+    
+    def object_columns(self) -> ObjectColumns:
+        """Столбцы для текущего списка visible_objects (перестраиваются при замене списка)"""
+        if self._columns is None or not self._columns.is_current(self.visible_objects):
+            self._columns = ObjectColumns(self.visible_objects)
+        return self._columns
+    
     def update_counts(self, screen_center: Optional[Tuple[int, int]] = None):
-        """Обновление счетчиков объектов"""
-        self.enemies_nearby = 0
-        self.creeps_nearby = 0
-        self.jungle_creeps_nearby = 0
+        """Обновление счетчиков объектов (один векторный проход на кадр)"""
+        columns = self.object_columns()
+        codes = columns.type_code
         
-        for obj in self.visible_objects:
-            # Вычисляем расстояние если передан центр экрана
-            if screen_center:
-                obj.distance = obj.calculate_distance(screen_center)
-            
-            if obj.type == 'hero' and obj.is_enemy:
-                self.enemies_nearby += 1
-            elif obj.type == 'creep':
-                self.creeps_nearby += 1
-            elif obj.type == 'jungle':
-                self.jungle_creeps_nearby += 1
+        self.enemies_nearby = int(np.count_nonzero(columns.enemy_mask()))
+        self.creeps_nearby = int(np.count_nonzero(codes == OBJECT_TYPE_CODES['creep']))
+        self.jungle_creeps_nearby = int(np.count_nonzero(codes == OBJECT_TYPE_CODES['jungle']))
+        
+        if screen_center:
+            columns.update(screen_center)
+    
+    def _columns_for(self, screen_center: Tuple[int, int]) -> ObjectColumns:
+        """Столбцы с расстояниями до screen_center (пересчет только при смене центра)"""
+        columns = self.object_columns()
+        if columns.center != tuple(screen_center):
+            columns.update(screen_center)
+        return columns
     
     def get_nearest_creep(self, screen_center: Tuple[int, int]) -> Optional[GameObject]:
         """Получение ближайшего крипа"""
-        creeps = [obj for obj in self.visible_objects 
-                 if obj.type in ['creep', 'jungle']]
-        
-        if not creeps:
-            return None
-        
-        # Вычисляем расстояния
-        for creep in creeps:
-            creep.distance = creep.calculate_distance(screen_center)
-        
-        # Выбираем ближайшего
-        return min(creeps, key=lambda x: x.distance)
+        columns = self._columns_for(screen_center)
+        return columns.get(columns.nearest_creep)
     
     def get_nearest_enemy(self, screen_center: Tuple[int, int]) -> Optional[GameObject]:
-        """Получение ближайшего врага"""
-        enemies = [obj for obj in self.visible_objects 
-                  if obj.type == 'hero' and obj.is_enemy]
-        
-        if not enemies:
-            return None
-        
-        # Вычисляем расстояния
-        for enemy in enemies:
-            enemy.distance = enemy.calculate_distance(screen_center)
-        
-        # Выбираем ближайшего с низким ХП
-        return min(enemies, key=lambda x: (x.distance, x.health))
+        """Получение ближайшего врага (при равном расстоянии - с низким ХП)"""
+        columns = self._columns_for(screen_center)
+        return columns.get(columns.nearest_enemy)
     
     def get_state_snapshot(self) -> Dict:
         """Снимок состояния для обучения"""
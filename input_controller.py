@@ -2,12 +2,19 @@
 Контроллер ввода для управления игрой
 """
 
-import pyautogui
 import math
 import time
 import random
 from typing import Tuple, Dict, Optional
-from utils import get_screen_center, calculate_distance, calculate_angle
+from utils import get_screen_center, get_screen_size, calculate_distance, calculate_angle
+
+# PyAutoGUI требует дисплей (без него - только симулятор)
+try:
+    import pyautogui
+    PYAUTOGUI_AVAILABLE = True
+except Exception:
+    pyautogui = None
+    PYAUTOGUI_AVAILABLE = False
 
 class InputController:
     """Контроллер ввода (мышь/клавиатура)"""
@@ -23,8 +30,9 @@ class InputController:
         self.skill_buttons = skill_buttons
         
         # Настройки PyAutoGUI
-        pyautogui.FAILSAFE = True
-        pyautogui.PAUSE = 0.05
+        if PYAUTOGUI_AVAILABLE:
+            pyautogui.FAILSAFE = True
+            pyautogui.PAUSE = 0.05
         
         self.is_dragging = False
         self.drag_duration = 0.15
@@ -200,7 +208,7 @@ class InputController:
         input()  # Ждем нажатия Enter
         
         # Автоматическая калибровка
-        screen_width, screen_height = pyautogui.size()
+        screen_width, screen_height = get_screen_size()
         
         print(f"📏 Разрешение экрана: {screen_width}x{screen_height}")
         
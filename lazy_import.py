@@ -0,0 +1,77 @@
+"""
+Ленивый импорт тяжелых зависимостей и отчет о времени импорта
+"""
+
+import importlib
+import importlib.util
+import sys
+import time
+from typing import Callable, Dict, Optional
+
+# Время импорта модулей (сек), замеренных через timed_import
+IMPORT_TIMES: Dict[str, float] = {}
+
+
+def module_available(name: str) -> bool:
+    """Установлен ли модуль (проверка без импорта)"""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def timed_import(name: str):
+    """Импорт модуля с замером времени (уже загруженные не замеряются)"""
+    if name in sys.modules:
+        return sys.modules[name]
+    start = time.perf_counter()
+    module = importlib.import_module(name)
+    IMPORT_TIMES[name] = time.perf_counter() - start
+    return module
+
+
+class LazyModule:
+    """Модуль, который импортируется при первом обращении к атрибуту
+
+    on_load вызывается один раз с загруженным модулем (например, для
+    настроек модуля, которые раньше выполнялись при импорте).
+    """
+
+    def __init__(self, name: str, on_load: Optional[Callable] = None):
+        self._name = name
+        self._on_load = on_load
+        self._module = None
+
+    def _load(self):
+        if self._module is None:
+            module = timed_import(self._name)
+            if self._on_load is not None:
+                self._on_load(module)
+            self._module = module
+        return self._module
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    @property
+    def available(self) -> bool:
+        """Можно ли загрузить модуль"""
+        return self._module is not None or module_available(self._name)
+
+    @property
+    def loaded(self) -> bool:
+        return self._module is not None
+
+    def __repr__(self) -> str:
+        state = 'загружен' if self._module is not None else 'не загружен'
+        return f"<LazyModule {self._name} ({state})>"
+
+
+def print_import_report(top: int = 15):
+    """Самые долгие импорты (с зависимостями, которые еще не были загружены)"""
+    if not IMPORT_TIMES:
+        return
+    total = sum(IMPORT_TIMES.values())
+    print(f"⏱️ Импорт модулей: {total * 1000:.0f}мс")
+    for name, seconds in sorted(IMPORT_TIMES.items(), key=lambda item: -item[1])[:top]:
+        print(f"   {name:<20} {seconds * 1000:7.1f}мс")
@@ -13,9 +13,24 @@ from dataclasses import dataclass, field, asdict
 from collections import defaultdict, deque
 import random
 from pathlib import Path
-import torch
-import torch.nn as nn
-import torch.optim as optim
+from lazy_import import LazyModule, module_available
+from numpy_mlp import NumpyMLP
+from pattern_index import PatternIndex, PatternKey, convert_patterns
+from q_table import QTable, encode_state, state_key
+from replay_buffer import ReplayBuffer
+
+# torch загружается только при создании нейросети (импорт занимает секунды)
+torch = LazyModule('torch')
+nn = LazyModule('torch.nn')
+optim = LazyModule('torch.optim')
+TORCH_AVAILABLE = module_available('torch')
+
+# Маппинг действий к индексам (столбцы Q-таблицы и выходы нейросети)
+ACTION_MAP = {
+    'farm': 0, 'gank': 1, 'jungle': 2, 'retreat': 3,
+    'patrol': 4, 'teamfight': 5, 'objective': 6,
+    'defend': 7, 'push': 8
+}
 
 @dataclass
 class NeuralNetworkModel:
@@ -31,35 +46,101 @@ class NeuralNetworkModel:
         )
         self.optimizer = optim.Adam(self.net.parameters(), lr=0.001)
         self.loss_fn = nn.MSELoss()
+        self._inputs = {}  # размер пакета -> (тензор входа, numpy-вид его памяти)
     
     def predict(self, state: np.ndarray) -> np.ndarray:
-        """Предсказание Q-значений для состояний"""
+        """Предсказание Q-значений для состояний (режим eval - без dropout)"""
+        state = np.asarray(state, dtype=np.float32)
+        inputs = self._inputs.get(state.shape)
+        if inputs is None:
+            # Тензор входа выделяется один раз на размер пакета; numpy-вид
+            # делит с ним память, поэтому новый вход копируется без аллокаций
+            tensor = torch.zeros(state.shape)
+            inputs = self._inputs[state.shape] = (tensor, tensor.numpy())
+        tensor, view = inputs
+        view[...] = state
+        
+        self.net.eval()
         with torch.no_grad():
-            tensor_state = torch.FloatTensor(state)
-            return self.net(tensor_state).numpy()
+            return self.net(tensor).numpy()
     
-    def train(self, states: np.ndarray, targets: np.ndarray, epochs: int = 5):
-        """Обучение нейросети"""
-        states_tensor = torch.FloatTensor(states)
-        targets_tensor = torch.FloatTensor(targets)
+    def train(self, states: np.ndarray, targets: np.ndarray, epochs: int = 5,
+              weights: Optional[np.ndarray] = None):
+        """Обучение нейросети (weights - веса важности опытов пакета)"""
+        states_tensor = torch.from_numpy(np.ascontiguousarray(states, dtype=np.float32))
+        targets_tensor = torch.from_numpy(np.ascontiguousarray(targets, dtype=np.float32))
+        weights_tensor = torch.from_numpy(weights).unsqueeze(1) if weights is not None else None
         
+        self.net.train()
         for epoch in range(epochs):
             self.optimizer.zero_grad()
             predictions = self.net(states_tensor)
-            loss = self.loss_fn(predictions, targets_tensor)
+            if weights_tensor is None:
+                loss = self.loss_fn(predictions, targets_tensor)
+            else:
+                loss = (weights_tensor * (predictions - targets_tensor) ** 2).mean()
             loss.backward()
             self.optimizer.step()
         
         return loss.item()
+    
+    def get_flat_weights(self) -> np.ndarray:
+        """Все параметры сети одним массивом float32 (для передачи между процессами)"""
+        return np.concatenate([value.detach().cpu().numpy().ravel()
+                               for value in self.net.state_dict().values()]).astype(np.float32)
+    
+    def set_flat_weights(self, flat: np.ndarray):
+        """Загрузка параметров из массива get_flat_weights"""
+        state = self.net.state_dict()
+        offset = 0
+        for key, value in state.items():
+            count = value.numel()
+            state[key] = torch.from_numpy(flat[offset:offset + count].reshape(tuple(value.shape)))
+            offset += count
+        self.net.load_state_dict(state)
+
+
+def train_step(dqn: NeuralNetworkModel, target_net: NeuralNetworkModel, buffer: ReplayBuffer,
+               batch_size: int, gamma: float, epochs: int = 3) -> float:
+    """Шаг Deep Q-Learning на пакете из буфера воспроизведения; возвращает потерю"""
+    # Выборка из буфера воспроизведения (столбцы numpy, по индексам)
+    indices, batch, weights = buffer.sample(batch_size)
+    states, actions, rewards, next_states, dones = batch
+    
+    # Вычисляем целевые Q-значения
+    next_q_values = target_net.predict(next_states)
+    target_q = rewards + gamma * next_q_values.max(axis=1) * (~dones)
+    
+    # Предсказания текущей сети
+    current_q_values = dqn.predict(states)
+    
+    # Обновляем только Q-значения для выбранных действий
+    rows = np.arange(len(actions))
+    td_errors = target_q - current_q_values[rows, actions]
+    current_q_values[rows, actions] = target_q
+    
+    # Обучение сети (с весами важности в режиме приоритетов)
+    loss = dqn.train(states, current_q_values, epochs=epochs, weights=weights)
+    buffer.update_priorities(indices, td_errors)
+    return loss
+
+
+def soft_update(target_net: NeuralNetworkModel, source_net: NeuralNetworkModel, tau: float = 0.001):
+    """Мягкое обновление целевой сети: target = (1 - tau) * target + tau * source"""
+    target_params = target_net.net.state_dict()
+    source_params = source_net.net.state_dict()
+    for key in source_params:
+        target_params[key] = target_params[key] * (1 - tau) + source_params[key] * tau
+    target_net.net.load_state_dict(target_params)
 
 @dataclass
 class UltraLearningData:
     """Сверх-данные для ультра-обучения"""
     experiences: List[Dict] = field(default_factory=list)
     trajectories: List[List[Dict]] = field(default_factory=list)
-    q_table: Dict[str, Dict[str, float]] = field(default_factory=dict)
-    success_patterns: Dict[str, Dict] = field(default_factory=dict)
-    failure_patterns: Dict[str, Dict] = field(default_factory=dict)
+    q_table: QTable = field(default_factory=lambda: QTable(len(ACTION_MAP)))
+    success_patterns: Dict[PatternKey, Dict] = field(default_factory=dict)
+    failure_patterns: Dict[PatternKey, Dict] = field(default_factory=dict)
     
     # Метрики обучения
     learning_metrics: Dict[str, List[float]] = field(default_factory=lambda: {
@@ -81,29 +162,32 @@ class UltraLearningData:
         if len(self.trajectories) > 1000:
             self.trajectories = self.trajectories[-500:]
     
-    def update_q_value(self, state: str, action: str, value: float, alpha: float = 0.1):
-        """Обновление Q-значения с учетом скорости обучения"""
-        if state not in self.q_table:
-            self.q_table[state] = {}
-        
-        old_value = self.q_table[state].get(action, 0.0)
-        self.q_table[state][action] = old_value + alpha * (value - old_value)
+    def update_q_value(self, state: int, action: int, value: float, alpha: float = 0.1):
+        """Обновление Q-значения с учетом скорости обучения (код состояния, индекс действия)"""
+        self.q_table.update(state, action, value, alpha)
     
-    def get_best_action(self, state: str) -> Optional[str]:
-        """Получение лучшего действия для состояния"""
-        if state not in self.q_table or not self.q_table[state]:
-            return None
-        
-        return max(self.q_table[state].items(), key=lambda x: x[1])[0]
+    def get_best_action(self, state: int) -> Optional[int]:
+        """Получение индекса лучшего действия для состояния"""
+        best = int(self.q_table.best_actions([state])[0])
+        return best if best >= 0 else None
     
-    def get_action_value(self, state: str, action: str) -> float:
+    def get_action_value(self, state: int, action: int) -> float:
         """Получение значения действия для состояния"""
-        return self.q_table.get(state, {}).get(action, 0.0)
+        return self.q_table.get(state, action)
 
 class UltraLearningEngine:
     """Ультра-продвинутый движок обучения с реинфорсмент лернингом"""
     
-    def __init__(self, data_dir: str = "ultra_data", use_neural: bool = True):
+    REPLAY_CAPACITY = 10000
+    STATE_SIZE = 15
+    HIDDEN_SIZE = 128
+    ACTION_COUNT = 9
+    LAYER_SIZES = (STATE_SIZE, HIDDEN_SIZE, HIDDEN_SIZE // 2, ACTION_COUNT)
+    TARGET_TAU = 0.001  # Коэффициент мягкого обновления целевой сети
+    
+    def __init__(self, data_dir: str = "ultra_data", use_neural: bool = True,
+                 prioritized_replay: bool = False, background_training: bool = False,
+                 numpy_inference: bool = False):
         self.data_dir = Path(data_dir)
         self.data_dir.mkdir(exist_ok=True)
         
@@ -117,30 +201,41 @@ class UltraLearningEngine:
         self.epsilon_decay = 0.995
         self.epsilon_min = 0.05
         self.batch_size = 32
+        self.training_deferred = False  # Глубокое обучение отложено (бюджет времени)
         
         # Нейросеть для Deep Q-Learning
-        if use_neural and torch.cuda.is_available():
+        if use_neural and not TORCH_AVAILABLE:
+            print("⚠️ torch не установлен, нейросеть отключена")
+            use_neural = self.use_neural = False
+        
+        # Выбор действий прямым проходом на numpy; если сеть обучает отдельный
+        # процесс, torch в игровом процессе не загружается вовсе
+        self.dqn = None
+        self.target_net = None
+        self.policy = NumpyMLP(self.LAYER_SIZES) if use_neural and numpy_inference else None
+        torch_in_game = use_neural and not (self.policy is not None and background_training)
+        
+        if torch_in_game and torch.cuda.is_available():
             print("🎮 Используется CUDA для нейросетевого обучения")
             self.device = torch.device("cuda")
-        elif use_neural:
+        elif torch_in_game:
             print("💻 Используется CPU для нейросетевого обучения")
             self.device = torch.device("cpu")
+        elif use_neural:
+            print("💻 Нейросеть обучается в отдельном процессе, решения - на numpy")
+            self.device = None
         else:
             print("📊 Используется табличный Q-Learning")
             self.device = None
         
         if use_neural:
-            self.dqn = NeuralNetworkModel(input_size=15, hidden_size=128, output_size=9)
-            self.target_net = NeuralNetworkModel(input_size=15, hidden_size=128, output_size=9)
-            self.update_target_net()
-            self.replay_buffer = deque(maxlen=10000)
+            if torch_in_game:
+                self.build_networks()
+            self.replay_buffer = ReplayBuffer(self.REPLAY_CAPACITY, self.STATE_SIZE,
+                                              prioritized=prioritized_replay)
         
         # Маппинг действий к индексам
-        self.action_map = {
-            'farm': 0, 'gank': 1, 'jungle': 2, 'retreat': 3,
-            'patrol': 4, 'teamfight': 5, 'objective': 6, 
-            'defend': 7, 'push': 8
-        }
+        self.action_map = ACTION_MAP
         self.reverse_action_map = {v: k for k, v in self.action_map.items()}
         
         # Трекеры для адаптивного обучения
@@ -151,6 +246,11 @@ class UltraLearningEngine:
         # Загрузка предыдущих данных
         self.load_ultra_data()
         
+        # Обучение нейросети в отдельном процессе (игровой цикл только применяет веса)
+        self.trainer = None
+        if self.use_neural and background_training:
+            self.start_trainer(prioritized_replay)
+        
         # Автосохранение
         self.auto_save_thread(300)
         
@@ -160,7 +260,7 @@ class UltraLearningEngine:
     
     def state_to_vector(self, state: Dict) -> np.ndarray:
         """Преобразование состояния в вектор для нейросети"""
-        vector = np.zeros(15, dtype=np.float32)
+        vector = np.zeros(self.STATE_SIZE, dtype=np.float32)
         
         # Нормализованные признаки
         vector[0] = state.get('health', 100) / 100.0
@@ -282,29 +382,20 @@ class UltraLearningEngine:
         next_state = experience['next_state']
         done = experience['done']
         
-        # Получаем ключи состояний
-        state_key = self._create_state_key(state)
-        next_state_key = self._create_state_key(next_state)
-        
-        # Получаем текущее Q-значение
-        current_q = self.data.get_action_value(state_key, action)
-        
-        if done:
-            # Если эпизод закончен, Q-значение равно награде
-            target_q = reward
-        else:
-            # Иначе учитываем будущие награды
-            next_best_q = 0.0
-            best_next_action = self.data.get_best_action(next_state_key)
-            if best_next_action:
-                next_best_q = self.data.get_action_value(next_state_key, best_next_action)
+        # Коды состояний и индекс действия (строки и столбец Q-таблицы)
+        action_idx = self.action_map.get(action)
+        if action_idx is not None:
+            if done:
+                # Если эпизод закончен, Q-значение равно награде
+                target_q = reward
+            else:
+                # Иначе учитываем будущие награды
+                target_q = reward + self.gamma * self.data.q_table.max_value(encode_state(next_state))
             
-            target_q = reward + self.gamma * next_best_q
+            # Обновляем Q-таблицу
+            self.data.update_q_value(encode_state(state), action_idx, target_q, self.alpha)
         
-        # Обновляем Q-таблицу
-        self.data.update_q_value(state_key, action, target_q, self.alpha)
-        
-        # Для нейросетевого обучения добавляем в буфер воспроизведения
+        # Для нейросетевого обучения добавляем в буфер воспроизведения (или отдаем тренеру)
         if self.use_neural:
             state_vector = self.state_to_vector(state)
             next_state_vector = self.state_to_vector(next_state)
@@ -317,21 +408,27 @@ class UltraLearningEngine:
                 next_state_vector,
                 done
             )
-            self.replay_buffer.append(replay_experience)
+            if self.trainer is not None:
+                self.trainer.push(replay_experience)
+            else:
+                self.replay_buffer.append(replay_experience)
     
     def update_success_patterns(self, state: Dict, action: str, result: Dict, reward: float):
         """Обновление паттернов успеха и неудачи"""
-        state_key = self._create_state_key(state)
-        pattern_key = f"{state_key}_{action}"
+        state_code = encode_state(state)
+        pattern_key = (state_code, action)
         
         if reward > 5.0:  # Успешный паттерн
             if pattern_key not in self.data.success_patterns:
                 self.data.success_patterns[pattern_key] = {
+                    'state': state_code,
+                    'action': action,
                     'count': 0,
                     'total_reward': 0.0,
                     'avg_reward': 0.0,
                     'last_success': time.time()
                 }
+                self.pattern_index.add(pattern_key)
             
             pattern = self.data.success_patterns[pattern_key]
             pattern['count'] += 1
@@ -342,6 +439,8 @@ class UltraLearningEngine:
         elif reward < -5.0:  # Неудачный паттерн
             if pattern_key not in self.data.failure_patterns:
                 self.data.failure_patterns[pattern_key] = {
+                    'state': state_code,
+                    'action': action,
                     'count': 0,
                     'total_reward': 0.0,
                     'avg_reward': 0.0,
@@ -385,13 +484,11 @@ class UltraLearningEngine:
                 return action, confidence
             
             # Использование: выбираем лучшее действие
-            state_key = self._create_state_key(state)
-            
-            if self.use_neural and len(self.replay_buffer) >= self.batch_size:
-                # Используем нейросеть для оценки
+            if self.network_ready():
+                # Используем нейросеть для оценки (с последними весами тренера)
+                self.sync_weights()
                 state_vector = self.state_to_vector(state)
-                with torch.no_grad():
-                    q_values = self.dqn.predict(state_vector.reshape(1, -1))[0]
+                q_values = self.predict_q(state_vector.reshape(1, -1))[0]
                 
                 # Фильтруем только возможные действия
                 action_scores = {}
@@ -407,11 +504,13 @@ class UltraLearningEngine:
                     return best_action, confidence
             
             # Используем Q-таблицу
+            q_row = self.data.q_table.state_values(encode_state(state))
             best_action = None
             best_q = -float('inf')
             
             for action in possible_actions:
-                q_value = self.data.get_action_value(state_key, action)
+                action_idx = self.action_map.get(action)
+                q_value = float(q_row[action_idx]) if action_idx is not None else 0.0
                 if q_value > best_q:
                     best_q = q_value
                     best_action = action
@@ -428,44 +527,115 @@ class UltraLearningEngine:
             print(f"⚠️ Ошибка выбора ультра-действия: {e}")
             return random.choice(possible_actions), 0.3
     
+    def shrink_buffers(self):
+        """Урезать вдвое буфер воспроизведения (нехватка памяти; сохраняемые опыты не трогаются)"""
+        if self.use_neural:
+            self.replay_buffer.resize(max(self.batch_size, self.replay_buffer.capacity // 2))
+    
+    def restore_buffers(self):
+        """Вернуть полный размер буфера воспроизведения"""
+        if self.use_neural:
+            self.replay_buffer.resize(self.REPLAY_CAPACITY)
+    
+    def build_networks(self):
+        """Сети torch для обучения в игровом процессе (с весами numpy-политики, если есть)"""
+        self.dqn = NeuralNetworkModel(input_size=self.STATE_SIZE, hidden_size=self.HIDDEN_SIZE,
+                                      output_size=self.ACTION_COUNT)
+        self.target_net = NeuralNetworkModel(input_size=self.STATE_SIZE, hidden_size=self.HIDDEN_SIZE,
+                                             output_size=self.ACTION_COUNT)
+        if self.policy is not None and self.policy.ready:
+            self.dqn.set_flat_weights(self.policy.get_flat_weights())
+        self.update_target_net()
+    
+    def current_weights(self) -> Optional[np.ndarray]:
+        """Плоские веса сети, которой выбираются действия (None - еще нет)"""
+        if self.policy is not None and self.policy.ready:
+            return self.policy.get_flat_weights()
+        if self.dqn is not None:
+            return self.dqn.get_flat_weights()
+        return None
+    
+    def apply_weights(self, weights: np.ndarray):
+        """Новые веса для выбора действий (numpy-политика и/или сеть torch)"""
+        if self.policy is not None:
+            self.policy.load_flat(weights)
+        if self.dqn is not None:
+            self.dqn.set_flat_weights(weights)
+    
+    def predict_q(self, states: np.ndarray) -> np.ndarray:
+        """Q-значения для выбора действия"""
+        if self.policy is not None and self.policy.ready:
+            return self.policy.predict(states)
+        return self.dqn.predict(states)
+    
+    def start_trainer(self, prioritized_replay: bool = False):
+        """Запуск процесса-тренера с текущими весами сети"""
+        from trainer_process import TrainerProcess
+        try:
+            self.trainer = TrainerProcess(
+                self.STATE_SIZE, self.HIDDEN_SIZE, self.ACTION_COUNT,
+                NumpyMLP.weight_count(self.LAYER_SIZES),
+                batch_size=self.batch_size, gamma=self.gamma, prioritized=prioritized_replay,
+                replay_capacity=self.REPLAY_CAPACITY, target_tau=self.TARGET_TAU
+            )
+            self.trainer.start(self.current_weights())
+        except Exception as e:
+            print(f"⚠️ Ошибка запуска тренера, обучение в игровом потоке: {e}")
+            if self.trainer is not None:
+                self.trainer.stop()
+            self.trainer = None
+            if self.dqn is None:
+                self.build_networks()
+    
+    def stop_trainer(self):
+        """Остановка процесса-тренера (последние веса применяются)"""
+        if self.trainer is None:
+            return
+        trainer, self.trainer = self.trainer, None
+        weights = trainer.stop()
+        if weights is not None:
+            self.apply_weights(weights)
+    
+    def sync_weights(self) -> bool:
+        """Применить веса, опубликованные тренером (True - веса обновлены)"""
+        if self.trainer is None:
+            return False
+        weights = self.trainer.latest_weights()
+        if weights is None:
+            return False
+        self.apply_weights(weights)
+        loss = self.trainer.get_stats()['loss']
+        self.data.learning_metrics['loss'].append(loss)
+        return True
+    
+    def network_ready(self) -> bool:
+        """Достаточно ли обучена сеть, чтобы использовать ее для выбора действий"""
+        if not self.use_neural:
+            return False
+        if self.trainer is not None:
+            return self.trainer.get_stats()['steps'] > 0
+        return len(self.replay_buffer) >= self.batch_size
+    
     def deep_train(self):
         """Глубокое обучение нейросети на буфере воспроизведения"""
-        if not self.use_neural or len(self.replay_buffer) < self.batch_size:
+        if self.trainer is not None:
+            # Обучает процесс-тренер - здесь только применяются его веса
+            if not self.trainer.alive:
+                print("⚠️ Процесс-тренер остановился, обучение в игровом потоке")
+                self.stop_trainer()
+                if self.dqn is None:
+                    self.build_networks()
+            else:
+                self.sync_weights()
+                return
+        
+        if not self.use_neural or self.training_deferred or len(self.replay_buffer) < self.batch_size:
             return
         
         try:
-            # Выборка из буфера воспроизведения
-            batch = random.sample(self.replay_buffer, self.batch_size)
-            
-            states = np.zeros((self.batch_size, 15))
-            actions = np.zeros(self.batch_size, dtype=np.int64)
-            rewards = np.zeros(self.batch_size)
-            next_states = np.zeros((self.batch_size, 15))
-            dones = np.zeros(self.batch_size, dtype=np.bool_)
-            
-            for i, (state, action, reward, next_state, done) in enumerate(batch):
-                states[i] = state
-                actions[i] = action
-                rewards[i] = reward
-                next_states[i] = next_state
-                dones[i] = done
-            
-            # Вычисляем целевые Q-значения
-            with torch.no_grad():
-                next_q_values = self.target_net.predict(next_states)
-                max_next_q = np.max(next_q_values, axis=1)
-            
-            target_q = rewards + self.gamma * max_next_q * (~dones)
-            
-            # Предсказания текущей сети
-            current_q_values = self.dqn.predict(states)
-            
-            # Обновляем только Q-значения для выбранных действий
-            for i in range(self.batch_size):
-                current_q_values[i, actions[i]] = target_q[i]
-            
-            # Обучение сети
-            loss = self.dqn.train(states, current_q_values, epochs=3)
+            loss = train_step(self.dqn, self.target_net, self.replay_buffer, self.batch_size, self.gamma)
+            if self.policy is not None:
+                self.policy.load_flat(self.dqn.get_flat_weights())
             
             # Обновляем метрики
             self.data.learning_metrics['loss'].append(loss)
@@ -480,18 +650,11 @@ class UltraLearningEngine:
     
     def update_target_net(self):
         """Обновление целевой нейросети (soft update)"""
-        if not self.use_neural:
+        if self.target_net is None:
             return
         
         # Soft update: обновляем целевую сеть медленно
-        target_params = self.target_net.net.state_dict()
-        source_params = self.dqn.net.state_dict()
-        
-        tau = 0.001  # Коэффициент мягкого обновления
-        for key in source_params:
-            target_params[key] = target_params[key] * (1 - tau) + source_params[key] * tau
-        
-        self.target_net.net.load_state_dict(target_params)
+        soft_update(self.target_net, self.dqn, self.TARGET_TAU)
     
     def record_trajectory(self, trajectory: List[Dict]):
         """Запись полной траектории (последовательности состояний-действий)"""
@@ -506,60 +669,45 @@ class UltraLearningEngine:
             return
         
         # Вычисляем возвраты (returns) с конца траектории
+        codes, actions, targets = [], [], []
         returns = 0
         for i in range(len(trajectory) - 1, -1, -1):
             experience = trajectory[i]
             reward = experience.get('reward', 0)
             returns = reward + self.gamma * returns
             
-            # Обновляем Q-значение с учетом общего возврата
-            state = experience.get('state', {})
-            action = experience.get('action', '')
-            state_key = self._create_state_key(state)
-            self.data.update_q_value(state_key, action, returns, self.alpha * 0.5)
+            action_idx = self.action_map.get(experience.get('action', ''))
+            if action_idx is not None:
+                codes.append(encode_state(experience.get('state', {})))
+                actions.append(action_idx)
+                targets.append(returns)
+        
+        # Обновляем Q-значения с учетом общего возврата одним пакетом
+        if codes:
+            self.data.q_table.update_batch(codes, actions, targets, self.alpha * 0.5)
     
     def get_ultra_recommendations(self, state: Dict, top_n: int = 3) -> List[Dict]:
         """Получение ультра-рекомендаций с обоснованием"""
         recommendations = []
-        state_key = self._create_state_key(state)
         
         # Анализируем успешные паттерны для похожих состояний
-        similar_patterns = self.find_similar_patterns(state_key)
+        similar_patterns = self.find_similar_patterns(encode_state(state), top_n=top_n)
         
-        for pattern_key, pattern_data in similar_patterns[:top_n]:
-            parts = pattern_key.split('_')
-            if len(parts) >= 2:
-                action = parts[-1]  # Последняя часть - действие
-                state_part = '_'.join(parts[:-1])
-                
-                recommendations.append({
-                    'action': action,
-                    'confidence': pattern_data.get('avg_reward', 0) / 10.0,
-                    'success_rate': pattern_data.get('count', 0) / max(pattern_data.get('count', 1), 1),
-                    'reason': f"Успешный паттерн: {pattern_data.get('count', 0)} успехов",
-                    'avg_reward': pattern_data.get('avg_reward', 0)
-                })
+        for pattern_key, pattern_data in similar_patterns:
+            recommendations.append({
+                'action': pattern_data['action'],
+                'confidence': pattern_data.get('avg_reward', 0) / 10.0,
+                'success_rate': pattern_data.get('count', 0) / max(pattern_data.get('count', 1), 1),
+                'reason': f"Успешный паттерн: {pattern_data.get('count', 0)} успехов",
+                'avg_reward': pattern_data.get('avg_reward', 0)
+            })
         
         return sorted(recommendations, key=lambda x: x['confidence'], reverse=True)
     
-    def find_similar_patterns(self, state_key: str, threshold: float = 0.7) -> List[Tuple[str, Dict]]:
-        """Поиск похожих паттернов"""
-        similar = []
-        state_parts = state_key.split('_')
-        
-        for pattern_key, pattern_data in self.data.success_patterns.items():
-            pattern_parts = pattern_key.split('_')
-            
-            # Простая метрика схожести
-            common_parts = len(set(state_parts) & set(pattern_parts[:-1]))
-            similarity = common_parts / max(len(set(state_parts)), len(set(pattern_parts[:-1])))
-            
-            if similarity >= threshold:
-                similar.append((pattern_key, pattern_data))
-        
-        # Сортируем по успешности
-        similar.sort(key=lambda x: x[1].get('avg_reward', 0), reverse=True)
-        return similar
+    def find_similar_patterns(self, state_code: int, threshold: float = 0.7,
+                              top_n: Optional[int] = None) -> List[Tuple[PatternKey, Dict]]:
+        """Поиск похожих паттернов по индексу (лучшие по награде - первыми)"""
+        return self.pattern_index.top(state_code, self.data.success_patterns, top_n, threshold)
     
     def save_ultra_data(self, filename: str = None):
         """Сохранение ультра-данных обучения"""
@@ -581,9 +729,11 @@ class UltraLearningEngine:
                 pickle.dump(data_to_save, f)
             
             # Сохраняем нейросети
-            if self.use_neural:
+            if self.dqn is not None:
                 torch.save(self.dqn.net.state_dict(), self.data_dir / "dqn_model.pth")
                 torch.save(self.target_net.net.state_dict(), self.data_dir / "target_model.pth")
+            if self.policy is not None and self.policy.ready:
+                self.policy.save(str(self.data_dir / "dqn_weights.npz"))
             
             print(f"💾 Ультра-данные сохранены в {filename}")
             
@@ -605,12 +755,23 @@ class UltraLearningEngine:
                 loaded_data = pickle.load(f)
             
             self.data = loaded_data.get('data', UltraLearningData())
+            # Паттерны старого формата (ключ-строка "<состояние>_<действие>") - в записи
+            self.data.success_patterns = convert_patterns(self.data.success_patterns)
+            self.data.failure_patterns = convert_patterns(self.data.failure_patterns)
+            if isinstance(self.data.q_table, dict):
+                # Старый формат: словари со строковыми ключами
+                self.data.q_table = QTable.from_dict(self.data.q_table, self.action_map)
+                print(f"🔁 Q-таблица перенесена в массив: {len(self.data.q_table)} значений")
             self.epsilon = loaded_data.get('epsilon', 0.3)
             self.recent_rewards = deque(loaded_data.get('recent_rewards', []), maxlen=100)
             self.exploration_history = loaded_data.get('exploration_history', [])
             
+            # Веса numpy-политики (без torch)
+            if self.policy is not None and self.policy.load(str(self.data_dir / "dqn_weights.npz")):
+                print("🧠 Веса политики загружены")
+            
             # Загружаем нейросети
-            if self.use_neural:
+            if self.dqn is not None:
                 dqn_path = self.data_dir / "dqn_model.pth"
                 target_path = self.data_dir / "target_model.pth"
                 
@@ -631,6 +792,9 @@ class UltraLearningEngine:
             print(f"⚠️ Ошибка загрузки ультра-данных: {e}")
             print("🔄 Начинаем с нуля")
             self.data = UltraLearningData()
+        finally:
+            # Индекс строится по загруженным паттернам (старый указывал бы на прежние ключи)
+            self.pattern_index = PatternIndex(self.data.success_patterns)
     
     def auto_save_thread(self, interval: int = 300):
         """Автосохранение данных"""
@@ -658,12 +822,18 @@ class UltraLearningEngine:
         print(f"   Исследование (epsilon): {self.epsilon:.3f}")
         print(f"   Опытов: {len(self.data.experiences)}")
         print(f"   Успешных паттернов: {len(self.data.success_patterns)}")
-        print(f"   Q-записей: {sum(len(v) for v in self.data.q_table.values())}")
+        print(f"   Q-записей: {len(self.data.q_table)} ({self.data.q_table.state_count} состояний)")
         
         if self.data.learning_metrics.get('loss'):
             avg_loss = np.mean(self.data.learning_metrics['loss'][-10:])
             print(f"   Потеря нейросети: {avg_loss:.4f}")
         
+        if self.trainer is not None:
+            trainer = self.trainer.get_stats()
+            print(f"   Тренер: шагов {trainer['steps']}, веса v{trainer['version']}, "
+                  f"в очереди {trainer['queued']}, отброшено {trainer['dropped']}"
+                  f"{' (не успевает)' if trainer['behind'] else ''}")
+        
         # Рекомендации для текущего состояния
         if self.data.success_patterns:
             top_patterns = sorted(
@@ -673,24 +843,17 @@ class UltraLearningEngine:
             )[:3]
             
             print(f"\n🏆 ТОП-3 паттерна:")
-            for i, (pattern, data) in enumerate(top_patterns, 1):
-                print(f"   {i}. {pattern}: награда={data.get('avg_reward', 0):.1f}, "
+            for i, (_, data) in enumerate(top_patterns, 1):
+                print(f"   {i}. {state_key(data['state'])} -> {data['action']}: награда={data.get('avg_reward', 0):.1f}, "
                       f"попыток={data.get('count', 0)}")
     
     def _create_state_key(self, state: Dict) -> str:
-        """Создание ключа состояния"""
-        key_parts = [
-            f"h{int(state.get('health', 0))}",
-            f"l{state.get('level', 1)}",
-            f"e{state.get('enemies_nearby', 0)}",
-            f"c{state.get('creeps_nearby', 0)}",
-            f"j{state.get('jungle_creeps_nearby', 0)}",
-            f"s{int(state.get('safety_score', 1.0) * 10)}",
-            f"g{int(state.get('gold', 0) / 100)}",
-            f"p{state.get('phase', 'early')[:1]}",
-            f"pos{state.get('position', 'unknown')[:3]}"
-        ]
-        return "_".join(key_parts)
+        """Строковый ключ состояния (паттерны и отладка; Q-таблица хранится по коду)"""
+        return state_key(encode_state(state))
+    
+    def q_table_view(self) -> Dict[str, Dict[str, float]]:
+        """Q-таблица в виде словарей со строковыми ключами (для отладки)"""
+        return self.data.q_table.debug_view(self.reverse_action_map)
     
     def get_learning_insights(self) -> Dict:
         """Получение инсайтов обучения"""
@@ -741,51 +904,58 @@ class UltraLearningEngine:
 def integrate_ultra_learning(bot_core_instance):
     """Интеграция ультра-обучения с основным ботом"""
     
-    # Инициализация ультра-движка
-    ultra_engine = UltraLearningEngine(data_dir="ultra_learning_data", use_neural=True)
+    # Ультра-движок бота (если он уже создан) - второй экземпляр запустил бы
+    # свой процесс-тренер и автосохранение в те же файлы
+    ultra_engine = getattr(bot_core_instance, 'learning_engine', None)
+    if not isinstance(ultra_engine, UltraLearningEngine):
+        ultra_engine = UltraLearningEngine(
+            data_dir="ultra_learning_data", use_neural=True,
+            prioritized_replay=bot_core_instance.config.get('prioritized_replay', False),
+            background_training=bot_core_instance.config.get('background_training', False),
+            numpy_inference=bot_core_instance.config.get('numpy_inference', False)
+        )
     
-    # Модификация метода game_cycle
-    original_game_cycle = bot_core_instance.game_cycle
+    # Модификация метода act_on_decision (общий для game_cycle и конвейера)
+    original_act_on_decision = bot_core_instance.act_on_decision
     
-    def ultra_game_cycle():
-        # Сохраняем исходное состояние
+    def ultra_act_on_decision(action, action_details, cycle_start=None, stages=None):
+        # Сохраняем состояние, по которому принято решение
         initial_state = bot_core_instance.state.__dict__.copy()
         
-        # Выполняем обычный цикл
-        result = original_game_cycle()
+        # Выполняем действие и обычное завершение цикла
+        result = original_act_on_decision(action, action_details, cycle_start, stages)
         
         # Получаем новое состояние
         new_state = bot_core_instance.state.__dict__.copy()
         
         # Записываем ультра-опыт
-        if hasattr(bot_core_instance, 'last_action'):
-            reward = ultra_engine.record_ultra_experience(
+        reward = ultra_engine.record_ultra_experience(
+            state=initial_state,
+            action=action,
+            result=result,
+            next_state=new_state,
+            context={
+                'phase': bot_core_instance.state.phase,
+                'position': bot_core_instance.state.map_position
+            }
+        )
+        
+        # Адаптивный выбор действий на основе обучения
+        if random.random() < 0.3:  # 30% chance to use ultra learning
+            possible_actions = ['farm', 'gank', 'jungle', 'retreat', 'patrol']
+            ultra_action, confidence = ultra_engine.select_ultra_action(
                 state=initial_state,
-                action=bot_core_instance.last_action,
-                result=result,
-                next_state=new_state,
-                context={
-                    'phase': bot_core_instance.state.phase,
-                    'position': bot_core_instance.state.map_position
-                }
+                possible_actions=possible_actions
             )
             
-            # Адаптивный выбор действий на основе обучения
-            if random.random() < 0.3:  # 30% chance to use ultra learning
-                possible_actions = ['farm', 'gank', 'jungle', 'retreat', 'patrol']
-                ultra_action, confidence = ultra_engine.select_ultra_action(
-                    state=initial_state,
-                    possible_actions=possible_actions
-                )
-                
-                if confidence > 0.6:
-                    bot_core_instance.last_action = ultra_action
-                    print(f"🎯 УЛЬТРА-ВЫБОР: {ultra_action} (уверенность: {confidence:.1%})")
+            if confidence > 0.6:
+                bot_core_instance.last_action = ultra_action
+                print(f"🎯 УЛЬТРА-ВЫБОР: {ultra_action} (уверенность: {confidence:.1%})")
         
         return result
     
     # Заменяем метод
-    bot_core_instance.game_cycle = ultra_game_cycle
+    bot_core_instance.act_on_decision = ultra_act_on_decision
     
     # Добавляем ультра-движок в экземпляр
     bot_core_instance.ultra_engine = ultra_engine
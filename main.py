@@ -5,20 +5,35 @@
 import os
 import sys
 
+from lazy_import import module_available, print_import_report, timed_import
+
+# Пакет pip -> имя модуля
+REQUIRED_PACKAGES = {
+    'opencv-python': 'cv2',
+    'numpy': 'numpy',
+    'pyautogui': 'pyautogui',
+    'keyboard': 'keyboard',
+}
+
+# Модули в порядке зависимостей: время каждого - без уже загруженных
+STARTUP_MODULES = [
+    'numpy',
+    'cv2',
+    'config',
+    'utils',
+    'game_state',
+    'vision_engine',
+    'input_controller',
+    'combo_system',
+    'decision_maker',
+    'bot_core',
+]
+
 def check_dependencies():
-    """Проверка зависимостей"""
-    required_packages = [
-        'opencv-python',
-        'numpy',
-        'pyautogui',
-        'keyboard',
-    ]
-    
+    """Проверка зависимостей (без импорта самих пакетов)"""
     missing_packages = []
-    for package in required_packages:
-        try:
-            __import__(package.replace('-', '_'))
-        except ImportError:
+    for package, module in REQUIRED_PACKAGES.items():
+        if not module_available(module):
             missing_packages.append(package)
     
     return missing_packages
@@ -130,6 +145,9 @@ def main():
     
     # Запуск бота
     try:
+        for module in STARTUP_MODULES:
+            timed_import(module)
+        print_import_report()
         from bot_core import HayabusaBot
         
         print("\n" + "="*60)
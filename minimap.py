@@ -0,0 +1,234 @@
+"""
+Мини-карта: позиция героя и врагов в координатах карты
+"""
+
+import math
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from color_lut import ColorLUT
+from config import HSV_COLORS
+
+Point = Tuple[float, float]
+
+MINIMAP_CLASSES = ('minimap_ally', 'minimap_enemy', 'minimap_objective')
+
+
+class MinimapTracker:
+    """Сетка занятости мини-карты с пошаговым обновлением
+
+    Мини-карта делится на клетки; для каждой клетки и класса (союзник, враг,
+    объектив) хранятся число пикселей и суммы их координат. Каждый кадр
+    пересчитываются только клетки, где пиксели изменились с прошлого кадра.
+    Метки собираются из сетки: группы соседних клеток дают центр метки.
+    Координаты карты нормированы в 0-1 (x вправо, y вниз), своя база -
+    в левом нижнем углу, как на мини-карте MLBB.
+    """
+
+    ALLY_BASE = (0.0, 1.0)
+    BASE_RADIUS = 0.15        # вокруг своей базы
+    RIVER_WIDTH = 0.06        # река - диагональ x = y
+    LANE_WIDTH = 0.1          # линии - края карты и диагональ x + y = 1
+    DANGER_RADIUS = 0.25      # радиус учета врагов в enemy_density
+
+    def __init__(self, cell_size: int = 8, min_pixels: int = 3, diff_threshold: int = 10):
+        self.cell_size = max(1, cell_size)
+        self.min_pixels = min_pixels
+        self.diff_threshold = diff_threshold
+        self.lut = ColorLUT({name: HSV_COLORS[name] for name in MINIMAP_CLASSES})
+        self.class_bits = np.array([self.lut.bits[name] for name in MINIMAP_CLASSES],
+                                   dtype=self.lut.dtype)[:, None, None]
+
+        self.previous: Optional[np.ndarray] = None
+        self.counts: Optional[np.ndarray] = None   # (клетки y, клетки x, класс)
+        self.sums_x: Optional[np.ndarray] = None
+        self.sums_y: Optional[np.ndarray] = None
+        self.rows: Optional[np.ndarray] = None      # индикатор строк пикселей по клеткам
+        self.columns: Optional[np.ndarray] = None   # индикатор столбцов пикселей по клеткам
+        self.rows_y: Optional[np.ndarray] = None
+        self.columns_x: Optional[np.ndarray] = None
+        self.size = (0, 0)
+
+        self.hero: Optional[Point] = None
+        self.last_estimate: Optional[Dict] = None
+        self._markers: Dict[str, List[Tuple[Point, int]]] = {}
+        self.stats = {'frames': 0, 'full_updates': 0, 'cells_updated': 0}
+
+    def reset(self):
+        """Сбросить сетку (следующий кадр пересчитывается целиком)"""
+        self.previous = None
+        self.counts = None
+        self.hero = None
+        self.last_estimate = None
+        self._markers.clear()
+
+    def update(self, image: np.ndarray, hsv: np.ndarray) -> Dict:
+        """Обновить сетку по кадру мини-карты (BGR и HSV) и вернуть оценку"""
+        self.stats['frames'] += 1
+        h, w = image.shape[:2]
+        if h == 0 or w == 0:
+            return {'position': 'unknown'}
+
+        if self.counts is None or self.previous is None or self.previous.shape != image.shape:
+            self.allocate(w, h)
+            self._markers.clear()
+            self.update_cells(hsv, 0, 0, self.counts.shape[1], self.counts.shape[0])
+            self.stats['full_updates'] += 1
+        else:
+            changed = self.changed_cells(image)
+            if not changed and self.last_estimate is not None:
+                return self.last_estimate
+            for cells in changed:
+                self.update_cells(hsv, *cells)
+        self.previous = image.copy()
+
+        self.last_estimate = self.estimate()
+        return self.last_estimate
+
+    def allocate(self, width: int, height: int):
+        """Пустая сетка и матрицы сложения пикселей по клеткам"""
+        cell = self.cell_size
+        grid_h, grid_w = -(-height // cell), -(-width // cell)
+        shape = (grid_h, grid_w, len(MINIMAP_CLASSES))
+        self.counts = np.zeros(shape, dtype=np.float32)
+        self.sums_x = np.zeros(shape, dtype=np.float32)
+        self.sums_y = np.zeros(shape, dtype=np.float32)
+        self.size = (width, height)
+
+        # rows @ mask @ columns - суммы маски по клеткам; с весами x и y - моменты
+        xs = np.arange(width, dtype=np.float32)
+        ys = np.arange(height, dtype=np.float32)
+        self.columns = (xs[:, None] // cell == np.arange(grid_w)).astype(np.float32)
+        self.rows = (ys[None, :] // cell == np.arange(grid_h)[:, None]).astype(np.float32)
+        self.columns_x = self.columns * xs[:, None]
+        self.rows_y = self.rows * ys[None, :]
+
+    def changed_cells(self, image: np.ndarray) -> List[Tuple[int, int, int, int]]:
+        """Рамки групп клеток с изменившимися пикселями (x0, y0, x1, y1)"""
+        diff = cv2.absdiff(image, self.previous).reshape(image.shape[0], -1)
+        _, changed = cv2.threshold(diff, self.diff_threshold, 1, cv2.THRESH_BINARY)
+        if not cv2.countNonZero(changed):
+            return []
+
+        # Число изменившихся значений в клетке (с каналами) по интегральному изображению
+        height, width = changed.shape
+        grid_h, grid_w = self.counts.shape[:2]
+        channels = width // image.shape[1]
+        cell = self.cell_size
+        corners_y = np.minimum(np.arange(grid_h + 1) * cell, height)
+        corners_x = np.minimum(np.arange(grid_w + 1) * cell * channels, width)
+        totals = cv2.integral(changed)[np.ix_(corners_y, corners_x)]
+        per_cell = totals[1:, 1:] - totals[:-1, 1:] - totals[1:, :-1] + totals[:-1, :-1]
+        cells = (per_cell > 0).astype(np.uint8)
+
+        count, _, stats, _ = cv2.connectedComponentsWithStats(cells, connectivity=8)
+        return [(x, y, x + w, y + h) for x, y, w, h, _ in stats[1:count].tolist()]
+
+    def update_cells(self, hsv: np.ndarray, cx0: int, cy0: int, cx1: int, cy1: int):
+        """Пересчитать клетки в рамке по меткам классов"""
+        cell = self.cell_size
+        x0, y0 = cx0 * cell, cy0 * cell
+        labels = self.lut.label(hsv[y0:cy1 * cell, x0:cx1 * cell])
+        h, w = labels.shape
+        width = cx1 - cx0
+
+        # Маски всех классов одной матрицей (класс x строка, столбец)
+        masks = ((labels[None] & self.class_bits) != 0).astype(np.float32).reshape(-1, w)
+        columns = np.hstack([self.columns[x0:x0 + w, cx0:cx1], self.columns_x[x0:x0 + w, cx0:cx1]])
+        per_column = (masks @ columns).reshape(len(MINIMAP_CLASSES), h, 2 * width)
+        per_cell = self.rows[cy0:cy1, y0:y0 + h] @ per_column
+        per_cell_y = self.rows_y[cy0:cy1, y0:y0 + h] @ per_column[:, :, :width]
+
+        updated = (per_cell[:, :, :width], per_cell[:, :, width:], per_cell_y)
+        for grid, values in zip((self.counts, self.sums_x, self.sums_y), updated):
+            values = values.transpose(1, 2, 0)
+            block = grid[cy0:cy1, cx0:cx1]
+            # Метки пересобираются только для классов, чьи клетки изменились
+            for index in np.flatnonzero((block != values).any(axis=(0, 1))):
+                self._markers.pop(MINIMAP_CLASSES[index], None)
+            block[:] = values
+        self.stats['cells_updated'] += (cx1 - cx0) * (cy1 - cy0)
+
+    def markers(self, name: str) -> List[Tuple[Point, int]]:
+        """Метки класса: (центр в координатах карты, число пикселей)"""
+        if name not in self._markers:
+            self._markers[name] = self.find_markers(name)
+        return self._markers[name]
+
+    def find_markers(self, name: str) -> List[Tuple[Point, int]]:
+        """Сборка меток класса из групп соседних занятых клеток"""
+        index = MINIMAP_CLASSES.index(name)
+        counts = self.counts[:, :, index]
+        occupied = (counts > 0).astype(np.uint8)
+        groups, group_map = cv2.connectedComponents(occupied, connectivity=8)
+        if groups <= 1:
+            return []
+
+        # Суммы по группам соседних клеток
+        group_map = group_map.ravel()
+        pixels = np.bincount(group_map, counts.ravel(), groups)
+        sums_x = np.bincount(group_map, self.sums_x[:, :, index].ravel(), groups)
+        sums_y = np.bincount(group_map, self.sums_y[:, :, index].ravel(), groups)
+
+        width, height = self.size
+        found = []
+        for group in range(1, groups):
+            if pixels[group] < self.min_pixels:
+                continue
+            x = sums_x[group] / pixels[group]
+            y = sums_y[group] / pixels[group]
+            found.append(((float((x + 0.5) / width), float((y + 0.5) / height)), int(pixels[group])))
+        return found
+
+    def estimate(self) -> Dict:
+        """Позиция героя, враги, расстояние до объектива и плотность врагов"""
+        allies = self.markers('minimap_ally')
+        if allies:
+            if self.hero is not None:
+                # Своя метка - ближайшая к прошлой позиции
+                self.hero = min(allies, key=lambda marker: math.dist(marker[0], self.hero))[0]
+            else:
+                self.hero = max(allies, key=lambda marker: marker[1])[0]
+
+        enemies = [point for point, _ in self.markers('minimap_enemy')]
+        objectives = [point for point, _ in self.markers('minimap_objective')]
+
+        nearest_objective = None
+        enemy_density = 0.0
+        if self.hero is not None:
+            if objectives:
+                nearest_objective = min(math.dist(self.hero, point) for point in objectives)
+            for point in enemies:
+                enemy_density += max(0.0, 1.0 - math.dist(self.hero, point) / self.DANGER_RADIUS)
+
+        return {
+            'position': self.classify(self.hero),
+            'hero': self.hero,
+            'enemies': enemies,
+            'objectives': objectives,
+            'nearest_objective': nearest_objective,
+            'enemy_density': enemy_density,
+        }
+
+    def classify(self, point: Optional[Point]) -> str:
+        """Зона карты для точки: 'base', 'river', 'jungle', 'ally_territory', 'enemy_territory'"""
+        if point is None:
+            return 'unknown'
+        x, y = point
+        if math.dist(point, self.ALLY_BASE) < self.BASE_RADIUS:
+            return 'base'
+        if abs(x - y) < self.RIVER_WIDTH:
+            return 'river'
+
+        on_lane = (min(x, y, 1.0 - x, 1.0 - y) < self.LANE_WIDTH
+                   or abs(x + y - 1.0) < self.LANE_WIDTH)
+        if not on_lane:
+            return 'jungle'
+        # Своя половина карты - ниже диагонали x = y
+        return 'ally_territory' if y > x else 'enemy_territory'
+
+    def get_stats(self) -> Dict[str, int]:
+        """Статистика обновлений"""
+        return dict(self.stats)
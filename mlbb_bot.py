@@ -11,25 +11,47 @@
 
 import cv2
 import numpy as np
-import pyautogui
 import time
 import random
-import keyboard
 import os
 import math
 import json
 import threading
-import requests
 from collections import deque, defaultdict
 from dataclasses import dataclass, asdict
 from typing import Tuple, List, Dict, Optional, Any
 from datetime import datetime, timedelta
 import queue
 import pickle
-from bs4 import BeautifulSoup
 import re
-import pytesseract
-from sklearn.cluster import KMeans
+from capture_backend import RegionCaptureBackend, collect_regions
+from config import BOT_CONFIG, SCREEN_PROFILES
+from template_matcher import SkillCooldownDetector, TemplateCache, skill_indicators_region
+from digit_ocr import DigitOCR
+from minimap import MinimapTracker
+from lazy_import import LazyModule
+from utils import get_screen_size
+
+# PyAutoGUI и keyboard требуют дисплей/права (без них - только анализ кадров)
+try:
+    import pyautogui
+    PYAUTOGUI_AVAILABLE = True
+except Exception:
+    pyautogui = None
+    PYAUTOGUI_AVAILABLE = False
+
+try:
+    import keyboard
+    KEYBOARD_AVAILABLE = True
+except Exception:
+    keyboard = None
+    KEYBOARD_AVAILABLE = False
+
+# Тяжелые и необязательные зависимости загружаются при первом обращении
+requests = LazyModule('requests')
+bs4 = LazyModule('bs4')
+pytesseract = LazyModule('pytesseract')
+sklearn_cluster = LazyModule('sklearn.cluster')
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -37,8 +59,14 @@ warnings.filterwarnings('ignore')
 os.environ['OPENCV_FFMPEG_CAPTURE_OPTIONS'] = 'protocol_whitelist;file,rtp,udp'
 
 # НАСТРОЙКИ
-pyautogui.FAILSAFE = True
-pyautogui.PAUSE = 0.05
+if PYAUTOGUI_AVAILABLE:
+    pyautogui.FAILSAFE = True
+    pyautogui.PAUSE = 0.05
+
+
+def key_pressed(key: str) -> bool:
+    """Нажата ли клавиша (False без модуля keyboard)"""
+    return KEYBOARD_AVAILABLE and keyboard.is_pressed(key)
 
 @dataclass
 class GameObject:
@@ -50,6 +78,7 @@ class GameObject:
     health: float = 100.0
     is_enemy: bool = False
     distance: float = 0.0
+    bbox: Optional[Tuple[int, int, int, int]] = None  # x, y, w, h на экране
 
 @dataclass
 class GameState:
@@ -370,12 +399,18 @@ class HayabusaVisionBot:
         self.successful_combos = {}
         
         # 🧠 УЛУЧШЕННАЯ ИИ МОДЕЛЬ
-        self.template_cache = {}
+        self.template_cache = TemplateCache(
+            BOT_CONFIG['templates_dir'],
+            BOT_CONFIG['template_base_resolution'],
+            BOT_CONFIG['template_cache_size']
+        )
+        self.template_cache.prescale(BOT_CONFIG['skill_templates'].values(), SCREEN_PROFILES)
         self.vision_enabled = True
         self.auto_calibrate = True
         
         # 📊 СОСТОЯНИЕ И СТАТИСТИКА
         self.state = GameState()
+        self.last_level = self.state.my_level
         self.last_screenshot = None
         self.last_analysis = None
         
@@ -413,7 +448,7 @@ class HayabusaVisionBot:
         """🎮 АВТОМАТИЧЕСКАЯ КАЛИБРОВКА КООРДИНАТ"""
         print("🎮 Начинаю автоматическую калибровку...")
         
-        screen_width, screen_height = pyautogui.size()
+        screen_width, screen_height = get_screen_size()
         
         # Стандартные координаты для разных разрешений
         resolution_profiles = {
@@ -466,10 +501,10 @@ class HayabusaVisionBot:
         print(f"   Джойстик: {self.joystick_center}")
         print(f"   Атака: {self.attack_button}")
     
-    def init_improved_vision(self):
+    def init_improved_vision(self, screen_size=None):
         """👁️ ИНИЦИАЛИЗАЦИЯ УЛУЧШЕННОГО ВИДЕНИЯ"""
         # 📍 ОБЛАСТИ ЭКРАНА ДЛЯ АНАЛИЗА
-        screen_width, screen_height = pyautogui.size()
+        screen_width, screen_height = screen_size or get_screen_size()
         
         self.screen_regions = {
             'minimap': (20, 20, 200, 200),
@@ -478,7 +513,9 @@ class HayabusaVisionBot:
             'gold_display': (screen_width - 200, 30, 150, 30),
             'level_display': (screen_width - 300, 30, 80, 30),
             'center_screen': (screen_width//2 - 200, screen_height//2 - 200, 400, 400),
-            'skill_indicators': (int(screen_width*0.75), int(screen_height*0.85), 200, 100),
+            'skill_indicators': skill_indicators_region(
+                self.skill_buttons, (screen_width, screen_height), int(screen_height * 0.065)
+            ),
             'jungle_areas': [
                 (int(screen_width*0.3), int(screen_height*0.3), 150, 150),  # Верхний лес
                 (int(screen_width*0.7), int(screen_height*0.3), 150, 150),  # Верхний вражеский
@@ -500,6 +537,33 @@ class HayabusaVisionBot:
             'base_blue': [(120, 60, 0), (180, 100, 50)],
         }
         
+        # ⚡ ГОТОВНОСТЬ СКИЛЛОВ ПО ШАБЛОНАМ ИКОНОК
+        best_res = min(SCREEN_PROFILES.keys(),
+                       key=lambda r: abs(r[0] - screen_width) + abs(r[1] - screen_height))
+        rx, ry = self.screen_regions['skill_indicators'][:2]
+        self.skill_detector = SkillCooldownDetector(
+            self.template_cache,
+            BOT_CONFIG['skill_templates'],
+            best_res,
+            threshold=BOT_CONFIG['skill_match_threshold'],
+            expected_centers={name: (x - rx, y - ry) for name, (x, y) in self.skill_buttons.items()}
+        )
+        
+        # 🔢 ЗОЛОТО И УРОВЕНЬ С ЭКРАНА
+        self.digit_reader = DigitOCR(
+            BOT_CONFIG['glyph_atlas_path'],
+            tesseract_fallback=BOT_CONFIG['ocr_tesseract_fallback']
+        )
+        
+        # 🗺️ ПОЗИЦИЯ НА МИНИ-КАРТЕ
+        self.minimap = MinimapTracker()
+        
+        # 📸 ЗАХВАТ ТОЛЬКО АНАЛИЗИРУЕМЫХ ОБЛАСТЕЙ
+        self.capture_backend = RegionCaptureBackend(
+            collect_regions(self.screen_regions),
+            (screen_width, screen_height)
+        )
+        
         print(f"👁️ Улучшенное зрение инициализировано")
         print(f"   Областей: {len(self.screen_regions)}")
         print(f"   Цветов: {len(self.colors)}")
@@ -818,7 +882,7 @@ class HayabusaVisionBot:
         jungle_route = self.get_safe_jungle_route()
         
         for point in jungle_route:
-            if keyboard.is_pressed('esc'):
+            if key_pressed('esc'):
                 break
             
             print(f"📍 Иду к точке: {point['name']}")
@@ -1005,7 +1069,7 @@ class HayabusaVisionBot:
             self.state.my_level >= 4,
             self.state.enemies_nearby > 0,
             self.state.enemies_nearby <= 2,  # Не гангать против 3+
-            self.state.map_position in ["lane_center", "lane_border"],
+            self.state.map_position in ["ally_territory", "enemy_territory"],  # на линии
             time.time() - self.last_gank_time > self.gank_cooldown
         ]
         
@@ -1081,7 +1145,7 @@ class HayabusaVisionBot:
         ]
         
         for angle, description, force in safe_route:
-            if keyboard.is_pressed('esc'):
+            if key_pressed('esc'):
                 break
             
             print(f"  {description}")
@@ -1209,6 +1273,7 @@ class HayabusaVisionBot:
                 obj_x, obj_y = self.get_contour_center(contour)
                 center_x = x + obj_x
                 center_y = y + obj_y
+                bx, by, bw, bh = cv2.boundingRect(contour)
                 
                 objects.append(GameObject(
                     type='hero',
@@ -1216,7 +1281,8 @@ class HayabusaVisionBot:
                     confidence=0.85,
                     timestamp=time.time(),
                     health=random.randint(50, 100),
-                    is_enemy=True
+                    is_enemy=True,
+                    bbox=(x + bx, y + by, bw, bh)
                 ))
             
             # Поиск крипов (желтый)
@@ -1227,6 +1293,7 @@ class HayabusaVisionBot:
                 obj_x, obj_y = self.get_contour_center(contour)
                 center_x = x + obj_x
                 center_y = y + obj_y
+                bx, by, bw, bh = cv2.boundingRect(contour)
                 
                 objects.append(GameObject(
                     type='creep',
@@ -1234,7 +1301,8 @@ class HayabusaVisionBot:
                     confidence=0.75,
                     timestamp=time.time(),
                     health=random.randint(40, 100),
-                    is_enemy=random.random() > 0.3
+                    is_enemy=random.random() > 0.3,
+                    bbox=(x + bx, y + by, bw, bh)
                 ))
             
         except Exception as e:
@@ -1260,21 +1328,74 @@ class HayabusaVisionBot:
         return cX, cY
     
     def remove_duplicate_objects(self, objects, threshold=50):
-        """🗑️ УДАЛЕНИЕ ДУБЛИКАТОВ ОБЪЕКТОВ"""
-        unique_objects = []
+        """🗑️ УДАЛЕНИЕ ДУБЛИКАТОВ ОБЪЕКТОВ (сетка с ячейкой threshold)
+        
+        Каждая детекция сравнивается только с группами своего типа в
+        соседних 3x3 ячейках, дубликаты сливаются в одну группу.
+        """
+        grid = defaultdict(list)  # (тип, ячейка x, ячейка y) -> индексы групп
+        groups = []  # [якорная позиция, детекции]
+        threshold_sq = threshold * threshold
         
         for obj in objects:
-            is_duplicate = False
-            for unique_obj in unique_objects:
-                distance = self.calculate_distance(obj.position, unique_obj.position)
-                if distance < threshold and obj.type == unique_obj.type:
-                    is_duplicate = True
-                    break
+            cell_x = int(obj.position[0] // threshold)
+            cell_y = int(obj.position[1] // threshold)
+            
+            match = None
+            for dx in (-1, 0, 1):
+                for dy in (-1, 0, 1):
+                    for index in grid.get((obj.type, cell_x + dx, cell_y + dy), ()):
+                        anchor = groups[index][0]
+                        ddx = obj.position[0] - anchor[0]
+                        ddy = obj.position[1] - anchor[1]
+                        if ddx * ddx + ddy * ddy < threshold_sq and (match is None or index < match):
+                            match = index
             
-            if not is_duplicate:
-                unique_objects.append(obj)
+            if match is None:
+                grid[(obj.type, cell_x, cell_y)].append(len(groups))
+                groups.append((obj.position, [obj]))
+            else:
+                groups[match][1].append(obj)
+        
+        return [members[0] if len(members) == 1 else self.merge_objects(members)
+                for _, members in groups]
+    
+    def merge_objects(self, members):
+        """🔗 СЛИЯНИЕ ДУБЛИКАТОВ В ОДИН ОБЪЕКТ"""
+        weights = [max(obj.confidence, 1e-3) for obj in members]
+        total = sum(weights)
+        position = (
+            int(round(sum(obj.position[0] * w for obj, w in zip(members, weights)) / total)),
+            int(round(sum(obj.position[1] * w for obj, w in zip(members, weights)) / total)),
+        )
         
-        return unique_objects
+        # Независимые детекции повышают уверенность: 1 - П(1 - c)
+        miss = 1.0
+        for obj in members:
+            miss *= 1.0 - min(max(obj.confidence, 0.0), 1.0)
+        confidence = min(0.99, 1.0 - miss)
+        
+        # Общая рамка всех детекций
+        boxes = [obj.bbox for obj in members if obj.bbox]
+        bbox = None
+        if boxes:
+            x0 = min(b[0] for b in boxes)
+            y0 = min(b[1] for b in boxes)
+            x1 = max(b[0] + b[2] for b in boxes)
+            y1 = max(b[1] + b[3] for b in boxes)
+            bbox = (x0, y0, x1 - x0, y1 - y0)
+        
+        first = members[0]
+        return GameObject(
+            type=first.type,
+            position=position,
+            confidence=confidence,
+            timestamp=max(obj.timestamp for obj in members),
+            health=sum(obj.health * w for obj, w in zip(members, weights)) / total,
+            is_enemy=first.is_enemy,
+            distance=first.distance,
+            bbox=bbox
+        )
     
     def analyze_safety(self, screen):
         """🛡️ АНАЛИЗ БЕЗОПАСНОСТИ ТЕКУЩЕЙ ПОЗИЦИИ"""
@@ -1314,6 +1435,7 @@ class HayabusaVisionBot:
         self.state.my_mana = interface.get('mana', self.state.my_mana)
         self.state.my_gold = interface.get('gold', self.state.my_gold)
         self.state.my_level = interface.get('level', self.state.my_level)
+        self.state.skills_ready = interface.get('skills_ready', self.state.skills_ready)
         
         # Мини-карта
         minimap = results.get('minimap', {})
@@ -1331,20 +1453,20 @@ class HayabusaVisionBot:
         self.stats['cycles'] += 1
         self.game_timer += 1
         
-        # Автоматическое увеличение золота и уровня
-        if self.stats['cycles'] % 10 == 0:
-            self.stats['total_gold'] += random.randint(50, 150)
-        
-        if self.stats['cycles'] % 30 == 0 and self.state.my_level < 15:
-            self.state.my_level += 1
+        # Золото и уровень распознаются с экрана
+        self.stats['total_gold'] = self.state.my_gold
+        if self.state.my_level > self.last_level:
             print(f"🎉 Уровень повышен до {self.state.my_level}!")
+        self.last_level = self.state.my_level
     
     # ========== ОСНОВНЫЕ МЕТОДЫ УПРАВЛЕНИЯ ==========
     
     def capture_screen(self, region=None):
         """📸 ЗАХВАТ ЭКРАНА"""
         try:
-            screenshot = pyautogui.screenshot(region=region) if region else pyautogui.screenshot()
+            if region is None:
+                return self.capture_backend.grab()
+            screenshot = pyautogui.screenshot(region=region)
             return cv2.cvtColor(np.array(screenshot), cv2.COLOR_RGB2BGR)
         except Exception as e:
             print(f"⚠️ Ошибка захвата экрана: {e}")
@@ -1381,7 +1503,8 @@ class HayabusaVisionBot:
             
         except Exception as e:
             print(f"⚠️ Ошибка перетаскивания: {e}")
-            pyautogui.mouseUp()
+            if PYAUTOGUI_AVAILABLE:
+                pyautogui.mouseUp()
             return False
     
     def use_skill(self, skill_name):
@@ -1489,13 +1612,13 @@ class HayabusaVisionBot:
     
     def calculate_distance_to_screen_center(self, position):
         """📍 РАССТОЯНИЕ ДО ЦЕНТРА ЭКРАНА"""
-        screen_width, screen_height = pyautogui.size()
+        screen_width, screen_height = get_screen_size()
         center_x, center_y = screen_width // 2, screen_height // 2
         return self.calculate_distance(position, (center_x, center_y))
     
     def get_screen_center(self):
         """📍 ПОЛУЧЕНИЕ ЦЕНТРА ЭКРАНА"""
-        screen_width, screen_height = pyautogui.size()
+        screen_width, screen_height = get_screen_size()
         return (screen_width // 2, screen_height // 2)
     
     # ========== МЕТОДЫ ИНТЕРФЕЙСА ==========
@@ -1516,24 +1639,33 @@ class HayabusaVisionBot:
         try:
             x, y, w, h = self.screen_regions['minimap']
             minimap = screen[y:y+h, x:x+w]
+            hsv = cv2.cvtColor(minimap, cv2.COLOR_BGR2HSV)
             
-            positions = ['base', 'jungle', 'lane_center', 'lane_border', 'enemy_territory']
-            self.state.map_position = random.choice(positions)
-            
-            return {'position': self.state.map_position}
+            result = self.minimap.update(minimap, hsv)
+            self.state.map_position = result['position']
+            return result
             
         except:
             return {'position': 'unknown'}
     
     def analyze_interface(self, screen):
         """📊 АНАЛИЗ ИНТЕРФЕЙСА"""
+        x, y, w, h = self.screen_regions['skill_indicators']
+        gold = self.read_number(screen, 'gold_display')
+        level = self.read_number(screen, 'level_display')
         return {
             'health': max(1, min(100, self.state.my_health - random.randint(0, 5))),
             'mana': max(1, min(100, self.state.my_mana - random.randint(0, 5))),
-            'gold': self.state.my_gold + random.randint(0, 30),
-            'level': self.state.my_level
+            'gold': gold if gold is not None else self.state.my_gold,
+            'level': level if level is not None and 1 <= level <= 15 else self.state.my_level,
+            'skills_ready': self.skill_detector.detect(screen[y:y + h, x:x + w])
         }
     
+    def read_number(self, screen, region_name):
+        """🔢 ЧИСЛО В ОБЛАСТИ ИНТЕРФЕЙСА"""
+        x, y, w, h = self.screen_regions[region_name]
+        return self.digit_reader.read(screen[y:y + h, x:x + w])
+    
     def show_full_stats(self):
         """📊 ПОЛНАЯ СТАТИСТИКА"""
         print("\n" + "="*60)
@@ -1579,6 +1711,9 @@ class HayabusaVisionBot:
         print("\n" + "="*70)
         print("🤖 MLBB ХАЯБУСА БОТ v14.0 с онлайн-обучением")
         print("="*70)
+        if not (PYAUTOGUI_AVAILABLE and KEYBOARD_AVAILABLE):
+            print("❌ Для управления ботом нужны pyautogui и keyboard (и дисплей)")
+            return
         print("✨ ОСОБЕННОСТИ:")
         print("✅ Авто-калибровка координат")
         print("✅ Параллельное обучение через интернет")
@@ -1607,27 +1742,27 @@ class HayabusaVisionBot:
         try:
             while True:
                 # Проверка клавиш управления
-                if keyboard.is_pressed('f1'):
+                if key_pressed('f1'):
                     self.show_full_stats()
                     time.sleep(0.5)
                 
-                if keyboard.is_pressed('f2'):
+                if key_pressed('f2'):
                     self.save_learning_data()
                     time.sleep(0.5)
                 
-                if keyboard.is_pressed('f3'):
+                if key_pressed('f3'):
                     print("\n🎯 ВЫУЧЕННЫЕ ПАТТЕРНЫ:")
                     for pattern, count in self.learned_patterns.items():
                         print(f"  {pattern}: {count}")
                     time.sleep(2)
                 
-                if keyboard.is_pressed('f9'):
+                if key_pressed('f9'):
                     bot_running = not bot_running
                     status = "АКТИВИРОВАН" if bot_running else "ОСТАНОВЛЕН"
                     print(f"\n{'▶️' if bot_running else '⏸️'} БОТ {status}")
                     time.sleep(0.5)
                 
-                if keyboard.is_pressed('esc'):
+                if key_pressed('esc'):
                     print("\n🛑 Завершение работы с сохранением данных...")
                     break
                 
@@ -0,0 +1,95 @@
+"""
+Прямой проход полносвязной сети (ReLU) на numpy - выбор действия без torch
+"""
+
+import os
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+
+class NumpyMLP:
+    """Инференс MLP по плоскому массиву весов (формат get_flat_weights)
+
+    Веса идут в порядке state_dict torch: (W1, b1, W2, b2, ...), где
+    W - матрица (выход, вход). Здесь они хранятся транспонированными и
+    непрерывными, а промежуточные буферы выделяются один раз на размер
+    пакета - предсказание для одного состояния не выделяет память.
+    """
+
+    def __init__(self, layer_sizes: Sequence[int]):
+        self.layer_sizes = tuple(layer_sizes)
+        self.layers: List = []
+        self._buffers: Dict[int, List[np.ndarray]] = {}
+
+    @staticmethod
+    def weight_count(layer_sizes: Sequence[int]) -> int:
+        """Число параметров сети с такими размерами слоев"""
+        return sum((n_in + 1) * n_out for n_in, n_out in zip(layer_sizes[:-1], layer_sizes[1:]))
+
+    @property
+    def ready(self) -> bool:
+        return bool(self.layers)
+
+    def load_flat(self, flat: np.ndarray):
+        """Загрузка весов из плоского массива"""
+        if len(flat) != self.weight_count(self.layer_sizes):
+            raise ValueError(f"Ожидалось {self.weight_count(self.layer_sizes)} весов, получено {len(flat)}")
+        layers = []
+        offset = 0
+        for n_in, n_out in zip(self.layer_sizes[:-1], self.layer_sizes[1:]):
+            weight = flat[offset:offset + n_out * n_in].reshape(n_out, n_in)
+            offset += n_out * n_in
+            bias = flat[offset:offset + n_out]
+            offset += n_out
+            layers.append((np.ascontiguousarray(weight.T, dtype=np.float32),
+                           np.array(bias, dtype=np.float32)))
+        self.layers = layers
+
+    def get_flat_weights(self) -> np.ndarray:
+        """Веса обратно в плоский массив"""
+        parts = []
+        for weight, bias in self.layers:
+            parts.extend((weight.T.ravel(), bias))
+        return np.concatenate(parts).astype(np.float32)
+
+    def predict(self, states: np.ndarray) -> np.ndarray:
+        """Q-значения для пакета состояний (n, вход)
+
+        Результат - внутренний буфер, он действителен до следующего вызова.
+        """
+        x = np.asarray(states, dtype=np.float32)
+        if x.ndim == 1:
+            x = x[None]
+        buffers = self._buffers.get(len(x))
+        if buffers is None:
+            buffers = self._buffers[len(x)] = [
+                np.empty((len(x), n_out), dtype=np.float32) for n_out in self.layer_sizes[1:]
+            ]
+
+        last = len(self.layers) - 1
+        for i, (weight, bias) in enumerate(self.layers):
+            out = buffers[i]
+            np.dot(x, weight, out=out)
+            out += bias
+            if i < last:
+                np.maximum(out, 0.0, out=out)
+            x = out
+        return x
+
+    def save(self, path: str):
+        """Сохранение весов в npz"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        np.savez(path, weights=self.get_flat_weights(), layer_sizes=np.array(self.layer_sizes))
+
+    def load(self, path: str) -> bool:
+        """Загрузка весов из npz (False - файла нет или размеры сети другие)"""
+        if not os.path.exists(path):
+            return False
+        data = np.load(path)
+        if tuple(data['layer_sizes'].tolist()) != self.layer_sizes:
+            return False
+        self.load_flat(data['weights'])
+        return True
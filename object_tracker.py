@@ -0,0 +1,163 @@
+"""
+Отслеживание объектов между кадрами: постоянные ID и скорости
+"""
+
+import itertools
+from dataclasses import dataclass
+from typing import Dict, List, Set, Tuple
+
+import numpy as np
+
+from game_state import GameObject
+
+Region = Tuple[int, int, int, int]
+
+
+@dataclass
+class Track:
+    """Трек объекта с моделью постоянной скорости"""
+    track_id: int
+    type: str
+    x: float
+    y: float
+    vx: float = 0.0
+    vy: float = 0.0
+    last_time: float = 0.0
+    hits: int = 1
+    missed: int = 0
+
+    def predict(self, timestamp: float) -> Tuple[float, float]:
+        """Позиция трека в момент timestamp"""
+        dt = max(0.0, timestamp - self.last_time)
+        return self.x + self.vx * dt, self.y + self.vy * dt
+
+
+class ObjectTracker:
+    """Сопоставление детекций с треками по ближайшему соседу
+
+    Детекции сопоставляются только с треками своего типа; скорость
+    сглаживается экспоненциально. Между полными поисками детекторы могут
+    искать объекты только в окрестности предсказанных позиций.
+    """
+
+    def __init__(self, max_distance: float = 60.0, max_missed: int = 5,
+                 velocity_smoothing: float = 0.5, full_search_interval: int = 5,
+                 search_margin: int = 40, min_hits: int = 2):
+        self.max_distance = max_distance
+        self.max_missed = max_missed
+        self.velocity_smoothing = velocity_smoothing
+        self.full_search_interval = max(1, full_search_interval)
+        self.search_margin = search_margin
+        self.min_hits = min_hits
+
+        self.tracks: Dict[int, Track] = {}
+        self._ids = itertools.count(1)
+        self.frames = 0
+        self.frames_since_full = 0
+        self.full_searches = 0
+
+    def needs_full_search(self) -> bool:
+        """Нужен ли поиск по всем областям (периодически или без треков)"""
+        return not self.tracks or self.frames_since_full + 1 >= self.full_search_interval
+
+    def search_regions(self, timestamp: float) -> List[Region]:
+        """Окна поиска (x, y, w, h) вокруг предсказанных позиций треков"""
+        regions = []
+        for track in self.tracks.values():
+            px, py = track.predict(timestamp)
+            # Окно растет, пока трек не виден
+            margin = self.search_margin * (1 + track.missed)
+            regions.append((int(px - margin), int(py - margin), 2 * margin, 2 * margin))
+        return regions
+
+    def update(self, objects: List[GameObject], timestamp: float,
+               full_search: bool = True) -> List[GameObject]:
+        """Сопоставить детекции кадра с треками, проставить track_id и velocity"""
+        self.frames += 1
+        if full_search:
+            self.full_searches += 1
+            self.frames_since_full = 0
+        else:
+            self.frames_since_full += 1
+
+        matched_tracks = set()
+        for obj_type in {obj.type for obj in objects} | {t.type for t in self.tracks.values()}:
+            detections = [obj for obj in objects if obj.type == obj_type]
+            tracks = [t for t in self.tracks.values() if t.type == obj_type]
+            matched_tracks.update(self._associate(detections, tracks, timestamp))
+
+        # Пропавшие треки
+        for track_id in list(self.tracks):
+            if track_id not in matched_tracks:
+                track = self.tracks[track_id]
+                track.missed += 1
+                if track.missed > self.max_missed:
+                    del self.tracks[track_id]
+
+        return objects
+
+    def _associate(self, detections: List[GameObject], tracks: List[Track],
+                   timestamp: float) -> Set[int]:
+        """Жадное сопоставление по возрастанию расстояния"""
+        matched = set()
+        used = set()
+
+        if detections and tracks:
+            det_xy = np.array([obj.position for obj in detections], dtype=np.float32)
+            pred_xy = np.array([t.predict(timestamp) for t in tracks], dtype=np.float32)
+            distances = np.hypot(det_xy[:, None, 0] - pred_xy[None, :, 0],
+                                 det_xy[:, None, 1] - pred_xy[None, :, 1])
+
+            for flat in np.argsort(distances, axis=None):
+                d, t = divmod(int(flat), len(tracks))
+                if distances[d, t] > self.max_distance:
+                    break
+                if d in used or tracks[t].track_id in matched:
+                    continue
+                self._correct(tracks[t], detections[d], timestamp)
+                used.add(d)
+                matched.add(tracks[t].track_id)
+
+        # Новые треки для несопоставленных детекций
+        for d, obj in enumerate(detections):
+            if d not in used:
+                track = Track(next(self._ids), obj.type, float(obj.position[0]),
+                              float(obj.position[1]), last_time=timestamp)
+                self.tracks[track.track_id] = track
+                obj.track_id = track.track_id
+                obj.velocity = (0.0, 0.0)
+                matched.add(track.track_id)
+
+        return matched
+
+    def _correct(self, track: Track, obj: GameObject, timestamp: float):
+        """Обновление трека измерением"""
+        dt = timestamp - track.last_time
+        if dt > 1e-6:
+            alpha = self.velocity_smoothing
+            track.vx = alpha * (obj.position[0] - track.x) / dt + (1 - alpha) * track.vx
+            track.vy = alpha * (obj.position[1] - track.y) / dt + (1 - alpha) * track.vy
+        track.x, track.y = float(obj.position[0]), float(obj.position[1])
+        track.last_time = timestamp
+        track.hits += 1
+        track.missed = 0
+
+        obj.track_id = track.track_id
+        obj.velocity = (track.vx, track.vy)
+
+    def predict_position(self, obj: GameObject, lead_time: float) -> Tuple[int, int]:
+        """Куда сместится объект через lead_time секунд"""
+        track = self.tracks.get(obj.track_id)
+        if track is None or track.hits < self.min_hits:
+            return obj.position
+        return (int(obj.position[0] + track.vx * lead_time),
+                int(obj.position[1] + track.vy * lead_time))
+
+    def get_stats(self) -> Dict:
+        """Статистика трекера"""
+        return {
+            'tracks': len(self.tracks),
+            'frames': self.frames,
+            'full_searches': self.full_searches,
+            'roi_frames': self.frames - self.full_searches,
+        }
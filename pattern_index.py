@@ -0,0 +1,95 @@
+"""
+Инвертированный индекс паттернов: признак состояния -> паттерны с этим признаком
+"""
+
+import heapq
+import math
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+from q_table import decode_state, parse_state_key
+
+# Ключ паттерна: (код состояния, действие)
+PatternKey = Tuple[int, str]
+
+
+def state_tokens(code: int) -> List[int]:
+    """Признаки состояния: номер поля и его значение, упакованные в целое"""
+    return [(field << 16) | value for field, value in enumerate(decode_state(code))]
+
+
+def convert_patterns(patterns: Dict) -> Dict[PatternKey, Dict]:
+    """Перенос паттернов со строковыми ключами "<ключ состояния>_<действие>" в записи"""
+    converted = {}
+    for key, record in patterns.items():
+        if not isinstance(key, str):
+            converted[key] = record
+            continue
+        parts = key.split('_')
+        code = parse_state_key('_'.join(parts[:9]))
+        if code is None or len(parts) < 10:
+            continue
+        action = '_'.join(parts[9:])
+        converted[(code, action)] = dict(record, state=code, action=action)
+    return converted
+
+
+class PatternIndex:
+    """Поиск похожих паттернов без полного перебора
+
+    Схожесть - доля общих признаков состояния (у всех состояний их одинаково
+    много). Паттерн со схожестью не ниже порога обязан разделять с запросом
+    хотя бы один из (n - need + 1) любых его признаков, поэтому кандидаты
+    берутся только из списков самых редких признаков запроса.
+    """
+
+    def __init__(self, patterns: Optional[Dict[PatternKey, Dict]] = None):
+        self.postings: Dict[int, Set[PatternKey]] = defaultdict(set)
+        self.tokens: Dict[PatternKey, frozenset] = {}
+        for key in patterns or ():
+            self.add(key)
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    def add(self, key: PatternKey):
+        """Добавить паттерн (повторное добавление ничего не меняет)"""
+        if key in self.tokens:
+            return
+        tokens = self.tokens[key] = frozenset(state_tokens(key[0]))
+        for token in tokens:
+            self.postings[token].add(key)
+
+    def discard(self, key: PatternKey):
+        tokens = self.tokens.pop(key, ())
+        for token in tokens:
+            self.postings[token].discard(key)
+
+    def similar(self, code: int, threshold: float = 0.7) -> List[Tuple[PatternKey, float]]:
+        """Паттерны со схожестью состояния не ниже threshold"""
+        query = state_tokens(code)
+        need = max(0, math.ceil(threshold * len(query) - 1e-9))
+        if need == 0:
+            candidates = self.tokens.keys()
+        else:
+            rare = sorted(query, key=lambda token: len(self.postings.get(token, ())))
+            candidates = set()
+            for token in rare[:len(query) - need + 1]:
+                candidates.update(self.postings.get(token, ()))
+
+        query = frozenset(query)
+        found = []
+        for key in candidates:
+            common = len(query & self.tokens[key])
+            if common >= need:
+                found.append((key, common / len(query)))
+        return found
+
+    def top(self, code: int, patterns: Dict[PatternKey, Dict], top_n: Optional[int] = None,
+            threshold: float = 0.7) -> List[Tuple[PatternKey, Dict]]:
+        """Похожие паттерны, лучшие по средней награде"""
+        matches = ((key, patterns[key]) for key, _ in self.similar(code, threshold))
+        rank = lambda item: item[1].get('avg_reward', 0)
+        if top_n is None:
+            return sorted(matches, key=rank, reverse=True)
+        return heapq.nlargest(top_n, matches, key=rank)
@@ -0,0 +1,227 @@
+"""
+Контроль бюджетов производительности (STATS_CONFIG) с плавной деградацией
+"""
+
+import os
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+from config import STATS_CONFIG
+
+
+def process_memory_mb() -> Optional[float]:
+    """Резидентная память процесса (МБ) или None, если узнать нельзя"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 1e6
+    except ImportError:
+        pass
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1e6
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class PerformanceGovernor:
+    """Замер бюджетов STATS_CONFIG и ступенчатое снижение качества
+
+    Каждые check_cycles циклов сравниваются с бюджетом: время цикла без
+    выполнения действия (ввод и паузы не ускорить), частота анализа кадров,
+    загрузка CPU процессом и его память. При нарушении patience проверок
+    подряд включается следующая ступень деградации, при запасе (headroom
+    от бюджета) - последняя отменяется. Каждое решение печатается и
+    сохраняется в history.
+
+    При нехватке памяти урезаются только временные буферы (буфер
+    воспроизведения), не более max_buffer_shrinks раз и только пока
+    предыдущее урезание снижало память: основную часть памяти занимают
+    библиотеки, и она может не опуститься ниже бюджета.
+    """
+
+    # Ступени по времени: сначала самые дешевые по качеству
+    LEVELS = ('skip_jungle', 'defer_training', 'lower_resolution')
+
+    def __init__(self, bot, check_cycles: int = 10, patience: int = 2, headroom: float = 0.7,
+                 max_pyramid_level: int = 2, max_buffer_shrinks: int = 2,
+                 budgets: Optional[Dict] = None):
+        self.bot = bot
+        self.check_cycles = max(1, check_cycles)
+        self.patience = max(1, patience)
+        self.headroom = headroom
+        self.max_pyramid_level = max_pyramid_level
+        self.max_buffer_shrinks = max_buffer_shrinks
+        self.budgets = dict(budgets or STATS_CONFIG['performance_metrics'])
+
+        self.level = 0             # сколько ступеней LEVELS включено
+        self.buffers_shrunk = 0    # сколько раз урезаны буферы обучения
+        self.memory_before_shrink: Optional[float] = None
+        self.shrink_stopped = False  # урезание исчерпано или не снижает память
+        self.base_pyramid_level = bot.vision_engine.pyramid_level
+
+        self.work_times = deque(maxlen=self.check_cycles)
+        self.analysis_times = deque(maxlen=self.check_cycles)
+        self.pressure_checks = 0
+        self.relief_checks = 0
+        self.memory_checks = 0
+        self.history: deque = deque(maxlen=100)
+        self.metrics: Dict[str, Optional[float]] = {}
+
+        self._cycles = 0
+        self._last_wall = time.time()
+        self._last_cpu = time.process_time()
+        self._cpu_count = os.cpu_count() or 1
+
+    def observe(self, cycle_time: float, action_time: float = 0.0):
+        """Замер одного цикла; раз в check_cycles циклов - проверка бюджетов"""
+        self.work_times.append(max(0.0, cycle_time - action_time))
+        self.analysis_times.append(self.bot.vision_engine.last_analysis_duration)
+        self._cycles += 1
+        if self._cycles % self.check_cycles == 0:
+            self.check()
+
+    def measure(self) -> Dict[str, Optional[float]]:
+        """Текущие метрики: время цикла, FPS анализа, CPU (% машины), память (МБ)"""
+        now, cpu = time.time(), time.process_time()
+        wall = now - self._last_wall
+        cpu_usage = (cpu - self._last_cpu) / wall / self._cpu_count * 100.0 if wall > 0 else None
+        self._last_wall, self._last_cpu = now, cpu
+
+        analysis = [t for t in self.analysis_times if t > 0]
+        mean_analysis = sum(analysis) / len(analysis) if analysis else 0.0
+        return {
+            'cycle_time': sum(self.work_times) / len(self.work_times) if self.work_times else 0.0,
+            'fps': 1.0 / mean_analysis if mean_analysis > 0 else None,
+            'cpu_usage': cpu_usage,
+            'memory_mb': process_memory_mb(),
+        }
+
+    def violations(self, metrics: Dict, scale: float = 1.0) -> List[str]:
+        """Нарушенные бюджеты по времени (scale < 1 - проверка с запасом)"""
+        budgets = self.budgets
+        found = []
+        if metrics['cycle_time'] > budgets['cycle_time_max'] * scale:
+            found.append(f"цикл {metrics['cycle_time'] * 1000:.0f}мс > "
+                         f"{budgets['cycle_time_max'] * scale * 1000:.0f}мс")
+        if metrics['fps'] is not None and metrics['fps'] * scale < budgets['fps_target']:
+            found.append(f"анализ {metrics['fps']:.1f} FPS < {budgets['fps_target'] / scale:.1f}")
+        if metrics['cpu_usage'] is not None and metrics['cpu_usage'] > budgets['cpu_usage_limit'] * scale:
+            found.append(f"CPU {metrics['cpu_usage']:.0f}% > {budgets['cpu_usage_limit'] * scale:.0f}%")
+        return found
+
+    def check(self):
+        """Сравнение с бюджетами и переключение ступеней"""
+        metrics = self.metrics = self.measure()
+
+        pressure = self.violations(metrics)
+        if pressure:
+            self.relief_checks = 0
+            self.pressure_checks += 1
+            if self.pressure_checks >= self.patience and self.level < len(self.LEVELS):
+                self.pressure_checks = 0
+                self.apply(self.LEVELS[self.level], '; '.join(pressure))
+                self.level += 1
+        else:
+            self.pressure_checks = 0
+            if self.level and not self.violations(metrics, self.headroom):
+                self.relief_checks += 1
+                if self.relief_checks >= self.patience:
+                    self.relief_checks = 0
+                    self.level -= 1
+                    self.restore(self.LEVELS[self.level], 'есть запас по времени')
+            else:
+                self.relief_checks = 0
+
+        memory, limit = metrics['memory_mb'], self.budgets['memory_limit_mb']
+        if memory is None:
+            return
+        if memory > limit:
+            self.memory_checks += 1
+            if self.memory_checks >= self.patience and self.can_shrink(memory):
+                self.memory_checks = 0
+                self.buffers_shrunk += 1
+                self.memory_before_shrink = memory
+                self.apply('shrink_buffers', f"память {memory:.0f}МБ > {limit}МБ")
+        else:
+            self.memory_checks = 0
+            if self.buffers_shrunk and memory < limit * self.headroom:
+                self.buffers_shrunk = 0
+                self.memory_before_shrink = None
+                self.shrink_stopped = False
+                self.restore('shrink_buffers', f"память {memory:.0f}МБ")
+
+    def can_shrink(self, memory: float) -> bool:
+        """Есть ли смысл урезать буферы еще раз"""
+        if self.shrink_stopped:
+            return False
+        if self.buffers_shrunk >= self.max_buffer_shrinks:
+            reason = f"уже урезано {self.buffers_shrunk} раз"
+        elif self.memory_before_shrink is not None and memory >= self.memory_before_shrink:
+            reason = f"память не снизилась ({self.memory_before_shrink:.0f} -> {memory:.0f}МБ)"
+        else:
+            return True
+        self.shrink_stopped = True
+        self.log('stop', 'shrink_buffers', reason)
+        return False
+
+    # ---------- Ступени ----------
+
+    def learning_engines(self) -> List:
+        bot = self.bot
+        return [engine for engine in (bot.learning_engine, getattr(bot, 'ultra_engine', None))
+                if engine is not None]
+
+    def apply(self, level: str, reason: str):
+        """Включить ступень деградации"""
+        vision = self.bot.vision_engine
+        if level == 'skip_jungle':
+            vision.skip_jungle = True
+        elif level == 'defer_training':
+            self.bot.training_deferred = True
+            for engine in self.learning_engines():
+                if hasattr(engine, 'training_deferred'):
+                    engine.training_deferred = True
+        elif level == 'lower_resolution':
+            vision.pyramid_level = min(vision.pyramid_level + 1, self.max_pyramid_level)
+        elif level == 'shrink_buffers':
+            for engine in self.learning_engines():
+                if hasattr(engine, 'shrink_buffers'):
+                    engine.shrink_buffers()
+        self.log('apply', level, reason)
+
+    def restore(self, level: str, reason: str):
+        """Отменить ступень деградации"""
+        vision = self.bot.vision_engine
+        if level == 'skip_jungle':
+            vision.skip_jungle = False
+        elif level == 'defer_training':
+            self.bot.training_deferred = False
+            for engine in self.learning_engines():
+                if hasattr(engine, 'training_deferred'):
+                    engine.training_deferred = False
+        elif level == 'lower_resolution':
+            vision.pyramid_level = self.base_pyramid_level
+        elif level == 'shrink_buffers':
+            for engine in self.learning_engines():
+                if hasattr(engine, 'restore_buffers'):
+                    engine.restore_buffers()
+        self.log('restore', level, reason)
+
+    def log(self, action: str, level: str, reason: str):
+        """Запись решения (печать и история)"""
+        self.history.append({'time': time.time(), 'action': action, 'level': level,
+                             'reason': reason, 'metrics': dict(self.metrics)})
+        icon = {'apply': "🐢", 'restore': "🐇"}.get(action, "🛑")
+        verb = {'apply': "включено", 'restore': "отменено"}.get(action, "прекращено")
+        print(f"{icon} Бюджет производительности: {level} {verb} ({reason})")
+
+    def get_stats(self) -> Dict:
+        """Текущие метрики, ступени и число решений"""
+        return {
+            'metrics': dict(self.metrics),
+            'levels': list(self.LEVELS[:self.level]),
+            'buffers_shrunk': self.buffers_shrunk,
+            'shrink_stopped': self.shrink_stopped,
+            'decisions': len(self.history),
+        }
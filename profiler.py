@@ -0,0 +1,223 @@
+"""
+Профилирование цикла бота: гистограммы задержек по стадиям
+"""
+
+import json
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from typing import Dict, List, Optional, Tuple
+
+from config import STATS_CONFIG
+
+
+class LatencyHistogram:
+    """Гистограмма задержек фиксированного размера (лог-линейные корзины, как в HDR)
+
+    Значения хранятся в микросекундах: до 2^sub_bits - точно, дальше каждая
+    степень двойки делится на 2^(sub_bits-1) корзин, относительная ошибка
+    не больше 2^-(sub_bits-1). Память не растет с числом замеров.
+    """
+
+    def __init__(self, max_seconds: float = 60.0, sub_bits: int = 6):
+        self.sub_bits = sub_bits
+        self.sub_count = 1 << sub_bits
+        self.half = self.sub_count >> 1
+        self.max_value = int(max_seconds * 1e6)
+        self.counts: List[int] = [0] * (self.index(self.max_value) + 1)
+
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = 0.0
+
+    def index(self, value: int) -> int:
+        """Корзина для значения (мкс)"""
+        if value < self.sub_count:
+            return value
+        shift = value.bit_length() - self.sub_bits
+        return self.sub_count + (shift - 1) * self.half + ((value >> shift) - self.half)
+
+    def bucket_value(self, index: int) -> float:
+        """Середина корзины (мкс)"""
+        if index < self.sub_count:
+            return float(index)
+        shift = (index - self.sub_count) // self.half + 1
+        top = (index - self.sub_count) % self.half + self.half
+        return ((top << shift) + ((top + 1) << shift)) / 2.0
+
+    def record(self, seconds: float):
+        value = min(max(int(seconds * 1e6), 0), self.max_value)
+        self.counts[self.index(value)] += 1
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    def percentile(self, q: float) -> float:
+        """Процентиль (сек)"""
+        if not self.count:
+            return 0.0
+        target = max(1, int(round(q / 100.0 * self.count)))
+        seen = 0
+        for index, bucket in enumerate(self.counts):
+            seen += bucket
+            if seen >= target:
+                return min(self.bucket_value(index) / 1e6, self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        """Сводка в миллисекундах"""
+        if not self.count:
+            return {'count': 0}
+        return {
+            'count': self.count,
+            'mean_ms': self.total / self.count * 1000.0,
+            'p50_ms': self.percentile(50) * 1000.0,
+            'p90_ms': self.percentile(90) * 1000.0,
+            'p99_ms': self.percentile(99) * 1000.0,
+            'max_ms': self.max * 1000.0,
+        }
+
+
+class CycleProfiler:
+    """Время стадий цикла (захват, детекторы, решение, действия, обучение)
+
+    Гистограммы хранят полное время стадий. Для циклов дольше бюджета
+    (STATS_CONFIG cycle_time_max) запоминается стадия с наибольшим
+    собственным временем (без вложенных) - видно, кто нарушает бюджет.
+
+    Время стадий цикла копится отдельно в каждом потоке. В конвейере стадии
+    кадра забираются take_stages() и передаются дальше вместе с кадром, так
+    что в цикл попадает только работа над кадром, по которому действовали.
+    Время цикла считается по time.perf_counter, как и время стадий.
+    """
+
+    def __init__(self, budget: Optional[float] = None, dump_path: Optional[str] = None,
+                 dump_interval: float = 60.0):
+        self.budget = budget if budget is not None else STATS_CONFIG['performance_metrics']['cycle_time_max']
+        self.dump_path = dump_path
+        self.dump_interval = dump_interval
+
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.slow_cycles = 0
+        self.slow_stages: Counter = Counter()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._last_dump = time.time()
+
+    @contextmanager
+    def measure(self, name: str):
+        """Замер блока кода как стадии name (вложенные стадии допускаются)"""
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append(0.0)  # время вложенных стадий
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            nested = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            self.record(name, elapsed, exclusive=elapsed - nested)
+
+    def record(self, name: str, seconds: float, exclusive: Optional[float] = None):
+        """Замер стадии; exclusive - время без вложенных стадий (для поиска виновника)"""
+        with self._lock:
+            self.histogram(name).record(seconds)
+        stages = self._stages()
+        own = seconds if exclusive is None else exclusive
+        stages[name] = stages.get(name, 0.0) + own
+
+    def _stages(self) -> Dict[str, float]:
+        """Собственное время стадий текущего цикла в этом потоке"""
+        stages = getattr(self._local, 'stages', None)
+        if stages is None:
+            stages = self._local.stages = {}
+        return stages
+
+    def take_stages(self) -> Dict[str, float]:
+        """Забрать время стадий, накопленное этим потоком (для передачи с кадром)"""
+        stages = self._stages()
+        self._local.stages = {}
+        return stages
+
+    def histogram(self, name: str) -> LatencyHistogram:
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = LatencyHistogram()
+        return histogram
+
+    def end_cycle(self, cycle_start: float,
+                  stages: Optional[Dict[str, float]] = None) -> Tuple[float, Optional[str]]:
+        """Завершение цикла, начатого в cycle_start (time.perf_counter)
+
+        stages - время стадий кадра из других потоков. Возвращает время
+        цикла и, для долгого цикла, самую долгую стадию.
+        """
+        cycle_time = time.perf_counter() - cycle_start
+        merged = dict(stages or {})
+        for name, seconds in self.take_stages().items():
+            merged[name] = merged.get(name, 0.0) + seconds
+
+        slowest = None
+        with self._lock:
+            self.histogram('cycle').record(cycle_time)
+            if cycle_time > self.budget and merged:
+                slowest = max(merged, key=merged.get)
+                self.slow_cycles += 1
+                self.slow_stages[slowest] += 1
+
+        if self.dump_path and time.time() - self._last_dump >= self.dump_interval:
+            self.dump()
+        return cycle_time, slowest
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Сводка по стадиям"""
+        with self._lock:
+            return {name: histogram.summary() for name, histogram in sorted(self.histograms.items())}
+
+    def dump(self, path: Optional[str] = None):
+        """Сохранение сводки в JSON"""
+        path = path or self.dump_path
+        self._last_dump = time.time()
+        if not path:
+            return
+        data = {
+            'timestamp': self._last_dump,
+            'budget_ms': self.budget * 1000.0,
+            'slow_cycles': self.slow_cycles,
+            'slow_stages': dict(self.slow_stages),
+            'stages': self.summary(),
+        }
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            temp_path = path + '.tmp'
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+            os.replace(temp_path, path)
+        except Exception as e:
+            print(f"⚠️ Ошибка сохранения профиля: {e}")
+
+    def print_summary(self):
+        """Таблица задержек для экрана статистики"""
+        print(f"⏱️ Задержки стадий (бюджет цикла {self.budget * 1000:.0f}мс):")
+        for name, stats in self.summary().items():
+            if not stats['count']:
+                continue
+            print(f"   {name:<22} n={stats['count']:<6} сред {stats['mean_ms']:7.1f}мс | "
+                  f"p50 {stats['p50_ms']:7.1f} | p99 {stats['p99_ms']:7.1f} | макс {stats['max_ms']:7.1f}")
+        if self.slow_cycles:
+            culprits = ', '.join(f"{name} ({count})" for name, count in self.slow_stages.most_common(3))
+            print(f"   Долгих циклов: {self.slow_cycles} | дольше всего: {culprits}")
+
+
+def profile_stage(profiler: Optional[CycleProfiler], name: str):
+    """Замер стадии или пустой контекст, если профилирование выключено"""
+    return profiler.measure(name) if profiler is not None else nullcontext()
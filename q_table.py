@@ -0,0 +1,214 @@
+"""
+Q-таблица на массиве numpy: состояние упаковывается в целое число
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+# Поля ключа состояния: (префикс строкового ключа, бит под значение).
+# Дискретизация та же, что у строкового ключа; значения за пределами
+# поля прижимаются к его границам.
+STATE_FIELDS = (('h', 7), ('l', 5), ('e', 4), ('c', 5), ('j', 4),
+                ('s', 4), ('g', 10), ('p', 2), ('pos', 3))
+
+# Словари строковых полей (индекс 0 - прочие значения)
+PHASES = ('?', 'e', 'm', 'l')
+POSITIONS = ('?', 'bas', 'all', 'jun', 'ene', 'riv', 'unk')
+_PHASE_INDEX = {value: i for i, value in enumerate(PHASES)}
+_POSITION_INDEX = {value: i for i, value in enumerate(POSITIONS)}
+
+
+def _pack(values: Iterable[int]) -> int:
+    code = 0
+    for (_, bits), value in zip(STATE_FIELDS, values):
+        code = (code << bits) | min(max(int(value), 0), (1 << bits) - 1)
+    return code
+
+
+def _clip(value, limit: int) -> int:
+    value = int(value)
+    return 0 if value < 0 else limit if value > limit else value
+
+
+def encode_state(state: Dict) -> int:
+    """Целочисленный код состояния (те же корзины, что у строкового ключа)"""
+    # Развернуто по STATE_FIELDS: код считается на каждом опыте и выборе действия
+    get = state.get
+    code = _clip(get('health', 0), 127)
+    code = (code << 5) | _clip(get('level', 1), 31)
+    code = (code << 4) | _clip(get('enemies_nearby', 0), 15)
+    code = (code << 5) | _clip(get('creeps_nearby', 0), 31)
+    code = (code << 4) | _clip(get('jungle_creeps_nearby', 0), 15)
+    code = (code << 4) | _clip(get('safety_score', 1.0) * 10, 15)
+    code = (code << 10) | _clip(get('gold', 0) / 100, 1023)
+    code = (code << 2) | _PHASE_INDEX.get(get('phase', 'early')[:1], 0)
+    return (code << 3) | _POSITION_INDEX.get(get('position', 'unknown')[:3], 0)
+
+
+def decode_state(code: int) -> List[int]:
+    """Значения полей из кода (в порядке STATE_FIELDS)"""
+    values = []
+    for _, bits in reversed(STATE_FIELDS):
+        values.append(code & ((1 << bits) - 1))
+        code >>= bits
+    return values[::-1]
+
+
+def state_key(code: int) -> str:
+    """Строковый ключ состояния для отладки и паттернов"""
+    values = decode_state(code)
+    values[7] = PHASES[values[7]]
+    values[8] = POSITIONS[values[8]]
+    return "_".join(f"{prefix}{value}" for (prefix, _), value in zip(STATE_FIELDS, values))
+
+
+def parse_state_key(key: str) -> Optional[int]:
+    """Код по строковому ключу старого формата (None - ключ не разобран)"""
+    parts = key.split('_')
+    if len(parts) != len(STATE_FIELDS):
+        return None
+    values = []
+    for (prefix, _), part in zip(STATE_FIELDS, parts):
+        if not part.startswith(prefix):
+            return None
+        value = part[len(prefix):]
+        if prefix == 'p':
+            values.append(_PHASE_INDEX.get(value, 0))
+        elif prefix == 'pos':
+            values.append(_POSITION_INDEX.get(value, 0))
+        else:
+            try:
+                values.append(int(float(value)))
+            except ValueError:
+                return None
+    return _pack(values)
+
+
+class QTable:
+    """Q-значения в плотном массиве [состояния, действия]
+
+    Код состояния сопоставляется строке массива словарем целых чисел;
+    строки выделяются по мере появления новых состояний (емкость растет
+    вдвое). visited отмечает действия, которые уже обновлялись - лучшее
+    действие выбирается только среди них, как в прежней таблице словарей.
+    """
+
+    def __init__(self, action_count: int, capacity: int = 1024):
+        self.action_count = action_count
+        self.rows: Dict[int, int] = {}
+        self.codes = np.zeros(capacity, dtype=np.int64)
+        self.values = np.zeros((capacity, action_count), dtype=np.float32)
+        self.visited = np.zeros((capacity, action_count), dtype=np.bool_)
+
+    def __len__(self) -> int:
+        """Число записанных Q-значений"""
+        return int(self.visited[:len(self.rows)].sum())
+
+    @property
+    def state_count(self) -> int:
+        return len(self.rows)
+
+    def row(self, code: int) -> int:
+        """Строка состояния (создается при первом обращении)"""
+        row = self.rows.get(code)
+        if row is None:
+            row = len(self.rows)
+            if row == len(self.codes):
+                self._grow(2 * row)
+            self.rows[code] = row
+            self.codes[row] = code
+        return row
+
+    def _grow(self, capacity: int):
+        for name in ('codes', 'values', 'visited'):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def lookup(self, codes: Iterable[int]) -> np.ndarray:
+        """Строки для кодов (-1 - состояние не встречалось)"""
+        return np.fromiter((self.rows.get(code, -1) for code in codes), dtype=np.int64)
+
+    def get(self, code: int, action: int) -> float:
+        row = self.rows.get(code)
+        return float(self.values[row, action]) if row is not None else 0.0
+
+    def state_values(self, code: int) -> np.ndarray:
+        """Q-значения всех действий состояния (нули для незнакомого)"""
+        row = self.rows.get(code)
+        return self.values[row] if row is not None else np.zeros(self.action_count, dtype=np.float32)
+
+    def update(self, code: int, action: int, target: float, alpha: float):
+        """Сдвиг Q(s, a) к цели со скоростью alpha"""
+        row = self.row(code)
+        self.values[row, action] += alpha * (target - self.values[row, action])
+        self.visited[row, action] = True
+
+    def update_batch(self, codes: Sequence[int], actions: np.ndarray, targets: np.ndarray, alpha: float):
+        """Пакетное обновление; повторы (s, a) применяются по порядку, как при обновлении по одному"""
+        rows = np.fromiter((self.row(code) for code in codes), dtype=np.int64, count=len(codes))
+        actions = np.asarray(actions, dtype=np.int64)
+        targets = np.asarray(targets, dtype=np.float32)
+        pending = np.arange(len(rows))
+        # Каждый проход обновляет первые вхождения еще не примененных пар
+        while len(pending):
+            _, first = np.unique(rows[pending] * self.action_count + actions[pending], return_index=True)
+            chosen = pending[first]
+            r, a = rows[chosen], actions[chosen]
+            self.values[r, a] += alpha * (targets[chosen] - self.values[r, a])
+            self.visited[r, a] = True
+            pending = np.delete(pending, first)
+
+    def best_actions(self, codes: Iterable[int]) -> np.ndarray:
+        """Лучшее из обновлявшихся действий для каждого кода (-1 - таких нет)"""
+        rows = self.lookup(codes)
+        known = rows >= 0
+        best = np.full(len(rows), -1, dtype=np.int64)
+        if known.any():
+            masked = np.where(self.visited[rows[known]], self.values[rows[known]], -np.inf)
+            choice = masked.argmax(axis=1)
+            best[known] = np.where(np.isfinite(masked.max(axis=1)), choice, -1)
+        return best
+
+    def max_values(self, codes: Iterable[int]) -> np.ndarray:
+        """Q лучшего действия для каждого кода (0 - действий еще не было)"""
+        rows = self.lookup(codes)
+        result = np.zeros(len(rows), dtype=np.float32)
+        known = rows >= 0
+        if known.any():
+            masked = np.where(self.visited[rows[known]], self.values[rows[known]], -np.inf)
+            best = masked.max(axis=1)
+            result[known] = np.where(np.isfinite(best), best, 0.0)
+        return result
+
+    def max_value(self, code: int) -> float:
+        row = self.rows.get(code)
+        if row is None or not self.visited[row].any():
+            return 0.0
+        return float(self.values[row][self.visited[row]].max())
+
+    def debug_view(self, action_names: Sequence[str]) -> Dict[str, Dict[str, float]]:
+        """Таблица в прежнем виде: строковый ключ -> {действие: Q}"""
+        view = {}
+        for code, row in self.rows.items():
+            actions = np.flatnonzero(self.visited[row])
+            view[state_key(code)] = {action_names[a]: float(self.values[row, a]) for a in actions}
+        return view
+
+    @classmethod
+    def from_dict(cls, table: Dict[str, Dict[str, float]], action_map: Dict[str, int]) -> 'QTable':
+        """Перенос таблицы словарей со строковыми ключами (неразобранные записи пропускаются)"""
+        q_table = cls(len(action_map))
+        for key, actions in table.items():
+            code = parse_state_key(key)
+            if code is None:
+                continue
+            for action, value in actions.items():
+                index = action_map.get(action)
+                if index is not None:
+                    row = q_table.row(code)
+                    q_table.values[row, index] = value
+                    q_table.visited[row, index] = True
+        return q_table
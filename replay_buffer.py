@@ -0,0 +1,194 @@
+"""
+Буфер воспроизведения для Deep Q-Learning: кольцевой буфер на массивах numpy
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+Batch = Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]
+
+
+class SumTree:
+    """Дерево сумм приоритетов: выборка и обновление за O(log n) (векторно по пакету)"""
+
+    def __init__(self, capacity: int):
+        self.leaves = 1 << max(0, int(capacity - 1).bit_length())
+        self.tree = np.zeros(2 * self.leaves, dtype=np.float64)
+
+    @property
+    def total(self) -> float:
+        return float(self.tree[1])
+
+    def get(self, indices: np.ndarray) -> np.ndarray:
+        return self.tree[self.leaves + indices]
+
+    def set(self, index: int, priority: float):
+        """Приоритет одного листа (путь до корня без numpy-операций над массивами)"""
+        node = self.leaves + index
+        delta = priority - self.tree[node]
+        while node >= 1:
+            self.tree[node] += delta
+            node >>= 1
+
+    def update(self, indices: np.ndarray, priorities: np.ndarray):
+        """Новые приоритеты листьев и пересчет сумм вверх по дереву"""
+        nodes = self.leaves + np.asarray(indices, dtype=np.int64)
+        self.tree[nodes] = priorities
+        nodes = np.unique(nodes >> 1)
+        while nodes[0] >= 1:
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+            if nodes[0] == 1:
+                break
+            nodes = np.unique(nodes >> 1)
+
+    def find(self, values: np.ndarray) -> np.ndarray:
+        """Листья, в чьи отрезки накопленной суммы попадают values"""
+        nodes = np.ones(len(values), dtype=np.int64)
+        values = values.astype(np.float64)
+        while nodes[0] < self.leaves:
+            left = 2 * nodes
+            left_sums = self.tree[left]
+            go_right = values >= left_sums
+            values = np.where(go_right, values - left_sums, values)
+            nodes = left + go_right
+        return nodes - self.leaves
+
+    def clear(self):
+        self.tree[:] = 0.0
+
+
+class ReplayBuffer:
+    """Кольцевой буфер опытов (состояние, действие, награда, следующее состояние, конец)
+
+    Опыты лежат в заранее выделенных столбцах numpy; выборка - по индексам,
+    O(размер пакета). В режиме prioritized опыты выбираются пропорционально
+    (|TD-ошибка| + eps)^alpha через дерево сумм, а веса важности (beta)
+    исправляют смещение выборки.
+    """
+
+    def __init__(self, capacity: int, state_size: int, prioritized: bool = False,
+                 alpha: float = 0.6, beta: float = 0.4, eps: float = 1e-3,
+                 seed: Optional[int] = None):
+        self.state_size = state_size
+        self.prioritized = prioritized
+        self.alpha = alpha
+        self.beta = beta
+        self.eps = eps
+        self.rng = np.random.default_rng(seed)
+        self.allocate(capacity)
+
+    def allocate(self, capacity: int):
+        """Пустые столбцы заданной емкости"""
+        self.capacity = max(1, capacity)
+        self.states = np.zeros((self.capacity, self.state_size), dtype=np.float32)
+        self.actions = np.zeros(self.capacity, dtype=np.int64)
+        self.rewards = np.zeros(self.capacity, dtype=np.float32)
+        self.next_states = np.zeros((self.capacity, self.state_size), dtype=np.float32)
+        self.dones = np.zeros(self.capacity, dtype=np.bool_)
+
+        self.position = 0
+        self.size = 0
+        self.tree = SumTree(self.capacity) if self.prioritized else None
+        self.max_priority = 1.0
+
+    def columns(self) -> Batch:
+        return self.states, self.actions, self.rewards, self.next_states, self.dones
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def maxlen(self) -> int:
+        return self.capacity
+
+    def append(self, experience: Tuple):
+        """Добавить опыт (state, action, reward, next_state, done), вытесняя самый старый"""
+        state, action, reward, next_state, done = experience
+        i = self.position
+        self.states[i] = state
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.next_states[i] = next_state
+        self.dones[i] = done
+        if self.tree is not None:
+            # Новый опыт выбирается хотя бы раз - максимальный приоритет
+            self.tree.set(i, self.max_priority)
+
+        self.position = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def extend(self, states: np.ndarray, actions: np.ndarray, rewards: np.ndarray,
+               next_states: np.ndarray, dones: np.ndarray):
+        """Добавить пакет опытов столбцами (запись срезами, без цикла по опытам)"""
+        count = len(actions)
+        if count == 0:
+            return
+        if count > self.capacity:
+            states, actions, rewards, next_states, dones = (
+                column[-self.capacity:] for column in (states, actions, rewards, next_states, dones))
+            count = self.capacity
+        indices = (self.position + np.arange(count)) % self.capacity
+        for column, values in zip(self.columns(), (states, actions, rewards, next_states, dones)):
+            column[indices] = values
+        if self.tree is not None:
+            self.tree.update(indices, np.full(count, self.max_priority))
+
+        self.position = (self.position + count) % self.capacity
+        self.size = min(self.size + count, self.capacity)
+
+    def sample(self, batch_size: int) -> Tuple[np.ndarray, Batch, Optional[np.ndarray]]:
+        """Индексы, столбцы пакета и веса важности (None без приоритетов)"""
+        if self.tree is None:
+            indices = self.rng.integers(0, self.size, batch_size)
+            weights = None
+        else:
+            # Стратифицированная выборка: по одному значению из каждого отрезка суммы
+            total = self.tree.total
+            bounds = (np.arange(batch_size) + self.rng.random(batch_size)) * (total / batch_size)
+            indices = np.minimum(self.tree.find(np.minimum(bounds, total * (1 - 1e-12))), self.size - 1)
+            probabilities = self.tree.get(indices) / total
+            weights = (self.size * probabilities) ** -self.beta
+            weights = (weights / weights.max()).astype(np.float32)
+
+        batch = tuple(column[indices] for column in self.columns())
+        return indices, batch, weights
+
+    def update_priorities(self, indices: np.ndarray, td_errors: np.ndarray):
+        """Приоритеты выбранных опытов по их TD-ошибкам"""
+        if self.tree is None:
+            return
+        priorities = (np.abs(td_errors) + self.eps) ** self.alpha
+        self.tree.update(indices, priorities)
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+
+    def ordered(self) -> np.ndarray:
+        """Индексы хранимых опытов от старых к новым"""
+        start = self.position if self.size == self.capacity else 0
+        return (start + np.arange(self.size)) % self.capacity
+
+    def resize(self, capacity: int):
+        """Новая емкость с сохранением самых свежих опытов"""
+        capacity = max(1, capacity)
+        if capacity == self.capacity:
+            return
+        order = self.ordered()[-capacity:]
+        priorities = self.tree.get(order) if self.tree is not None else None
+        kept = [column[order] for column in self.columns()]
+
+        self.allocate(capacity)
+        count = len(order)
+        for column, values in zip(self.columns(), kept):
+            column[:count] = values
+        self.size = count
+        self.position = count % self.capacity
+        if self.tree is not None and count:
+            self.tree.update(np.arange(count), priorities)
+            self.max_priority = max(1.0, float(priorities.max()))
+
+    def clear(self):
+        self.position = 0
+        self.size = 0
+        if self.tree is not None:
+            self.tree.clear()
+            self.max_priority = 1.0
@@ -0,0 +1,112 @@
+"""
+Кадр экрана с однократным преобразованием в HSV
+"""
+
+from functools import lru_cache
+
+import cv2
+import numpy as np
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from screen_layout import Region as LayoutRegion
+
+Region = Tuple[int, int, int, int]
+
+
+def _area(box: Tuple[int, int, int, int]) -> int:
+    return max(0, box[2] - box[0]) * max(0, box[3] - box[1])
+
+
+@lru_cache(maxsize=64)
+def _merge_boxes(boxes: Tuple[Tuple[int, int, int, int], ...]) -> List[Tuple[int, int, int, int]]:
+    """Слияние пар прямоугольников, пока объединение не больше их суммы (области одни и те же
+    от кадра к кадру - результат кэшируется)"""
+    blocks = list(boxes)
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(blocks)):
+            for j in range(i + 1, len(blocks)):
+                a, b = blocks[i], blocks[j]
+                union = (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+                overlap = (max(a[0], b[0]), max(a[1], b[1]), min(a[2], b[2]), min(a[3], b[3]))
+                if _area(union) <= _area(a) + _area(b) - _area(overlap):
+                    blocks[i] = union
+                    del blocks[j]
+                    merged = True
+                    break
+            if merged:
+                break
+    return blocks
+
+
+class ScreenFrame:
+    """Кадр экрана: BGR-изображение и HSV областей интереса
+
+    Каждая область преобразуется в HSV один раз за кадр. Соседние области
+    сливаются в общий прямоугольник, только если он не больше суммы самих
+    областей - иначе пустое пространство между ними стоило бы дороже.
+    """
+
+    def __init__(self, bgr: np.ndarray, regions: Optional[Iterable[Region]] = None):
+        self.bgr = bgr
+        self.height, self.width = bgr.shape[:2]
+
+        # Прямоугольники HSV-преобразования (x0, y0, x1, y1); без областей - весь кадр
+        regions = list(regions) if regions else []
+        self.hsv_blocks = self.merge_blocks(regions) if regions else [(0, 0, self.width, self.height)]
+
+        self._hsv: Dict[Tuple[int, int, int, int], np.ndarray] = {}
+        self.conversions = 0
+
+    def clip(self, region: Region) -> Tuple[int, int, int, int]:
+        """Обрезка области (x, y, w, h) по границам кадра -> (x0, y0, x1, y1)"""
+        if isinstance(region, LayoutRegion) and region.x + region.w <= self.width \
+                and region.y + region.h <= self.height:
+            # Области раскладки уже обрезаны под разрешение
+            return region.bounds
+        x, y, w, h = region
+        x0 = min(max(int(x), 0), self.width)
+        y0 = min(max(int(y), 0), self.height)
+        x1 = min(max(int(x + w), x0), self.width)
+        y1 = min(max(int(y + h), y0), self.height)
+        return x0, y0, x1, y1
+
+    def merge_blocks(self, regions: Iterable[Region]) -> List[Tuple[int, int, int, int]]:
+        """Прямоугольники для преобразования: области, слитые там, где это не добавляет пикселей"""
+        boxes = tuple(dict.fromkeys(b for b in map(self.clip, regions) if b[2] > b[0] and b[3] > b[1]))
+        return _merge_boxes(boxes)
+
+    def block_hsv(self, block: Tuple[int, int, int, int]) -> np.ndarray:
+        """HSV прямоугольника (преобразуется при первом обращении за кадр)"""
+        hsv = self._hsv.get(block)
+        if hsv is None:
+            x0, y0, x1, y1 = block
+            hsv = self._hsv[block] = cv2.cvtColor(self.bgr[y0:y1, x0:x1], cv2.COLOR_BGR2HSV)
+            self.conversions += 1
+        return hsv
+
+    def prepare(self) -> 'ScreenFrame':
+        """Выполнить HSV-преобразование всех областей заранее (например, для замера времени)"""
+        for block in self.hsv_blocks:
+            self.block_hsv(block)
+        return self
+
+    def bgr_region(self, region: Region) -> np.ndarray:
+        """BGR-область без копирования"""
+        if isinstance(region, LayoutRegion) and region.x + region.w <= self.width \
+                and region.y + region.h <= self.height:
+            return self.bgr[region.slices]
+        x0, y0, x1, y1 = self.clip(region)
+        return self.bgr[y0:y1, x0:x1]
+
+    def hsv(self, region: Region) -> np.ndarray:
+        """HSV-область без копирования (view в буфер содержащего ее прямоугольника)"""
+        x0, y0, x1, y1 = self.clip(region)
+        for block in self.hsv_blocks:
+            bx0, by0, bx1, by1 = block
+            if bx0 <= x0 and by0 <= y0 and x1 <= bx1 and y1 <= by1:
+                return self.block_hsv(block)[y0 - by0:y1 - by0, x0 - bx0:x1 - bx0]
+
+        # Область вне известных прямоугольников - конвертируем отдельно и кэшируем
+        return self.block_hsv((x0, y0, x1, y1))
@@ -0,0 +1,236 @@
+"""
+Раскладка экрана: области, зоны леса и кнопки профиля под конкретное разрешение
+"""
+
+import hashlib
+import json
+import os
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import Dict, Mapping, NamedTuple, Optional, Tuple
+
+from config import JUNGLE_ZONES, SCREEN_PROFILES
+from template_matcher import skill_indicators_region
+
+LAYOUT_VERSION = 1
+
+# Разрешение, для которого заданы JUNGLE_ZONES и центральная область
+BASE_RESOLUTION = (1920, 1080)
+CENTER_SCREEN_SIZE = 400
+
+# Области профиля: имя в раскладке -> ключ в SCREEN_PROFILES
+PROFILE_REGIONS = {
+    'minimap': 'minimap_region',
+    'health_bar': 'health_bar',
+    'mana_bar': 'mana_bar',
+    'gold_area': 'gold_area',
+    'level_area': 'level_area',
+    'chat_region': 'chat_region',
+}
+
+SKILL_NAMES = ('s1', 's2', 's3', 'ult')
+
+Point = Tuple[int, int]
+
+
+class Region(NamedTuple):
+    """Область (x, y, w, h), уже обрезанная по кадру"""
+    x: int
+    y: int
+    w: int
+    h: int
+
+    @property
+    def bounds(self) -> Tuple[int, int, int, int]:
+        """(x0, y0, x1, y1)"""
+        return self.x, self.y, self.x + self.w, self.y + self.h
+
+    @property
+    def slices(self) -> Tuple[slice, slice]:
+        """Срезы для индексации кадра: image[region.slices]"""
+        return slice(self.y, self.y + self.h), slice(self.x, self.x + self.w)
+
+
+def nearest_profile(screen_size: Tuple[int, int], profiles: Dict = SCREEN_PROFILES) -> Tuple[int, int]:
+    """Ближайшее разрешение из профилей"""
+    return min(profiles, key=lambda r: abs(r[0] - screen_size[0]) + abs(r[1] - screen_size[1]))
+
+
+def clip_region(region: Tuple[int, int, int, int], screen_size: Tuple[int, int]) -> Region:
+    """Обрезка области по кадру"""
+    width, height = screen_size
+    x, y, w, h = region
+    x0, y0 = min(max(int(x), 0), width), min(max(int(y), 0), height)
+    x1, y1 = min(max(int(x + w), x0), width), min(max(int(y + h), y0), height)
+    return Region(x0, y0, x1 - x0, y1 - y0)
+
+
+@dataclass(frozen=True)
+class ScreenLayout:
+    """Проверенная раскладка для одного разрешения (только чтение)"""
+    resolution: Tuple[int, int]
+    profile: Tuple[int, int]            # разрешение профиля, от которого пересчитано
+    regions: Mapping[str, Region]
+    jungle_zones: Tuple[Region, ...]
+    joystick_center: Point
+    joystick_radius: int
+    attack_button: Point
+    skill_buttons: Mapping[str, Point]
+
+    # Готовые срезы для детекторов
+    slices: Mapping[str, Tuple[slice, slice]] = field(init=False, repr=False, compare=False)
+    zone_slices: Tuple[Tuple[slice, slice], ...] = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, 'regions', MappingProxyType(dict(self.regions)))
+        object.__setattr__(self, 'skill_buttons', MappingProxyType(dict(self.skill_buttons)))
+        object.__setattr__(self, 'jungle_zones', tuple(self.jungle_zones))
+        object.__setattr__(self, 'slices', MappingProxyType(
+            {name: region.slices for name, region in self.regions.items()}
+        ))
+        object.__setattr__(self, 'zone_slices', tuple(zone.slices for zone in self.jungle_zones))
+
+    def validate(self):
+        """Проверка: области непустые и внутри кадра, кнопки на экране"""
+        width, height = self.resolution
+        for name, region in list(self.regions.items()) + [
+                (f'jungle_zones[{i}]', zone) for i, zone in enumerate(self.jungle_zones)]:
+            x0, y0, x1, y1 = region.bounds
+            if region.w <= 0 or region.h <= 0 or x0 < 0 or y0 < 0 or x1 > width or y1 > height:
+                raise ValueError(f"Область {name} {tuple(region)} вне экрана {width}x{height}")
+
+        buttons = dict(self.skill_buttons, joystick=self.joystick_center, attack=self.attack_button)
+        for name, (x, y) in buttons.items():
+            if not (0 <= x < width and 0 <= y < height):
+                raise ValueError(f"Кнопка {name} ({x}, {y}) вне экрана {width}x{height}")
+
+    def to_dict(self) -> Dict:
+        """Словарь для JSON-кэша"""
+        return {
+            'resolution': list(self.resolution),
+            'profile': list(self.profile),
+            'regions': {name: list(region) for name, region in self.regions.items()},
+            'jungle_zones': [list(zone) for zone in self.jungle_zones],
+            'joystick_center': list(self.joystick_center),
+            'joystick_radius': self.joystick_radius,
+            'attack_button': list(self.attack_button),
+            'skill_buttons': {name: list(point) for name, point in self.skill_buttons.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'ScreenLayout':
+        return cls(
+            resolution=tuple(data['resolution']),
+            profile=tuple(data['profile']),
+            regions={name: Region(*region) for name, region in data['regions'].items()},
+            jungle_zones=tuple(Region(*zone) for zone in data['jungle_zones']),
+            joystick_center=tuple(data['joystick_center']),
+            joystick_radius=data['joystick_radius'],
+            attack_button=tuple(data['attack_button']),
+            skill_buttons={name: tuple(point) for name, point in data['skill_buttons'].items()},
+        )
+
+
+def anchor(value: float, profile_extent: int, screen_extent: int, scale: float,
+           edge: Optional[str] = None) -> float:
+    """Координата на экране: элементы прижаты к ближайшему краю или к центру
+
+    Интерфейс масштабируется одинаково по обеим осям, поэтому на экране с другим
+    соотношением сторон кнопки у правого края остаются у правого края.
+    """
+    if edge is None:
+        edge = ('start' if value < profile_extent / 3 else
+                'end' if value > profile_extent * 2 / 3 else 'center')
+    if edge == 'start':
+        return value * scale
+    if edge == 'end':
+        return screen_extent - (profile_extent - value) * scale
+    return screen_extent / 2 + (value - profile_extent / 2) * scale
+
+
+def compile_layout(screen_size: Tuple[int, int], profiles: Dict = SCREEN_PROFILES) -> ScreenLayout:
+    """Пересчет ближайшего профиля под разрешение с обрезкой и проверкой"""
+    width, height = screen_size
+    profile_size = nearest_profile(screen_size, profiles)
+    profile = profiles[profile_size]
+
+    def scale_from(source: Tuple[int, int]) -> float:
+        return min(width / source[0], height / source[1])
+
+    def point(p, source: Tuple[int, int] = profile_size, edge: Optional[str] = None) -> Point:
+        scale = scale_from(source)
+        x = round(anchor(p[0], source[0], width, scale, edge))
+        y = round(anchor(p[1], source[1], height, scale, edge))
+        return min(max(x, 0), width - 1), min(max(y, 0), height - 1)
+
+    def rect(r, source: Tuple[int, int] = profile_size, edge: Optional[str] = None) -> Region:
+        x, y, w, h = r
+        scale = scale_from(source)
+        sw, sh = round(w * scale), round(h * scale)
+        cx = anchor(x + w / 2, source[0], width, scale, edge)
+        cy = anchor(y + h / 2, source[1], height, scale, edge)
+        return clip_region((round(cx - sw / 2), round(cy - sh / 2), sw, sh), screen_size)
+
+    skill_buttons = {name: point(p) for name, p in profile['skill_buttons'].items()}
+
+    regions = {name: rect(profile[key]) for name, key in PROFILE_REGIONS.items() if key in profile}
+    side = CENTER_SCREEN_SIZE
+    regions['center_screen'] = rect(((BASE_RESOLUTION[0] - side) // 2, (BASE_RESOLUTION[1] - side) // 2,
+                                     side, side), BASE_RESOLUTION, 'center')
+    regions['skill_indicators'] = Region(*skill_indicators_region(
+        {name: skill_buttons[name] for name in SKILL_NAMES if name in skill_buttons},
+        screen_size, int(height * 0.065)
+    ))
+
+    # Зоны леса - участки игрового мира вокруг героя в центре экрана
+    jungle_zones = tuple(rect(zone, BASE_RESOLUTION, 'center') for zone in JUNGLE_ZONES)
+
+    layout = ScreenLayout(
+        resolution=(width, height),
+        profile=profile_size,
+        regions=regions,
+        jungle_zones=jungle_zones,
+        joystick_center=point(profile['joystick_center']),
+        joystick_radius=max(1, round(profile['joystick_radius'] * scale_from(profile_size))),
+        attack_button=point(profile['attack_button']),
+        skill_buttons=skill_buttons,
+    )
+    layout.validate()
+    return layout
+
+
+def layout_signature(screen_size: Tuple[int, int], profiles: Dict = SCREEN_PROFILES) -> str:
+    """Отпечаток исходных данных раскладки (профиль, зоны леса, версия)"""
+    profile_size = nearest_profile(screen_size, profiles)
+    source = repr((LAYOUT_VERSION, tuple(screen_size), profile_size,
+                   sorted(profiles[profile_size].items()), JUNGLE_ZONES))
+    return hashlib.sha1(source.encode('utf-8')).hexdigest()
+
+
+def load_layout(screen_size: Tuple[int, int], cache_dir: Optional[str] = 'data/layouts',
+                profiles: Dict = SCREEN_PROFILES) -> ScreenLayout:
+    """Раскладка из кэша на диске (или компиляция и сохранение в кэш)"""
+    screen_size = (int(screen_size[0]), int(screen_size[1]))
+    signature = layout_signature(screen_size, profiles)
+    path = os.path.join(cache_dir, f"{screen_size[0]}x{screen_size[1]}.json") if cache_dir else None
+
+    if path and os.path.exists(path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('signature') == signature:
+                layout = ScreenLayout.from_dict(data['layout'])
+                layout.validate()
+                return layout
+        except Exception as e:
+            print(f"⚠️ Ошибка загрузки раскладки {path}: {e}")
+
+    layout = compile_layout(screen_size, profiles)
+    if path:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump({'signature': signature, 'layout': layout.to_dict()}, f, indent=2)
+        except Exception as e:
+            print(f"⚠️ Ошибка сохранения раскладки {path}: {e}")
+    return layout
@@ -0,0 +1,224 @@
+"""
+Шаблоны интерфейса: загрузка, масштабирование под разрешение и поиск
+"""
+
+import os
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Optional, Tuple
+
+import cv2
+import numpy as np
+
+Region = Tuple[int, int, int, int]
+
+
+@dataclass
+class Template:
+    """Шаблон, масштабированный под разрешение"""
+    name: str
+    image: np.ndarray              # BGR
+    mask: Optional[np.ndarray]     # 8 бит, из альфа-канала PNG (None - весь шаблон)
+
+    energy: float = field(init=False)  # сумма квадратов пикселей под маской
+
+    def __post_init__(self):
+        self.energy = cv2.norm(self.image, cv2.NORM_L2SQR, mask=self.mask)
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        return self.image.shape[1], self.image.shape[0]
+
+
+def skill_indicators_region(skill_buttons: Dict[str, Tuple[int, int]],
+                            screen_size: Tuple[int, int], padding: int) -> Region:
+    """Область (x, y, w, h), охватывающая иконки всех кнопок скиллов"""
+    xs = [x for x, _ in skill_buttons.values()]
+    ys = [y for _, y in skill_buttons.values()]
+    x0, y0 = max(0, min(xs) - padding), max(0, min(ys) - padding)
+    x1 = min(screen_size[0], max(xs) + padding)
+    y1 = min(screen_size[1], max(ys) + padding)
+    return x0, y0, x1 - x0, y1 - y0
+
+
+def match_template(image: np.ndarray, template: Template) -> Tuple[float, Tuple[int, int]]:
+    """Лучшее совпадение шаблона: (оценка 0-1, левый верхний угол)
+
+    TM_SQDIFF_NORMED, а не корреляция: нормированная корреляция не отличает
+    затемненную иконку (скилл на перезарядке) от обычной.
+    """
+    width, height = template.size
+    if image.shape[0] < height or image.shape[1] < width:
+        return 0.0, (0, 0)
+
+    result = cv2.matchTemplate(image, template.image, cv2.TM_SQDIFF_NORMED, mask=template.mask)
+    if template.mask is not None:
+        # Черные участки под маской дают деление на ноль
+        np.nan_to_num(result, copy=False, nan=1.0, posinf=1.0, neginf=1.0)
+    min_val, _, min_loc, _ = cv2.minMaxLoc(result)
+    return max(0.0, 1.0 - min_val), min_loc
+
+
+def template_score(patch: np.ndarray, template: Template) -> float:
+    """Оценка совпадения в одной позиции (та же метрика, что у match_template)"""
+    if patch.shape != template.image.shape:
+        return 0.0
+    patch_energy = cv2.norm(patch, cv2.NORM_L2SQR, mask=template.mask)
+    denominator = float(np.sqrt(patch_energy * template.energy))
+    if denominator <= 0:
+        return 0.0
+    difference = cv2.norm(patch, template.image, cv2.NORM_L2SQR, mask=template.mask)
+    return max(0.0, 1.0 - difference / denominator)
+
+
+class TemplateCache:
+    """PNG-шаблоны: файл читается один раз, масштабированные копии - в LRU-кэше"""
+
+    def __init__(self, template_dir: str = 'templates',
+                 base_resolution: Tuple[int, int] = (1920, 1080), max_entries: int = 32):
+        self.template_dir = template_dir
+        self.base_resolution = tuple(base_resolution)
+        self.max_entries = max(1, max_entries)
+
+        self._sources: Dict[str, Optional[Tuple[np.ndarray, Optional[np.ndarray]]]] = {}
+        self._scaled: "OrderedDict[Tuple[str, Tuple[int, int]], Template]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def load(self, name: str) -> Optional[Tuple[np.ndarray, Optional[np.ndarray]]]:
+        """Исходный шаблон (BGR, маска) или None, если файла нет"""
+        if name not in self._sources:
+            path = os.path.join(self.template_dir, name)
+            image = cv2.imread(path, cv2.IMREAD_UNCHANGED) if os.path.exists(path) else None
+
+            if image is None:
+                print(f"⚠️ Шаблон не найден: {path}")
+                self._sources[name] = None
+            else:
+                mask = None
+                if image.ndim == 2:
+                    image = cv2.cvtColor(image, cv2.COLOR_GRAY2BGR)
+                elif image.shape[2] == 4:
+                    mask = np.ascontiguousarray(image[:, :, 3])
+                    image = cv2.cvtColor(image, cv2.COLOR_BGRA2BGR)
+                self._sources[name] = (image, mask)
+
+        return self._sources[name]
+
+    def scale_for(self, resolution: Tuple[int, int]) -> float:
+        """Масштаб шаблонов для разрешения относительно base_resolution"""
+        return min(resolution[0] / self.base_resolution[0],
+                   resolution[1] / self.base_resolution[1])
+
+    def get(self, name: str, resolution: Tuple[int, int]) -> Optional[Template]:
+        """Шаблон под разрешение (None, если файла нет)"""
+        key = (name, tuple(resolution))
+        template = self._scaled.get(key)
+        if template is not None:
+            self._scaled.move_to_end(key)
+            self.hits += 1
+            return template
+
+        self.misses += 1
+        source = self.load(name)
+        if source is None:
+            return None
+
+        image, mask = source
+        scale = self.scale_for(resolution)
+        if abs(scale - 1.0) > 1e-3:
+            size = (max(1, round(image.shape[1] * scale)), max(1, round(image.shape[0] * scale)))
+            interpolation = cv2.INTER_AREA if scale < 1.0 else cv2.INTER_LINEAR
+            image = cv2.resize(image, size, interpolation=interpolation)
+            if mask is not None:
+                mask = cv2.resize(mask, size, interpolation=cv2.INTER_NEAREST)
+
+        template = Template(name, image, mask)
+        self._scaled[key] = template
+        while len(self._scaled) > self.max_entries:
+            self._scaled.popitem(last=False)
+        return template
+
+    def prescale(self, names: Iterable[str], resolutions: Iterable[Tuple[int, int]]):
+        """Заранее подготовить шаблоны под разрешения (например, SCREEN_PROFILES)"""
+        for resolution in resolutions:
+            for name in names:
+                self.get(name, resolution)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Статистика кэша"""
+        return {
+            'loaded': sum(1 for source in self._sources.values() if source is not None),
+            'missing': sum(1 for source in self._sources.values() if source is None),
+            'scaled': len(self._scaled),
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+
+class SkillCooldownDetector:
+    """Готовность скиллов по шаблонам иконок в области skill_indicators
+
+    Иконка ищется (вокруг ожидаемой кнопки или по всей области), пока скилл
+    не будет найден готовым; дальше оценивается только найденное место.
+    Скилл на перезарядке затемнен и с шаблоном не совпадает.
+    """
+
+    def __init__(self, cache: TemplateCache, skill_templates: Dict[str, str],
+                 resolution: Tuple[int, int], threshold: float = 0.8,
+                 expected_centers: Optional[Dict[str, Tuple[int, int]]] = None,
+                 search_margin: int = 20):
+        self.cache = cache
+        self.skill_templates = dict(skill_templates)
+        self.resolution = tuple(resolution)
+        self.threshold = threshold
+        self.expected_centers = dict(expected_centers or {})
+        self.search_margin = search_margin
+
+        self.anchors: Dict[str, Tuple[int, int]] = {}
+        self.scores: Dict[str, float] = {}
+
+    def detect(self, image: np.ndarray) -> Dict[str, bool]:
+        """Готовность скиллов по BGR-изображению области skill_indicators"""
+        ready = {}
+        for skill, filename in self.skill_templates.items():
+            template = self.cache.get(filename, self.resolution)
+            if template is None:
+                # Без шаблона готовность не проверить - считаем готовым
+                ready[skill] = True
+                continue
+
+            width, height = template.size
+            anchor = self.anchors.get(skill)
+            if anchor is not None:
+                x, y = anchor
+                score = template_score(image[y:y + height, x:x + width], template)
+            else:
+                score, (x, y) = self.locate(image, skill, template)
+                if score >= self.threshold:
+                    self.anchors[skill] = (x, y)
+
+            self.scores[skill] = score
+            ready[skill] = score >= self.threshold
+
+        return ready
+
+    def locate(self, image: np.ndarray, skill: str,
+               template: Template) -> Tuple[float, Tuple[int, int]]:
+        """Поиск иконки около ожидаемой кнопки (или по всей области)"""
+        center = self.expected_centers.get(skill)
+        if center is None:
+            return match_template(image, template)
+
+        width, height = template.size
+        x0 = max(0, center[0] - width // 2 - self.search_margin)
+        y0 = max(0, center[1] - height // 2 - self.search_margin)
+        x1 = center[0] + (width + 1) // 2 + self.search_margin
+        y1 = center[1] + (height + 1) // 2 + self.search_margin
+        score, (x, y) = match_template(image[y0:y1, x0:x1], template)
+        return score, (x0 + x, y0 + y)
+
+    def reset(self):
+        """Забыть найденные места иконок (например, после смены разрешения)"""
+        self.anchors.clear()
+        self.scores.clear()
@@ -0,0 +1,315 @@
+"""
+Обучение DQN в отдельном процессе: опыты и веса передаются через общую память
+"""
+
+import multiprocessing as mp
+import time
+from multiprocessing import shared_memory
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+
+class SharedExperienceQueue:
+    """Кольцо опытов в общей памяти: один писатель (игра) и один читатель (тренер)
+
+    Счетчики записанных и прочитанных опытов лежат в той же памяти. Писатель
+    никогда не ждет: при полном кольце опыт отбрасывается и учитывается в
+    dropped - признак того, что тренер не успевает.
+    """
+
+    def __init__(self, capacity: int, state_size: int, name: Optional[str] = None):
+        self.capacity = capacity
+        self.state_size = state_size
+        self.owner = name is None
+
+        layout = [('counters', np.int64, (2,)),
+                  ('states', np.float32, (capacity, state_size)),
+                  ('next_states', np.float32, (capacity, state_size)),
+                  ('actions', np.int64, (capacity,)),
+                  ('rewards', np.float32, (capacity,)),
+                  ('dones', np.bool_, (capacity,))]
+        size = sum(int(np.prod(shape)) * np.dtype(dtype).itemsize for _, dtype, shape in layout)
+        self.shm = (shared_memory.SharedMemory(create=True, size=size) if self.owner
+                    else shared_memory.SharedMemory(name=name))
+
+        offset = 0
+        for field, dtype, shape in layout:
+            view = np.ndarray(shape, dtype=dtype, buffer=self.shm.buf, offset=offset)
+            setattr(self, field, view)
+            offset += view.nbytes
+        if self.owner:
+            self.counters[:] = 0
+        self.dropped = 0
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @property
+    def depth(self) -> int:
+        """Опытов в очереди (записано, но не прочитано)"""
+        return int(self.counters[0] - self.counters[1])
+
+    def push(self, state: np.ndarray, action: int, reward: float,
+             next_state: np.ndarray, done: bool) -> bool:
+        """Записать опыт (False - кольцо полно, опыт отброшен)"""
+        written = int(self.counters[0])
+        if written - int(self.counters[1]) >= self.capacity:
+            self.dropped += 1
+            return False
+        i = written % self.capacity
+        self.states[i] = state
+        self.next_states[i] = next_state
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.dones[i] = done
+        # Счетчик сдвигается после записи - читатель не увидит неполный опыт
+        self.counters[0] = written + 1
+        return True
+
+    def pop_into(self, buffer) -> int:
+        """Перенести все новые опыты в буфер воспроизведения; возвращает их число"""
+        read, written = int(self.counters[1]), int(self.counters[0])
+        count = written - read
+        if count <= 0:
+            return 0
+        indices = (read + np.arange(count)) % self.capacity
+        buffer.extend(self.states[indices], self.actions[indices], self.rewards[indices],
+                      self.next_states[indices], self.dones[indices])
+        self.counters[1] = written
+        return count
+
+    def close(self):
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class SharedWeights:
+    """Веса сети в общей памяти с номером версии
+
+    Один писатель (тренер); чтение защищено счетчиком последовательности:
+    нечетное значение - запись идет, а если счетчик изменился за время
+    копирования, копия повторяется.
+    """
+
+    # Заголовок: seq, версия, шаги обучения, получено опытов, отставание (шагов)
+    # Статистика: последняя потеря, среднее время шага (сек)
+    HEADER_SIZE = 5
+
+    def __init__(self, size: int, name: Optional[str] = None):
+        self.size = size
+        self.owner = name is None
+        header_bytes = self.HEADER_SIZE * 8
+        nbytes = header_bytes + 2 * 8 + size * 4
+        self.shm = (shared_memory.SharedMemory(create=True, size=nbytes) if self.owner
+                    else shared_memory.SharedMemory(name=name))
+        self.header = np.ndarray((self.HEADER_SIZE,), dtype=np.int64, buffer=self.shm.buf)
+        self.stats = np.ndarray((2,), dtype=np.float64, buffer=self.shm.buf, offset=header_bytes)
+        self.weights = np.ndarray((size,), dtype=np.float32, buffer=self.shm.buf,
+                                  offset=header_bytes + 16)
+        if self.owner:
+            self.header[:] = 0
+            self.stats[:] = 0.0
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @property
+    def version(self) -> int:
+        return int(self.header[1])
+
+    def publish(self, weights: np.ndarray, steps: int = 0, consumed: int = 0,
+                loss: float = 0.0, step_time: float = 0.0):
+        """Записать новую версию весов"""
+        self.header[0] += 1
+        self.weights[:] = weights
+        self.header[2] = steps
+        self.header[3] = consumed
+        self.stats[:] = (loss, step_time)
+        self.header[1] += 1
+        self.header[0] += 1
+
+    def read(self, known_version: int = 0) -> Optional[Tuple[int, np.ndarray]]:
+        """Копия весов, если версия новее known_version"""
+        while True:
+            seq = int(self.header[0])
+            if seq % 2:
+                time.sleep(0)
+                continue
+            version = int(self.header[1])
+            if version <= known_version:
+                return None
+            weights = self.weights.copy()
+            if int(self.header[0]) == seq:
+                return version, weights
+
+    def report_backlog(self, backlog: int):
+        """Сколько шагов обучения тренер должен, но еще не сделал"""
+        self.header[4] = backlog
+
+    def progress(self) -> Dict[str, float]:
+        """Шаги, опыты, отставание и потеря по данным тренера"""
+        return {'steps': int(self.header[2]), 'consumed': int(self.header[3]),
+                'backlog': int(self.header[4]),
+                'loss': float(self.stats[0]), 'step_time': float(self.stats[1])}
+
+    def close(self):
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+def trainer_main(settings: Dict, queue_name: str, weights_name: str, stop_event):
+    """Цикл процесса-тренера: опыты -> буфер -> шаги обучения -> публикация весов"""
+    from learning_engine import NeuralNetworkModel, soft_update, train_step
+    from replay_buffer import ReplayBuffer
+
+    state_size = settings['state_size']
+    queue = SharedExperienceQueue(settings['queue_capacity'], state_size, name=queue_name)
+    board = SharedWeights(settings['weight_count'], name=weights_name)
+
+    sizes = (state_size, settings['hidden_size'], settings['action_count'])
+    dqn, target_net = NeuralNetworkModel(*sizes), NeuralNetworkModel(*sizes)
+    initial = board.read()
+    if initial is not None:
+        dqn.set_flat_weights(initial[1])
+    target_net.set_flat_weights(dqn.get_flat_weights())
+
+    buffer = ReplayBuffer(settings['replay_capacity'], state_size, prioritized=settings['prioritized'])
+    batch_size = settings['batch_size']
+    steps = consumed = pending = published_steps = 0
+    loss = step_time = 0.0
+    last_publish = time.time()
+
+    try:
+        while not stop_event.is_set():
+            new = queue.pop_into(buffer)
+            consumed += new
+            pending += new
+
+            # Шаг обучения на каждые train_every новых опытов; долг сверх
+            # max_backlog шагов списывается (тренер не успевает за игрой)
+            train_every = settings['train_every']
+            pending = min(pending, train_every * settings['max_backlog'])
+            board.report_backlog(pending // train_every)
+
+            trained = False
+            if len(buffer) >= batch_size and pending >= train_every:
+                pending -= train_every
+                start = time.perf_counter()
+                loss = train_step(dqn, target_net, buffer, batch_size, settings['gamma'])
+                soft_update(target_net, dqn, settings['target_tau'])
+                elapsed = time.perf_counter() - start
+                step_time = elapsed if not steps else 0.9 * step_time + 0.1 * elapsed
+                steps += 1
+                trained = True
+
+            if steps > published_steps and time.time() - last_publish >= settings['publish_interval']:
+                board.publish(dqn.get_flat_weights(), steps, consumed, loss, step_time)
+                published_steps, last_publish = steps, time.time()
+
+            if not new and not trained:
+                stop_event.wait(0.01)
+
+        if steps > published_steps:
+            board.publish(dqn.get_flat_weights(), steps, consumed, loss, step_time)
+    finally:
+        queue.close()
+        board.close()
+
+
+class TrainerProcess:
+    """Процесс-тренер со стороны игры: отправка опытов и прием весов
+
+    Игровой цикл только пишет опыты в кольцо и забирает опубликованные веса -
+    обучение (прямой и обратный проход) идет в отдельном процессе.
+    """
+
+    def __init__(self, state_size: int, hidden_size: int, action_count: int, weight_count: int,
+                 batch_size: int = 32, gamma: float = 0.95, prioritized: bool = False,
+                 replay_capacity: int = 10000, queue_capacity: int = 4096,
+                 publish_interval: float = 2.0, train_every: int = 4, max_backlog: int = 64,
+                 target_tau: float = 0.001):
+        self.settings = {
+            'state_size': state_size, 'hidden_size': hidden_size, 'action_count': action_count,
+            'weight_count': weight_count, 'batch_size': batch_size, 'gamma': gamma,
+            'prioritized': prioritized, 'replay_capacity': replay_capacity,
+            'queue_capacity': queue_capacity, 'publish_interval': publish_interval,
+            'train_every': train_every, 'max_backlog': max_backlog, 'target_tau': target_tau,
+        }
+        self.queue = SharedExperienceQueue(queue_capacity, state_size)
+        self.board = SharedWeights(weight_count)
+        self.version = 0
+        self.pushed = 0
+        self.process = None
+        self._context = mp.get_context('spawn')
+        self._stop_event = self._context.Event()
+        self._last_warning = 0.0
+        self._closed = False
+
+    def start(self, initial_weights: Optional[np.ndarray] = None):
+        """Запуск процесса (начальные веса - от загруженной модели)"""
+        if initial_weights is not None:
+            self.board.publish(initial_weights)
+            self.version = self.board.version
+        self.process = self._context.Process(
+            target=trainer_main,
+            args=(self.settings, self.queue.name, self.board.name, self._stop_event),
+            name="dqn-trainer",
+            daemon=True
+        )
+        self.process.start()
+        print(f"🏋️ Тренер нейросети запущен в отдельном процессе (pid {self.process.pid})")
+
+    @property
+    def alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+    def push(self, experience: Tuple) -> bool:
+        """Отправить опыт тренеру (не блокирует; при отставании опыт отбрасывается)"""
+        accepted = self.queue.push(*experience)
+        if accepted:
+            self.pushed += 1
+        else:
+            now = time.time()
+            if now - self._last_warning > 10.0:
+                self._last_warning = now
+                print(f"⚠️ Тренер не успевает: отброшено {self.queue.dropped} опытов, "
+                      f"в очереди {self.queue.depth}")
+        return accepted
+
+    def latest_weights(self) -> Optional[np.ndarray]:
+        """Новые веса от тренера (None, если новых нет)"""
+        update = self.board.read(self.version)
+        if update is None:
+            return None
+        self.version, weights = update
+        return weights
+
+    def get_stats(self) -> Dict:
+        """Очередь, отброшенные опыты, шаги тренера и версия весов"""
+        progress = self.board.progress()
+        return dict(progress, pushed=self.pushed, queued=self.queue.depth,
+                    dropped=self.queue.dropped, version=self.version,
+                    behind=(self.queue.depth > self.queue.capacity // 2
+                            or progress['backlog'] >= self.settings['max_backlog'] // 2),
+                    alive=self.alive)
+
+    def stop(self, timeout: float = 5.0) -> Optional[np.ndarray]:
+        """Остановка процесса и освобождение общей памяти; возвращает последние новые веса"""
+        if self._closed:
+            return None
+        self._closed = True
+        if self.process is not None:
+            self._stop_event.set()
+            self.process.join(timeout)
+            if self.process.is_alive():
+                self.process.terminate()
+            self.process = None
+        weights = self.latest_weights()
+        self.queue.close()
+        self.board.close()
+        return weights
@@ -20,14 +20,23 @@ def calculate_angle(from_pos: Tuple[int, int], to_pos: Tuple[int, int]) -> float
     dy = to_pos[1] - from_pos[1]
     return math.degrees(math.atan2(dy, dx)) % 360
 
+# Размер экрана, заданный вручную (симулятор, воспроизведение кадров)
+_screen_size_override = None
+
+def set_screen_size(size):
+    """Задать размер экрана вместо pyautogui.size() (None - сбросить)"""
+    global _screen_size_override
+    _screen_size_override = tuple(size) if size else None
+
 def get_screen_center() -> Tuple[int, int]:
     """Получение центра экрана"""
-    import pyautogui
-    screen_width, screen_height = pyautogui.size()
+    screen_width, screen_height = get_screen_size()
     return (screen_width // 2, screen_height // 2)
 
 def get_screen_size() -> Tuple[int, int]:
     """Получение размера экрана"""
+    if _screen_size_override is not None:
+        return _screen_size_override
     import pyautogui
     return pyautogui.size()
 
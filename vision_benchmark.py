@@ -0,0 +1,242 @@
+"""
+Офлайн-бенчмарк движков зрения на записанном корпусе кадров
+
+Запуск (без дисплея):
+    python vision_benchmark.py <папка_корпуса> [--repeat 3] [--save run.json] [--baseline prev.json]
+"""
+
+import argparse
+import json
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from capture_backend import FileCaptureBackend
+from frame_recorder import iter_corpus, load_meta
+from screen_layout import compile_layout
+
+
+def default_skill_buttons(width: int, height: int) -> Dict:
+    """Кнопки скиллов как в HayabusaBot.init_screen_components"""
+    return dict(compile_layout((width, height)).skill_buttons)
+
+
+def default_screen_regions(width: int, height: int) -> Dict:
+    """Области экрана как в HayabusaBot.init_screen_components"""
+    return dict(compile_layout((width, height)).regions)
+
+
+class DetectorTimer:
+    """Сбор времени работы детекторов"""
+
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = defaultdict(list)
+
+    def run(self, name: str, func: Callable, *args):
+        start_time = time.perf_counter()
+        result = func(*args)
+        self.samples[name].append(time.perf_counter() - start_time)
+        return result
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        result = {}
+        for name, values in self.samples.items():
+            arr = np.array(values) * 1000.0
+            result[name] = {
+                'count': len(values),
+                'avg_ms': float(arr.mean()),
+                'p50_ms': float(np.percentile(arr, 50)),
+                'p99_ms': float(np.percentile(arr, 99)),
+            }
+        return result
+
+
+def object_record(obj) -> Dict:
+    """Сокращенная запись объекта для сравнения"""
+    if isinstance(obj, dict):
+        return {'type': obj.get('type'), 'position': list(obj.get('position', (0, 0)))}
+    return {'type': obj.type, 'position': list(obj.position)}
+
+
+def diff_detections(reference: List[Dict], current: List[Dict], tolerance: float = 10.0) -> Dict[str, int]:
+    """Сопоставление детекций по типу и расстоянию"""
+    unmatched = list(reference)
+    matched = 0
+    for obj in current:
+        for i, ref in enumerate(unmatched):
+            if ref['type'] != obj['type']:
+                continue
+            dx = ref['position'][0] - obj['position'][0]
+            dy = ref['position'][1] - obj['position'][1]
+            if dx * dx + dy * dy <= tolerance * tolerance:
+                unmatched.pop(i)
+                matched += 1
+                break
+    return {
+        'matched': matched,
+        'missing': len(unmatched),
+        'extra': len(current) - matched,
+    }
+
+
+def make_vision_engine(meta: Dict, size: Tuple[int, int], corpus_dir: str):
+    """VisionEngine с областями из корпуса"""
+    from vision_engine import VisionEngine
+
+    regions = meta.get('screen_regions') or default_screen_regions(*size)
+    regions = {k: tuple(v) if not isinstance(v[0], (list, tuple)) else [tuple(r) for r in v]
+               for k, v in regions.items()}
+    engine = VisionEngine(regions, capture_backend=FileCaptureBackend(corpus_dir, loop=False))
+    if meta.get('jungle_zones'):
+        engine.jungle_zones = [tuple(z) for z in meta['jungle_zones']]
+    else:
+        engine.jungle_zones = list(compile_layout(size).jungle_zones)
+    return engine
+
+
+def make_v2_bot(size: Tuple[int, int]):
+    """HayabusaVisionBot без калибровки, потоков и ввода (только зрение)"""
+    try:
+        import mlbb_bot
+    except Exception as e:
+        print(f"⚠️ HayabusaVisionBot пропущен: {e}")
+        return None
+
+    bot = mlbb_bot.HayabusaVisionBot.__new__(mlbb_bot.HayabusaVisionBot)
+    bot.state = mlbb_bot.GameState()
+    bot.stats = {'errors': 0}
+    bot.skill_buttons = default_skill_buttons(*size)
+    bot.template_cache = mlbb_bot.TemplateCache()
+    bot.init_improved_vision(size)
+    return bot
+
+
+def bench_vision_engine(engine, frames, timer: DetectorTimer) -> Dict[str, List[Dict]]:
+    detections = {}
+    for name, frame, _ in frames:
+        start_time = time.perf_counter()
+        screen = timer.run('frame_hsv', lambda f: engine.make_frame(f).prepare(), frame)
+        objects = timer.run('center', engine.detect_objects_in_center, screen)
+        objects += timer.run('jungle', engine.search_jungle_areas, screen)
+        timer.run('minimap', engine.analyze_minimap, screen)
+        timer.run('interface', engine.analyze_interface, screen)
+        timer.samples['total'].append(time.perf_counter() - start_time)
+        detections[name] = [object_record(obj) for obj in objects]
+    return detections
+
+
+def bench_v2_bot(bot, frames, timer: DetectorTimer) -> Dict[str, List[Dict]]:
+    detections = {}
+    for name, frame, _ in frames:
+        start_time = time.perf_counter()
+        objects = timer.run('detect_objects_v2', bot.detect_objects_v2, frame)
+        timer.run('analyze_safety', bot.analyze_safety, frame)
+        timer.samples['total'].append(time.perf_counter() - start_time)
+        detections[name] = [object_record(obj) for obj in objects]
+    return detections
+
+
+def summarize_diff(reference: Dict[str, List[Dict]], current: Dict[str, List[Dict]]) -> Dict[str, int]:
+    total = {'frames': 0, 'changed_frames': 0, 'matched': 0, 'missing': 0, 'extra': 0}
+    for name, objects in current.items():
+        if name not in reference:
+            continue
+        diff = diff_detections(reference[name], objects)
+        total['frames'] += 1
+        total['changed_frames'] += int(diff['missing'] > 0 or diff['extra'] > 0)
+        for key in ('matched', 'missing', 'extra'):
+            total[key] += diff[key]
+    return total
+
+
+def print_report(engine_name: str, timer: DetectorTimer, frames_count: int):
+    summary = timer.summary()
+    total = sum(timer.samples['total'])
+    fps = frames_count / total if total > 0 else 0.0
+    print(f"\n📊 {engine_name}: {frames_count} кадров, {fps:.1f} FPS")
+    print(f"   {'детектор':<20}{'сред.':>10}{'p50':>10}{'p99':>10}")
+    for name, stats in summary.items():
+        print(f"   {name:<20}{stats['avg_ms']:>8.2f}мс{stats['p50_ms']:>8.2f}мс{stats['p99_ms']:>8.2f}мс")
+    return {'fps': fps, 'detectors': summary}
+
+
+def print_diff(title: str, diff: Dict[str, int]):
+    print(f"   🔎 {title}: кадров {diff['frames']}, изменилось {diff['changed_frames']} | "
+          f"совпало {diff['matched']}, пропало {diff['missing']}, новых {diff['extra']}")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Офлайн-бенчмарк движков зрения")
+    parser.add_argument('corpus', help="Папка корпуса (FrameRecorder или PNG-скриншоты)")
+    parser.add_argument('--engines', default='vision,v2', help="vision, v2 или оба через запятую")
+    parser.add_argument('--repeat', type=int, default=1, help="Сколько раз прогнать корпус")
+    parser.add_argument('--limit', type=int, default=0, help="Ограничение числа кадров")
+    parser.add_argument('--save', help="Сохранить результаты в JSON")
+    parser.add_argument('--baseline', help="JSON предыдущего прогона для сравнения")
+    args = parser.parse_args(argv)
+
+    # Кадры загружаются заранее, чтобы не мерить диск
+    frames = list(iter_corpus(args.corpus))
+    if args.limit:
+        frames = frames[:args.limit]
+    if not frames:
+        print(f"❌ В корпусе {args.corpus} нет кадров")
+        return 1
+
+    height, width = frames[0][1].shape[:2]
+    meta = load_meta(args.corpus)
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    engines = [e.strip() for e in args.engines.split(',') if e.strip()]
+    report = {'corpus': args.corpus, 'frames': len(frames), 'engines': {}}
+
+    for engine_name in engines:
+        timer = DetectorTimer()
+        if engine_name == 'vision':
+            engine = make_vision_engine(meta, (width, height), args.corpus)
+            for _ in range(args.repeat):
+                detections = bench_vision_engine(engine, frames, timer)
+        elif engine_name == 'v2':
+            bot = make_v2_bot((width, height))
+            if bot is None:
+                continue
+            for _ in range(args.repeat):
+                detections = bench_v2_bot(bot, frames, timer)
+        else:
+            print(f"⚠️ Неизвестный движок: {engine_name}")
+            continue
+
+        result = print_report(engine_name, timer, len(frames) * args.repeat)
+        result['detections'] = detections
+
+        # Сравнение с анализом, записанным вместе с корпусом
+        if engine_name == 'vision':
+            recorded = {name: [object_record(obj) for obj in analysis.get('objects', [])]
+                        for name, _, analysis in frames if analysis}
+            if recorded:
+                result['diff_recorded'] = summarize_diff(recorded, detections)
+                print_diff("против записанного анализа", result['diff_recorded'])
+
+        # Сравнение с предыдущим прогоном бенчмарка
+        previous = baseline.get('engines', {}).get(engine_name, {}).get('detections')
+        if previous:
+            result['diff_baseline'] = summarize_diff(previous, detections)
+            print_diff("против базового прогона", result['diff_baseline'])
+
+        report['engines'][engine_name] = result
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 Результаты сохранены в {args.save}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -4,18 +4,43 @@
 
 import cv2
 import numpy as np
-import pyautogui
 import time
 import random
-from typing import Tuple, List, Dict
+from typing import Tuple, List, Dict, Optional, Union
 from game_state import GameObject
-from config import COLORS
+from config import COLORS, JUNGLE_ZONES
+from capture_backend import CaptureBackend, RegionCaptureBackend, collect_regions
+from color_lut import ColorLUT, ranges_signature
+from debug_writer import DebugFrameWriter
+from minimap import MinimapTracker
+from profiler import profile_stage
+from screen_frame import ScreenFrame
 from utils import get_screen_center, debug_vision
 
 class VisionEngine:
     """Движок компьютерного зрения с реальным распознаванием"""
     
-    def __init__(self, screen_regions: Dict, debug: bool = False):
+    # (цвет, тип объекта, враг) для центра экрана и зон леса
+    CENTER_DETECTORS = [
+        ('creep', 'creep', False),
+        ('jungle', 'jungle', True),
+        ('enemy', 'hero', True),
+        ('tower', 'tower', True),
+    ]
+    JUNGLE_DETECTORS = [
+        ('jungle', 'jungle', True),
+        ('creep', 'creep', True),
+    ]
+    
+    # Пирамида: запас по площади для кандидатов, поле вокруг них (пикс)
+    # и доля области, выше которой окна кандидатов не выгоднее полного прохода
+    PYRAMID_AREA_SLACK = 2.0
+    PYRAMID_MARGIN = 4
+    PYRAMID_MAX_COVERAGE = 0.5
+    
+    def __init__(self, screen_regions: Dict, debug: bool = False,
+                 capture_backend: Optional[CaptureBackend] = None,
+                 jungle_zones: Optional[List[Tuple[int, int, int, int]]] = None):
         self.screen_regions = screen_regions
         self.debug = debug
         self.last_screenshot = None
@@ -30,57 +55,135 @@ class VisionEngine:
             'tower': ([0, 50, 50], [5, 255, 255]),        # Красный туррели
         }
         
+        # Таблица классов по hsv_ranges (пересобирается при их изменении).
+        # Цвета config в нее не входят: COLORS - BGR-диапазоны, к HSV-кадру
+        # неприменимы, а классы HSV_COLORS детекторы движка не читают
+        # (у мини-карты своя таблица). С ними было бы 11 классов вместо 5 -
+        # 16-битные метки и разметка области примерно на 30% медленнее.
+        self.color_lut: Optional[ColorLUT] = None
+        
+        # Зоны поиска в лесу (из раскладки экрана; по умолчанию - для 1920x1080)
+        self.jungle_zones = list(jungle_zones) if jungle_zones is not None else list(JUNGLE_ZONES)
+        
+        # Источник кадров: по умолчанию копируем только нужные области
+        if capture_backend is None:
+            capture_backend = RegionCaptureBackend(
+                collect_regions(self.screen_regions, self.jungle_zones)
+            )
+        self.capture_backend = capture_backend
+        
+        # Позиция на мини-карте (сетка обновляется только по изменившимся клеткам)
+        self.minimap = MinimapTracker()
+        
+        # Фоновая запись отладочных кадров (настраивается снаружи)
+        self.debug_writer = DebugFrameWriter()
+        
+        # Запись корпуса кадров (FrameRecorder, включается снаружи)
+        self.recorder = None
+        
+        # Отслеживание объектов между кадрами (ObjectTracker, включается снаружи)
+        self.tracker = None
+        
+        # Пропуск неизменившихся областей (RegionChangeGate, включается снаружи)
+        self.change_gate = None
+        
+        # Готовность скиллов по шаблонам (SkillCooldownDetector, включается снаружи)
+        self.skill_detector = None
+        
+        # Распознавание золота и уровня (DigitOCR, включается снаружи)
+        self.digit_reader = None
+        
+        # Замер времени стадий (CycleProfiler, включается снаружи)
+        self.profiler = None
+        
+        # Уровень пирамиды для поиска в центре и в лесу (0 - полное разрешение)
+        self.pyramid_level = 0
+        
+        # Пропуск поиска в зонах леса (включает PerformanceGovernor при нехватке времени)
+        self.skip_jungle = False
+        self.last_analysis_duration = 0.0
+        
         print("👁️ Движок зрения инициализирован")
     
     def capture_screen(self, region=None):
         """Захват экрана"""
         try:
             if region:
+                import pyautogui
                 screenshot = pyautogui.screenshot(region=region)
+                screenshot = cv2.cvtColor(np.array(screenshot), cv2.COLOR_RGB2BGR)
             else:
-                screenshot = pyautogui.screenshot()
-            
-            screenshot = cv2.cvtColor(np.array(screenshot), cv2.COLOR_RGB2BGR)
+                screenshot = self.capture_backend.grab()
+                if screenshot is None:
+                    return None
             
-            if self.debug and random.random() < 0.1:  # 10% шанс сохранить скриншот для отладки
-                timestamp = int(time.time())
-                cv2.imwrite(f"debug_screen_{timestamp}.png", screenshot)
+            if self.debug:
+                # Запись в фоне; лишние кадры отбрасываются бюджетом записи
+                self.debug_writer.submit(screenshot, prefix='debug_screen')
             
             return screenshot
         except Exception as e:
             print(f"⚠️ Ошибка захвата экрана: {e}")
             return None
     
-    def analyze_screen(self) -> Dict:
-        """Полный анализ экрана"""
+    def analyze_screen(self, screen: Optional[np.ndarray] = None) -> Dict:
+        """Полный анализ экрана (или готового кадра, если он передан)"""
         start_time = time.time()
         results = {'objects': [], 'minimap': {}, 'interface': {}}
         
         try:
-            # Захватываем весь экран
-            screen = self.capture_screen()
+            # Захватываем экран
+            if screen is None:
+                with profile_stage(self.profiler, 'vision.capture'):
+                    screen = self.capture_screen()
             if screen is None:
                 return results
             
             self.last_screenshot = screen
             
-            # 1. Обнаружение объектов в центре экрана
-            center_objects = self.detect_objects_in_center(screen)
-            results['objects'] = center_objects
+            # Один HSV-буфер на кадр для всех детекторов
+            frame = self.make_frame(screen)
+            
+            # 1-2. Объекты: полный поиск или только окна вокруг треков
+            full_search = self.tracker is None or self.tracker.needs_full_search()
+            if full_search:
+                # 1. Обнаружение объектов в центре экрана
+                with profile_stage(self.profiler, 'vision.center'):
+                    results['objects'] = list(
+                        self.run_gated('center_screen', frame, self.detect_objects_in_center)
+                    )
+                
+                # 2. Поиск крипов в зонах леса
+                if not self.skip_jungle:
+                    with profile_stage(self.profiler, 'vision.jungle'):
+                        results['objects'].extend(self.search_jungle_areas(frame))
+            else:
+                with profile_stage(self.profiler, 'vision.tracks'):
+                    results['objects'] = self.detect_around_tracks(
+                        frame, self.tracker.search_regions(start_time)
+                    )
             
-            # 2. Поиск крипов в зонах леса
-            jungle_objects = self.search_jungle_areas(screen)
-            results['objects'].extend(jungle_objects)
+            if self.tracker is not None:
+                with profile_stage(self.profiler, 'vision.tracker'):
+                    self.tracker.update(results['objects'], start_time, full_search)
+                results['tracking'] = self.tracker.get_stats()
             
             # 3. Анализ мини-карты
-            results['minimap'] = self.analyze_minimap(screen)
+            with profile_stage(self.profiler, 'vision.minimap'):
+                results['minimap'] = self.run_gated('minimap', frame, self.analyze_minimap)
             
             # 4. Анализ интерфейса
-            results['interface'] = self.analyze_interface(screen)
+            with profile_stage(self.profiler, 'vision.interface'):
+                results['interface'] = self.analyze_interface(frame)
             
             # 5. Время анализа
             results['analysis_time'] = time.time() - start_time
             self.last_analysis_time = time.time()
+            self.last_analysis_duration = results['analysis_time']
+            
+            # Запись кадра в корпус для офлайн-бенчмарка
+            if self.recorder is not None:
+                self.recorder.record(screen, results)
             
             # Отладочный вывод
             if self.debug:
@@ -96,35 +199,42 @@ class VisionEngine:
         
         return results
     
-    def detect_objects_in_center(self, screen: np.ndarray) -> List[GameObject]:
+    def run_gated(self, name: str, frame: ScreenFrame, func):
+        """Анализ области через детектор изменений (если он включен)"""
+        if self.change_gate is None:
+            return func(frame)
+        return self.change_gate.run(name, frame, func)
+    
+    def analysis_regions(self) -> List[Tuple[int, int, int, int]]:
+        """Области кадра, которые читают детекторы"""
+        regions = [self.screen_regions[name]
+                   for name in ('center_screen', 'minimap', 'health_bar')
+                   if name in self.screen_regions]
+        regions.extend(self.jungle_zones)
+        return regions
+    
+    def get_color_lut(self) -> ColorLUT:
+        """Таблица классов, актуальная для текущих hsv_ranges"""
+        if self.color_lut is None or self.color_lut.signature != ranges_signature(self.hsv_ranges):
+            self.color_lut = ColorLUT(self.hsv_ranges)
+        return self.color_lut
+    
+    def make_frame(self, screen: Union[np.ndarray, ScreenFrame]) -> ScreenFrame:
+        """Обертка кадра с общим HSV-буфером"""
+        if isinstance(screen, ScreenFrame):
+            return screen
+        return ScreenFrame(screen, self.analysis_regions())
+    
+    def detect_objects_in_center(self, screen: Union[np.ndarray, ScreenFrame]) -> List[GameObject]:
         """Обнаружение объектов в центральной области"""
         objects = []
         
         try:
-            # Определяем центральную область
-            center_region = self.screen_regions['center_screen']
-            x, y, w, h = center_region
-            
-            # Вырезаем центральную область
-            center_area = screen[y:y+h, x:x+w]
+            frame = self.make_frame(screen)
             
-            # Преобразуем в HSV для лучшего распознавания цветов
-            hsv = cv2.cvtColor(center_area, cv2.COLOR_BGR2HSV)
-            
-            # 1. Поиск крипов (минионов и крипов леса)
-            creep_objects = self.detect_by_color(hsv, 'creep', center_region, 'creep', False)
-            jungle_objects = self.detect_by_color(hsv, 'jungle', center_region, 'jungle', True)
-            
-            objects.extend(creep_objects)
-            objects.extend(jungle_objects)
-            
-            # 2. Поиск вражеских героев
-            enemy_objects = self.detect_by_color(hsv, 'enemy', center_region, 'hero', True)
-            objects.extend(enemy_objects)
-            
-            # 3. Поиск туррелей
-            tower_objects = self.detect_by_color(hsv, 'tower', center_region, 'tower', True)
-            objects.extend(tower_objects)
+            # Крипы, крипы леса, вражеские герои и туррели (CENTER_DETECTORS)
+            center_region = self.screen_regions['center_screen']
+            objects = self.detect_in_region(frame, center_region, self.CENTER_DETECTORS)
             
             # Отладочный вывод
             if self.debug and objects:
@@ -135,90 +245,207 @@ class VisionEngine:
         
         return objects
     
-    def detect_by_color(self, hsv_image: np.ndarray, color_type: str, 
-                       offset: Tuple, obj_type: str, is_enemy: bool) -> List[GameObject]:
-        """Обнаружение объектов по цвету"""
+    def detect_in_region(self, frame: ScreenFrame, region: Tuple[int, int, int, int],
+                         detectors: List[Tuple[str, str, bool]]) -> List[GameObject]:
+        """Все детекторы по области: полный проход или через пирамиду"""
+        hsv = frame.hsv(region)
+        offset = (region[0], region[1])
+        
+        if self.pyramid_level > 0:
+            return self.detect_pyramid(hsv, offset, detectors, self.pyramid_level)
+        
+        # Все цвета размечаются за один проход
+        labels = self.get_color_lut().label(hsv)
         objects = []
+        for color_type, obj_type, is_enemy in detectors:
+            objects.extend(self.detect_by_color(hsv, color_type, offset, obj_type, is_enemy, labels))
+        return objects
+    
+    def detect_pyramid(self, hsv: np.ndarray, offset: Tuple[int, int],
+                       detectors: List[Tuple[str, str, bool]], level: int) -> List[GameObject]:
+        """Грубый поиск кандидатов на уменьшенной копии, уточнение в их окнах"""
+        lut = self.get_color_lut()
+        factor = 1 << level
+        height, width = hsv.shape[:2]
+        margin = self.PYRAMID_MARGIN
         
-        try:
+        # 1. Кандидаты на уровне пирамиды (без морфологии, с запасом по площади)
+        small = cv2.resize(hsv, (max(1, width // factor), max(1, height // factor)),
+                           interpolation=cv2.INTER_NEAREST)
+        small_labels = lut.label(small)
+        candidates = []
+        for index, (color_type, obj_type, _) in enumerate(detectors):
+            stats = self.color_components(small, color_type, obj_type, small_labels,
+                                          level, self.PYRAMID_AREA_SLACK)
+            for left, top, w, h in stats[:, :4].tolist():
+                candidates.append(((max(0, left * factor - margin), max(0, top * factor - margin),
+                                    min(width, (left + w) * factor + margin),
+                                    min(height, (top + h) * factor + margin)), index))
+        if not candidates:
+            return []
+        
+        windows = RegionCaptureBackend.merge_rects([rect for rect, _ in candidates])
+        covered = sum((x1 - x0) * (y1 - y0) for x0, y0, x1, y1 in windows)
+        if covered > width * height * self.PYRAMID_MAX_COVERAGE:
+            # Кандидатов слишком много - дешевле полный проход
+            labels = lut.label(hsv)
+            return [obj for color_type, obj_type, is_enemy in detectors
+                    for obj in self.detect_by_color(hsv, color_type, offset, obj_type, is_enemy, labels)]
+        
+        # 2. Полное разрешение только в окнах кандидатов
+        objects = []
+        for x0, y0, x1, y1 in windows:
+            window = hsv[y0:y1, x0:x1]
+            labels = lut.label(window)
+            window_offset = (offset[0] + x0, offset[1] + y0)
+            indices = sorted({index for (cx0, cy0, cx1, cy1), index in candidates
+                              if cx0 >= x0 and cy0 >= y0 and cx1 <= x1 and cy1 <= y1})
+            
+            for index in indices:
+                color_type, obj_type, is_enemy = detectors[index]
+                stats = self.color_components(window, color_type, obj_type, labels)
+                
+                # Компоненты, обрезанные краем окна внутри области, - части
+                # объектов, не прошедших грубый поиск
+                left = stats[:, cv2.CC_STAT_LEFT]
+                top = stats[:, cv2.CC_STAT_TOP]
+                right = left + stats[:, cv2.CC_STAT_WIDTH]
+                bottom = top + stats[:, cv2.CC_STAT_HEIGHT]
+                cut = (((left == 0) & (x0 > 0)) | ((top == 0) & (y0 > 0)) |
+                       ((right == x1 - x0) & (x1 < width)) | ((bottom == y1 - y0) & (y1 < height)))
+                objects.extend(self.objects_from_stats(stats[~cut], window_offset, obj_type, is_enemy))
+        
+        return objects
+    
+    def area_limits(self, obj_type: str, level: int = 0) -> Tuple[float, float]:
+        """Пороги площади объекта на уровне пирамиды (площадь падает в 4 раза на уровень)"""
+        min_area = 20 if obj_type in ['creep', 'jungle'] else 50
+        max_area = 500 if obj_type in ['creep', 'jungle'] else 1000
+        scale = 4 ** level
+        return min_area / scale, max_area / scale
+    
+    def color_components(self, hsv_image: np.ndarray, color_type: str, obj_type: str,
+                         labels: Optional[np.ndarray] = None, level: int = 0,
+                         slack: float = 1.0) -> np.ndarray:
+        """Статистики компонент цвета (cv2.CC_STAT_*), прошедших фильтр по площади"""
+        # Создаем маску
+        if labels is not None:
+            mask = self.get_color_lut().mask(labels, color_type)
+        else:
             lower, upper = self.hsv_ranges[color_type]
-            lower_np = np.array(lower)
-            upper_np = np.array(upper)
-            
-            # Создаем маску
-            mask = cv2.inRange(hsv_image, lower_np, upper_np)
-            
-            # Улучшаем маску
+            mask = cv2.inRange(hsv_image, np.array(lower), np.array(upper))
+        
+        # Улучшаем маску (на уменьшенных уровнях ядро 3x3 съело бы мелкие объекты)
+        if level == 0:
             kernel = np.ones((3, 3), np.uint8)
             mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
             mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
-            
-            # Находим контуры
-            contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-            
-            for contour in contours:
-                area = cv2.contourArea(contour)
-                
-                # Фильтр по размеру в зависимости от типа объекта
-                min_area = 20 if obj_type in ['creep', 'jungle'] else 50
-                max_area = 500 if obj_type in ['creep', 'jungle'] else 1000
+        
+        # Компоненты связности: площадь, рамка и центр одним вызовом
+        # (16-битные метки быстрее; при 8-связности компонент не больше
+        # четверти пикселей, так что для областей экрана их хватает)
+        height, width = mask.shape[:2]
+        ltype = cv2.CV_16U if (height // 2 + 1) * (width // 2 + 1) < 65535 else cv2.CV_32S
+        _, _, stats, _ = cv2.connectedComponentsWithStats(mask, connectivity=8, ltype=ltype)
+        stats = stats[1:]  # 0 - фон
+        
+        # Фильтр по размеру в зависимости от типа объекта
+        min_area, max_area = self.area_limits(obj_type, level)
+        areas = stats[:, cv2.CC_STAT_AREA]
+        return stats[(areas > min_area / slack) & (areas < max_area * slack)]
+    
+    def objects_from_stats(self, stats: np.ndarray, offset: Tuple, obj_type: str,
+                           is_enemy: bool, factor: int = 1) -> List[GameObject]:
+        """Объекты из статистик компонент (factor - масштаб уровня пирамиды)"""
+        objects = []
+        if len(stats) == 0:
+            return objects
+        
+        x = stats[:, cv2.CC_STAT_LEFT]
+        y = stats[:, cv2.CC_STAT_TOP]
+        w = stats[:, cv2.CC_STAT_WIDTH]
+        h = stats[:, cv2.CC_STAT_HEIGHT]
+        
+        # Центр объекта с учетом смещения
+        centers_x = offset[0] + (x + w // 2) * factor
+        centers_y = offset[1] + (y + h // 2) * factor
+        
+        # Уверенность на основе заполненности рамки
+        solidity = stats[:, cv2.CC_STAT_AREA] / (w * h)
+        confidences = np.minimum(0.95, 0.5 + solidity * 0.5)
+        
+        timestamp = time.time()
+        for center_x, center_y, confidence in zip(centers_x.tolist(), centers_y.tolist(),
+                                                  confidences.tolist()):
+            # Определяем здоровье (случайно для симуляции)
+            health = random.randint(30, 100) if obj_type == 'hero' else 100.0
+            
+            objects.append(GameObject(
+                type=obj_type,
+                position=(center_x, center_y),
+                confidence=confidence,
+                timestamp=timestamp,
+                health=health,
+                is_enemy=is_enemy
+            ))
+        
+        return objects
+    
+    def detect_by_color(self, hsv_image: np.ndarray, color_type: str, 
+                       offset: Tuple, obj_type: str, is_enemy: bool,
+                       labels: Optional[np.ndarray] = None, level: int = 0) -> List[GameObject]:
+        """Обнаружение объектов по цвету (labels - разметка области из get_color_lut,
+        level - уровень пирамиды, на котором уменьшено изображение)"""
+        try:
+            stats = self.color_components(hsv_image, color_type, obj_type, labels, level)
+            return self.objects_from_stats(stats, offset, obj_type, is_enemy, 1 << level)
+        except Exception as e:
+            print(f"⚠️ Ошибка детектирования цвета {color_type}: {e}")
+            return []
+    
+    def detect_around_tracks(self, screen: Union[np.ndarray, ScreenFrame],
+                             search_regions: List[Tuple[int, int, int, int]]) -> List[GameObject]:
+        """Поиск объектов только в окнах вокруг предсказанных позиций треков"""
+        objects = []
+        
+        try:
+            frame = self.make_frame(screen)
+            
+            # Те же области и цвета, что и при полном поиске
+            areas = [(self.screen_regions['center_screen'], self.CENTER_DETECTORS)]
+            areas += [(zone, self.JUNGLE_DETECTORS) for zone in self.jungle_zones]
+            
+            for (ax, ay, aw, ah), detectors in areas:
+                # Пересечения окон с областью (пересекающиеся окна объединяются)
+                rects = []
+                for rx, ry, rw, rh in search_regions:
+                    x0, y0 = max(ax, rx), max(ay, ry)
+                    x1, y1 = min(ax + aw, rx + rw), min(ay + ah, ry + rh)
+                    if x1 > x0 and y1 > y0:
+                        rects.append((x0, y0, x1, y1))
                 
-                if min_area < area < max_area:
-                    x, y, w, h = cv2.boundingRect(contour)
-                    
-                    # Вычисляем центр объекта с учетом смещения
-                    center_x = offset[0] + x + w // 2
-                    center_y = offset[1] + y + h // 2
-                    
-                    # Вычисляем уверенность на основе размера и четкости контура
-                    contour_solidity = area / (w * h) if w * h > 0 else 0
-                    confidence = min(0.95, 0.5 + contour_solidity * 0.5)
-                    
-                    # Определяем здоровье (случайно для симуляции)
-                    health = random.randint(30, 100) if obj_type == 'hero' else 100.0
-                    
-                    objects.append(GameObject(
-                        type=obj_type,
-                        position=(center_x, center_y),
-                        confidence=confidence,
-                        timestamp=time.time(),
-                        health=health,
-                        is_enemy=is_enemy
-                    ))
+                for x0, y0, x1, y1 in RegionCaptureBackend.merge_rects(rects):
+                    hsv = frame.hsv((x0, y0, x1 - x0, y1 - y0))
+                    labels = self.get_color_lut().label(hsv)
+                    for color_type, obj_type, is_enemy in detectors:
+                        objects.extend(self.detect_by_color(hsv, color_type, (x0, y0),
+                                                            obj_type, is_enemy, labels))
             
         except Exception as e:
-            print(f"⚠️ Ошибка детектирования цвета {color_type}: {e}")
+            print(f"⚠️ Ошибка поиска вокруг треков: {e}")
         
         return objects
     
-    def search_jungle_areas(self, screen: np.ndarray) -> List[GameObject]:
+    def search_jungle_areas(self, screen: Union[np.ndarray, ScreenFrame]) -> List[GameObject]:
         """Поиск крипов в зонах леса"""
         objects = []
         
         try:
-            # Координаты основных зон леса для 1920x1080
-            jungle_zones = [
-                (600, 300, 150, 150),   # Верхний лес (синий бафф)
-                (1150, 300, 150, 150),  # Верхний вражеский лес
-                (600, 600, 150, 150),   # Нижний лес (красный бафф)
-                (1150, 600, 150, 150),  # Нижний вражеский лес
-                (850, 450, 150, 150),   # Центральный лес (скакун/черепаха)
-            ]
+            frame = self.make_frame(screen)
             
-            for zone in jungle_zones:
-                x, y, w, h = zone
-                jungle_area = screen[y:y+h, x:x+w]
-                
-                # Преобразуем в HSV
-                hsv = cv2.cvtColor(jungle_area, cv2.COLOR_BGR2HSV)
-                
-                # Ищем крипов леса
-                jungle_objects = self.detect_by_color(hsv, 'jungle', (x, y), 'jungle', True)
-                objects.extend(jungle_objects)
-                
-                # Также ищем обычных крипов
-                creep_objects = self.detect_by_color(hsv, 'creep', (x, y), 'creep', True)
-                objects.extend(creep_objects)
+            for zone in self.jungle_zones:
+                # Крипы леса и обычные крипы (JUNGLE_DETECTORS)
+                objects.extend(self.detect_in_region(frame, zone, self.JUNGLE_DETECTORS))
             
             if self.debug and objects:
                 jungle_count = sum(1 for obj in objects if obj.type == 'jungle')
@@ -230,52 +457,20 @@ class VisionEngine:
         
         return objects
     
-    def analyze_minimap(self, screen: np.ndarray) -> Dict:
-        """Анализ мини-карты"""
+    def analyze_minimap(self, screen: Union[np.ndarray, ScreenFrame]) -> Dict:
+        """Анализ мини-карты: позиция героя и врагов в координатах карты"""
         try:
-            x, y, w, h = self.screen_regions['minimap']
-            minimap = screen[y:y+h, x:x+w]
-            
-            # Преобразуем в HSV
-            hsv = cv2.cvtColor(minimap, cv2.COLOR_BGR2HSV)
-            
-            # Ищем зеленые зоны (лес)
-            jungle_lower = np.array([35, 40, 40])
-            jungle_upper = np.array([85, 255, 255])
-            jungle_mask = cv2.inRange(hsv, jungle_lower, jungle_upper)
-            
-            jungle_pixels = cv2.countNonZero(jungle_mask)
-            total_pixels = w * h
-            
-            if total_pixels == 0:
-                return {'position': 'unknown'}
-            
-            jungle_ratio = jungle_pixels / total_pixels
-            
-            # Определяем позицию
-            if jungle_ratio > 0.4:
-                position = "jungle"
-            elif jungle_ratio > 0.15:
-                position = "lane_border"
-            else:
-                # Проверяем наличие врагов (красные точки)
-                enemy_lower = np.array([0, 100, 100])
-                enemy_upper = np.array([10, 255, 255])
-                enemy_mask = cv2.inRange(hsv, enemy_lower, enemy_upper)
-                enemy_pixels = cv2.countNonZero(enemy_mask)
-                
-                if enemy_pixels > 50:
-                    position = "enemy_territory"
-                else:
-                    position = "lane_center"
+            frame = self.make_frame(screen)
+            region = self.screen_regions['minimap']
             
-            return {'position': position}
+            # HSV-вид мини-карты из общего буфера, сетка обновляется по изменениям
+            return self.minimap.update(frame.bgr_region(region), frame.hsv(region))
             
         except Exception as e:
             print(f"⚠️ Ошибка анализа мини-карты: {e}")
             return {'position': 'unknown'}
     
-    def analyze_interface(self, screen: np.ndarray) -> Dict:
+    def analyze_interface(self, screen: Union[np.ndarray, ScreenFrame]) -> Dict:
         """Анализ интерфейса"""
         results = {
             'health': 100,
@@ -288,37 +483,34 @@ class VisionEngine:
         }
         
         try:
-            # Анализ полоски здоровья
-            health_region = self.screen_regions['health_bar']
-            x, y, w, h = health_region
-            
-            if y + h <= screen.shape[0] and x + w <= screen.shape[1]:
-                health_area = screen[y:y+h, x:x+w]
-                
-                # Ищем зеленый цвет
-                hsv = cv2.cvtColor(health_area, cv2.COLOR_BGR2HSV)
-                health_lower = np.array([40, 40, 40])
-                health_upper = np.array([80, 255, 255])
-                health_mask = cv2.inRange(hsv, health_lower, health_upper)
-                
-                health_pixels = cv2.countNonZero(health_mask)
-                total_pixels = w * h
-                
-                if total_pixels > 0:
-                    health_percent = (health_pixels / total_pixels) * 100
-                    results['health'] = min(100, max(1, int(health_percent)))
+            frame = self.make_frame(screen)
             
-            # Симуляция скиллов (в реальной игре нужно распознавать иконки)
-            if random.random() > 0.1:  # 90% шанс что скиллы готовы
-                results['skills_ready']['s1'] = True
-                results['skills_ready']['s2'] = True
-                results['skills_ready']['s3'] = True
-            
-            if random.random() > 0.7:  # 30% шанс что ульта готова
-                results['skills_ready']['ult'] = True
+            # Анализ полоски здоровья
+            health = self.run_gated('health_bar', frame, self.analyze_health_bar)
+            if health is not None:
+                results['health'] = health
+            
+            # Готовность скиллов
+            with profile_stage(self.profiler, 'vision.skills'):
+                results['skills_ready'] = dict(
+                    self.run_gated('skill_indicators', frame, self.analyze_skills)
+                )
+            
+            # Золото и уровень (нераспознанное значение не попадает в результат,
+            # и состояние сохраняет прошлое)
+            if self.digit_reader is not None:
+                with profile_stage(self.profiler, 'vision.ocr'):
+                    gold = self.read_number(frame, 'gold_area')
+                    level = self.read_number(frame, 'level_area')
+                results.pop('gold')
+                results.pop('level')
+                if gold is not None:
+                    results['gold'] = gold
+                if level is not None and 1 <= level <= 15:
+                    results['level'] = level
             
             # Симуляция роста
-            if random.random() > 0.8:
+            elif random.random() > 0.8:
                 results['level'] = min(15, results['level'] + 1)
                 results['gold'] += random.randint(50, 200)
             
@@ -327,31 +519,47 @@ class VisionEngine:
         
         return results
     
-    def save_debug_screenshot(self, objects: List[GameObject], filename: str = None):
-        """Сохранение скриншота с отладочной информацией"""
-        if self.last_screenshot is None:
-            return
+    def read_number(self, frame: ScreenFrame, region_name: str) -> Optional[int]:
+        """Число в области интерфейса (золото, уровень)"""
+        region = self.screen_regions.get(region_name)
+        if region is None:
+            return None
+        return self.digit_reader.read(frame.bgr_region(region))
+    
+    def analyze_health_bar(self, frame: ScreenFrame) -> Optional[int]:
+        """Здоровье в процентах по доле зеленых пикселей полоски"""
+        health_region = self.screen_regions['health_bar']
+        x, y, w, h = health_region
         
-        try:
-            debug_img = self.last_screenshot.copy()
-            
-            # Рисуем обнаруженные объекты
-            for obj in objects:
-                x, y = obj.position
-                color = (0, 255, 0) if not obj.is_enemy else (0, 0, 255)  # Зеленый для союзников, красный для врагов
-                cv2.circle(debug_img, (x, y), 10, color, 2)
-                
-                # Подпись
-                label = f"{obj.type} {int(obj.health)}%"
-                cv2.putText(debug_img, label, (x-20, y-15), 
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1)
-            
-            if filename is None:
-                timestamp = int(time.time())
-                filename = f"debug_vision_{timestamp}.png"
-            
-            cv2.imwrite(filename, debug_img)
-            print(f"📸 Отладочный скриншот сохранен: {filename}")
-            
-        except Exception as e:
-            print(f"⚠️ Ошибка сохранения скриншота: {e}")
\ No newline at end of file
+        if y + h > frame.height or x + w > frame.width:
+            return None
+        
+        # Ищем зеленый цвет
+        hsv = frame.hsv(health_region)
+        health_lower = np.array([40, 40, 40])
+        health_upper = np.array([80, 255, 255])
+        health_mask = cv2.inRange(hsv, health_lower, health_upper)
+        
+        health_pixels = cv2.countNonZero(health_mask)
+        total_pixels = w * h
+        
+        if total_pixels == 0:
+            return None
+        health_percent = (health_pixels / total_pixels) * 100
+        return min(100, max(1, int(health_percent)))
+    
+    def analyze_skills(self, frame: ScreenFrame) -> Dict[str, bool]:
+        """Готовность скиллов по иконкам (без детектора скиллы считаются готовыми)"""
+        if self.skill_detector is None:
+            return {'s1': True, 's2': True, 's3': True, 'ult': True}
+        return self.skill_detector.detect(frame.bgr_region(self.screen_regions['skill_indicators']))
+    
+    def save_debug_screenshot(self, objects: List[GameObject], filename: str = None) -> bool:
+        """Сохранение скриншота с отладочной информацией (разметка и запись в фоне)"""
+        if self.last_screenshot is None:
+            return False
+        queued = self.debug_writer.submit(self.last_screenshot, objects, prefix='debug_vision',
+                                          filename=filename, force=True)
+        if not queued:
+            print("⚠️ Ошибка сохранения скриншота: очередь записи занята")
+        return queued